@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+
+""" Point the app at a scratch home directory and import it, for the tests and benchmarks.
+    WEEWXAPP_APP picks another copy of the app to load, an older checkout say """
+
+import html
+import os
+import sys
+import tempfile
+from html.parser import HTMLParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PAYLOADS = os.path.join(HERE, "payloads")
+APP = os.environ.get("WEEWXAPP_APP", os.path.join(HERE, "..", "weewxapp", "usr", "share",
+                                                  "weewxapp"))
+
+HOME = tempfile.mkdtemp(prefix="weewxapp-tests-")
+os.environ["HOME"] = HOME
+sys.path.insert(0, os.path.abspath(APP))
+
+import common
+
+CONFIG = """[DEFAULT]
+saved = 1
+data_url = http://example.invalid/data.txt
+fctype = wmo.int
+forecast_url = http://example.invalid/forecast.json
+radar_url =
+rad_type = image
+show_radar = 0
+use_icons = 0
+metric = 1
+indoor_readings = 1
+dark_theme = 0
+update_freq = 1
+"""
+
+def reset(config=CONFIG):
+    """ Start again from an empty home with just config.ini, nothing cached in memory """
+
+    common.CONFIGBASE = HOME + "/.config/weewxapp/"
+    common.CACHEBASE = HOME + "/.cache/weewxapp/"
+    if "assetcache" in sys.modules:
+        sys.modules["assetcache"].set_directories(common.APPBASE, common.CACHEBASE)
+
+    history = sys.modules.get("history")
+    if history is not None:
+        for conn in history.CONNECTIONS.values():
+            conn.close()
+        history.CONNECTIONS.clear()
+        history.LAST_PRUNE.clear()
+
+    for directory in (common.CONFIGBASE, common.CACHEBASE):
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if os.path.isfile(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+
+    with open(common.CONFIGBASE + "config.ini", "w") as my_file:
+        my_file.write(config)
+
+    common.SETTINGS = None
+    common.SETTINGS_STAMP = None
+    common.STATION = None
+    if hasattr(common, "FORECAST_LAST"):
+        common.FORECAST_LAST.clear()
+
+def payload(name):
+    """ A file from tests/payloads as bytes """
+
+    with open(os.path.join(PAYLOADS, name), "rb") as my_file:
+        return my_file.read()
+
+def use_payload(name, target):
+    """ Copy a payload into the config directory as target, freshly written so it's used
+        instead of being downloaded again """
+
+    with open(common.CONFIGBASE + target, "wb") as my_file:
+        my_file.write(payload(name))
+
+def refresh_cycle():
+    """ A RefreshCycle for the current settings """
+
+    return common.RefreshCycle(common.snapshot_settings())
+
+def render(func, cycle=None):
+    """ Run one of the page renderers, on a fresh RefreshCycle unless one is passed, and
+        return its HTML """
+
+    if cycle is None:
+        cycle = refresh_cycle()
+
+    ret = func("18", cycle)
+    if isinstance(ret, list):
+        ret = "".join(ret)
+
+    return ret
+
+class TextOnly(HTMLParser):
+    """ Collect the text a browser would show, without styles or scripts """
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.skip = 0
+        self.words = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("style", "script"):
+            self.skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("style", "script") and self.skip > 0:
+            self.skip -= 1
+
+    def handle_data(self, data):
+        if self.skip == 0:
+            self.words += html.unescape(data).split()
+
+def visible_text(markup):
+    """ The words of a page as a browser would show them, one space apart """
+
+    parser = TextOnly()
+    parser.feed(markup)
+    parser.close()
+
+    return " ".join(parser.words)
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+
+""" How long one trend chart takes to draw against how many points its series has.
+    Run it with python3 tests/bench_charts.py """
+
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "weewxapp",
+                                "usr", "share", "weewxapp"))
+
+import charts
+
+# A day, a week and a month of 5 minute samples, then a lot more than the history ever keeps
+LENGTHS = (288, 2016, 8640, 100000, 1000000)
+WIDTH = 600
+HEIGHT = 70
+
+def series(count, rng):
+    """ A sine wave a day long plus noise, with one spike the downsampling has to keep """
+
+    times = numpy.arange(count) * 300.0
+    values = 15 + 8 * numpy.sin(times / 86400 * 2 * numpy.pi) + rng.normal(0, 0.5, count)
+    values[count // 3] = 40
+
+    return times.tolist(), values.tolist()
+
+def main():
+    rng = numpy.random.default_rng(1)
+
+    for count in LENGTHS:
+        times, values = series(count, rng)
+        reps = 200 if count < 100000 else 5
+
+        start = time.perf_counter()
+        for _ in range(reps):
+            svg = charts.svg_chart(times, values, WIDTH, HEIGHT, "Temperature", "C")
+        elapsed = (time.perf_counter() - start) / reps * 1000
+
+        kept = 40.0 in charts.downsample(times, values, WIDTH)[1]
+        print("%8d points %8.2f ms %6d bytes, spike kept: %s" % (count, elapsed, len(svg), kept))
+
+if __name__ == "__main__":
+    main()
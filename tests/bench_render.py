@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+
+""" Time the Weather and Stats renderers on the sample payloads in tests/payloads. Each
+    payload is downloaded and parsed once, like in one refresh, and only rendering is timed.
+
+    python3 tests/bench_render.py times this tree. To compare with the renderer from before
+    the templates, check out an older commit somewhere else and point WEEWXAPP_APP at it:
+
+        git worktree add /tmp/old 06d1766
+        WEEWXAPP_APP=/tmp/old/weewxapp/usr/share/weewxapp python3 tests/bench_render.py
+
+    The trend charts are left out, they're timed by bench_charts.py. """
+
+import time
+
+import appenv
+
+FIELD_COUNTS = (225, 205, 170)
+RUNS = 15
+REPEATS = 300
+
+def best(func, cycle):
+    """ The fastest of RUNS runs of REPEATS renders, in us per render """
+
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            appenv.render(func, cycle)
+        times.append((time.perf_counter() - start) / REPEATS * 1e6)
+
+    return min(times)
+
+def main():
+    common = appenv.common
+    common.trendCharts = lambda record, width: ""
+    print("app: " + appenv.APP)
+
+    for count in FIELD_COUNTS:
+        appenv.reset()
+        appenv.use_payload("data_%d.txt" % count, "data.txt")
+        cycle = appenv.refresh_cycle()
+        cycle.station()
+
+        conditions = best(common.loadCurrentConditions, cycle)
+        stats = best(common.getStats, cycle)
+        print("%d fields: Weather %7.1f us, Stats %7.1f us" % (count, conditions, stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+""" Tests for the local observation history """
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "weewxapp",
+                                "usr", "share", "weewxapp"))
+
+import history
+
+class Station(object):
+    """ Just enough of a StationRecord for history.record() """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def get(self, name):
+        return self.fields.get(name, "")
+
+class RecordTest(unittest.TestCase):
+    """ Rolling observations up into averaged buckets """
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+
+    def tearDown(self):
+        conn = history.CONNECTIONS.pop(self.filename, None)
+        if conn is not None:
+            conn.close()
+
+        history.LAST_PRUNE.pop(self.filename, None)
+        os.unlink(self.filename)
+
+    def add(self, when, **fields):
+        raw = repr((when, sorted(fields.items()))).encode()
+        self.assertTrue(history.record(self.filename, Station(**fields), raw, when))
+
+    def test_missing_values_dont_count_towards_the_average(self):
+        when = 1760000000 // 300 * 300
+        self.add(when, out_temp="", out_humidity="50")
+        self.add(when + 60, out_temp="10", out_humidity="")
+        self.add(when + 120, out_temp="20", out_humidity="70")
+
+        rows = history.series(self.filename, "out_temp", when, when, history.FIVE_MIN)
+        self.assertEqual(rows, [(when, 15.0)])
+
+        rows = history.series(self.filename, "out_humidity", when, when, history.FIVE_MIN)
+        self.assertEqual(rows, [(when, 60.0)])
+
+    def test_field_never_sent_stays_empty(self):
+        when = 1760000000 // 300 * 300
+        self.add(when, out_temp="10")
+        self.add(when + 60, out_temp="12")
+
+        self.assertEqual(history.series(self.filename, "uv", when, when, history.FIVE_MIN), [])
+        self.assertEqual(history.series(self.filename, "out_temp", when, when,
+                                        history.FIVE_MIN), [(when, 11.0)])
+
+    def test_week_is_read_from_five_minute_buckets(self):
+        now = 1760000000 // 3600 * 3600 + 1800
+        self.add(now - 1200, out_temp="10")
+        self.add(now - 600, out_temp="20")
+
+        self.assertEqual(history.level_for(now - 7 * 86400, now), history.FIVE_MIN)
+
+        rows = history.series(self.filename, "out_temp", now - 7 * 86400, now, now=now)
+        self.assertEqual([row[1] for row in rows], [10.0, 20.0])
+
+    def test_month_is_read_from_hourly_buckets(self):
+        now = 1760000000 // 3600 * 3600 + 1800
+        self.add(now - 1200, out_temp="10")
+        self.add(now - 600, out_temp="20")
+
+        rows = history.series(self.filename, "out_temp", now - 30 * 86400, now, now=now)
+        self.assertEqual([row[1] for row in rows], [15.0])
+
+    def test_same_payload_is_only_recorded_once(self):
+        station = Station(out_temp="10")
+        self.assertTrue(history.record(self.filename, station, b"payload", 1760000000))
+        self.assertFalse(history.record(self.filename, station, b"payload", 1760000060))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+
+""" Every forecast provider's parser turns a recorded forecast into Day records. The
+    payloads in tests/payloads follow each provider's layout, with made up weather """
+
+import unittest
+
+from PIL import Image
+
+import appenv
+
+import day
+import providers
+
+common = appenv.common
+
+# The recorded forecast for each fctype
+PAYLOADS = {"yahoo": "forecast_yahoo.html", "weatherzone": "forecast_wz.xml",
+            "yr.no": "forecast_yrno.xml", "bom.gov.au": "forecast_bom.xml",
+            "wmo.int": "forecast_wmo.json", "weather.gov": "forecast_wgov.json",
+            "weather.gc.ca": "forecast_wca.html", "weather.gc.ca-fr": "forecast_wcafr.html",
+            "metoffice.gov.uk": "forecast_metoffice.html", "bom2": "forecast_bom2.html",
+            "aemet.es": "forecast_aemet.xml", "dwd.de": "forecast_dwd.html",
+            "metservice.com": "forecast_metservice.json", "meteofrance.com": "forecast_mf.html",
+            "darksky.net": "forecast_darksky.json", "openweathermap.org": "forecast_owm.json",
+            "apixu.com": "forecast_apixu.json", "weather.com": "forecast_wcom.json",
+            "met.ie": "forecast_metie.json"}
+
+# Settings some providers need besides the forecast
+EXTRA = {"bom.gov.au": {"bomtown": "Penrith"}, "met.ie": {"metierev": "Dublin, Ireland"}}
+
+# Icons the Yahoo and weather.gov parsers expect to have been downloaded already
+YAHOO_ICONS = ("clear_day", "partly_cloudy_day", "showers_day", "cloudy_day", "rain_day")
+WGOV_ICONS = ("bkn", "ra", "nra")
+
+class ProviderTest(unittest.TestCase):
+    """ Parse each provider's payload """
+
+    def setUp(self):
+        appenv.reset()
+
+        for name in YAHOO_ICONS:
+            with open(common.CACHEBASE + "yahoo-" + name + "@2x.png", "wb") as my_file:
+                my_file.write(b"")
+
+        for name in WGOV_ICONS:
+            Image.new("RGB", (86, 86), (128, 160, 224)).save(common.CACHEBASE + "wgov" + name +
+                                                              ".jpg")
+
+    def settings(self, fctype, use_icons):
+        base = common.snapshot_settings()
+        values = {name: getattr(base, name) for name in common.Settings.__slots__}
+        values.update(EXTRA.get(fctype, {}))
+        values['fctype'] = fctype
+        values['use_icons'] = use_icons
+
+        return common.Settings(values)
+
+    def test_every_provider_has_a_payload(self):
+        self.assertEqual(sorted(PAYLOADS), sorted(providers.PROVIDERS))
+
+    def test_parsers_return_days(self):
+        for fctype, provider in sorted(providers.PROVIDERS.items()):
+            for use_icons in (False, True):
+                with self.subTest(fctype=fctype, use_icons=use_icons):
+                    data = appenv.payload(PAYLOADS[fctype]).decode('utf8')
+                    ret = provider.parse(data, self.settings(fctype, use_icons))
+
+                    self.assertIs(ret[0], True, ret[1])
+                    self.assertIsInstance(ret[2], str)
+                    self.assertNotEqual(ret[2], "")
+                    self.assertGreater(len(ret[1]), 1)
+
+                    for myday in ret[1]:
+                        self.assertIsInstance(myday, day.Day)
+                        self.assertNotEqual(myday.day, "")
+                        self.assertNotEqual(myday.icon, "")
+                        self.assertIsNotNone(myday.icon)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+
+""" config.ini is read once and then only again after it changes, however many pages are
+    rendered in between, and settings that fail to save leave the old downloads in place """
+
+import builtins
+import os
+import unittest
+from unittest import mock
+
+import appenv
+
+common = appenv.common
+
+class ReadCounter(object):
+    """ Wraps open() and counts the times config.ini is opened """
+
+    def __init__(self):
+        self.open = builtins.open
+        self.reads = 0
+
+    def __call__(self, file, *args, **kwargs):
+        if isinstance(file, str) and file.endswith("config.ini"):
+            self.reads += 1
+
+        return self.open(file, *args, **kwargs)
+
+class SettingsReadTest(unittest.TestCase):
+    """ How often a refresh reads config.ini """
+
+    def setUp(self):
+        appenv.reset()
+        appenv.use_payload("data_225.txt", "data.txt")
+        appenv.use_payload("forecast_wmo.json", "forecast.txt")
+
+    def render_all(self):
+        """ Everything one refresh draws, the header, both forecast layouts and the
+            Weather and Stats pages """
+
+        cycle = appenv.refresh_cycle()
+        common.htmlheader(cycle.settings)
+        for func in (common.loadForecast1, common.loadForecast2):
+            self.assertNotEqual(func(cycle), [])
+        for func in (common.loadCurrentConditions, common.getStats):
+            self.assertNotEqual(appenv.render(func, cycle), "")
+
+    def count_reads(self):
+        counter = ReadCounter()
+        with mock.patch("builtins.open", counter):
+            self.render_all()
+
+        return counter.reads
+
+    def test_unchanged_config_is_not_read_again(self):
+        self.render_all()
+        self.assertEqual(self.count_reads(), 0)
+        self.assertEqual(self.count_reads(), 0)
+
+    def test_changed_config_is_read_once(self):
+        self.render_all()
+
+        with open(common.CONFIGBASE + "config.ini", "a") as my_file:
+            my_file.write("use_icons = 1\n")
+        stat = os.stat(common.CONFIGBASE + "config.ini")
+        os.utime(common.CONFIGBASE + "config.ini", ns=(stat.st_atime_ns,
+                                                        stat.st_mtime_ns + 1000000000))
+
+        self.assertEqual(self.count_reads(), 1)
+        self.assertEqual(common.get_string("use_icons", "0"), "1")
+        self.assertEqual(self.count_reads(), 0)
+
+SETTINGS_URL = "http://example.invalid/settings.txt"
+
+class SaveConfigTest(unittest.TestCase):
+    """ Saving settings from a new settings.txt """
+
+    def setUp(self):
+        appenv.reset()
+        appenv.use_payload("data_225.txt", "data.txt")
+        appenv.use_payload("forecast_wmo.json", "forecast.txt")
+
+        self.served = {SETTINGS_URL: b"data=http://example.invalid/new-data.txt\n"
+                                     b"fctype=wmo.int\n"
+                                     b"forecast=http://example.invalid/new-forecast.json\n",
+                       "http://example.invalid/new-data.txt": b"4000|" +
+                                                              appenv.payload("data_205.txt"),
+                       "http://example.invalid/new-forecast.json":
+                           appenv.payload("forecast_wmo.json")}
+
+    def download(self, url, validators=None):
+        if url not in self.served:
+            return [False, "Connection refused"]
+
+        return [True, self.served[url]]
+
+    def save(self):
+        with mock.patch.object(common, "download", self.download):
+            return common.save_config(SETTINGS_URL, True, False, True, False, False, 1, False)
+
+    def test_failed_save_keeps_the_old_downloads(self):
+        del self.served["http://example.invalid/new-forecast.json"]
+
+        ret = self.save()
+        self.assertIs(ret[0], False)
+        self.assertEqual(common.get_string("data_url", ""), "http://example.invalid/data.txt")
+        self.assertEqual(appenv.payload("data_225.txt").decode('utf8'),
+                         common.read_file("data.txt")[1])
+        self.assertEqual(sorted(os.listdir(common.CONFIGBASE)),
+                         ["config.ini", "data.txt", "forecast.txt"])
+
+    def test_saved_settings_keep_the_new_downloads(self):
+        ret = self.save()
+        self.assertIs(ret[0], True, ret[1])
+        self.assertEqual(common.get_string("data_url", ""),
+                         "http://example.invalid/new-data.txt")
+        self.assertEqual(appenv.payload("data_205.txt").decode('utf8').strip(),
+                         common.read_file("data.txt")[1])
+        self.assertEqual(sorted(os.listdir(common.CONFIGBASE)),
+                         ["config.ini", "data.txt", "forecast.txt"])
+
+if __name__ == "__main__":
+    unittest.main()
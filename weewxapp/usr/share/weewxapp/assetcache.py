@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+
+""" Serve the app's assets to the webviews from memory over weewx:// """
+
+import collections
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+SCHEME = "weewx"
+
+# weewx://app/<name> is a file in APPBASE/assets, weewx://cache/<name> is a file in CACHEBASE
+APP = "app"
+CACHE = "cache"
+
+# How many bytes of assets are kept in memory, the least recently used go first
+MAX_BYTES = 8 * 1024 * 1024
+
+# The app's own assets only change when the package is upgraded, downloaded files can change
+# at any time so the webview has to ask for them every time
+CACHE_CONTROL = {APP: "max-age=31536000, immutable", CACHE: "no-cache"}
+
+TYPES = {".woff": "font/woff", ".ttf": "font/ttf", ".svg": "image/svg+xml",
+         ".css": "text/css", ".json": "application/json"}
+
+# Files put() makes are named <folder>/<sha1 of the content><extension> so never change, the
+# name alone says a file is one of them
+GENERATED = re.compile(r"^[^/]+/[0-9a-f]{40}\.\w+$")
+
+# prune() leaves files put() handed out in the last PRUNE_GRACE seconds, they may belong to a
+# forecast that's still being parsed
+PRUNE_GRACE = 3600
+
+ENTRIES = collections.OrderedDict()
+LOCK = threading.Lock()
+STATS = {"hits": 0, "misses": 0, "bytes": 0}
+
+DIRECTORIES = {}
+
+def set_directories(appbase, cachebase):
+    """ Where weewx://app/ and weewx://cache/ are read from """
+
+    DIRECTORIES[APP] = os.path.join(appbase, "assets")
+    DIRECTORIES[CACHE] = cachebase
+
+def app_uri(name):
+    """ URI of a file in APPBASE/assets """
+
+    return SCHEME + "://" + APP + "/" + name
+
+def cache_uri(name):
+    """ URI of a file in CACHEBASE """
+
+    return SCHEME + "://" + CACHE + "/" + name
+
+def mime_type(name):
+    """ The content type an asset is served with """
+
+    mime = TYPES.get(os.path.splitext(name)[1].lower())
+    if mime is None:
+        mime = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    return mime
+
+def split(uri):
+    """ weewx://cache/radar.gif -> ('cache', 'radar.gif'), or None if it isn't ours """
+
+    prefix = SCHEME + "://"
+    if not uri.startswith(prefix):
+        return None
+
+    host, _, name = uri[len(prefix):].partition("/")
+    name = name.split("?")[0].split("#")[0]
+    if host not in DIRECTORIES or name == "" or ".." in name.split("/"):
+        return None
+
+    return host, name
+
+def store(key, stamp, data):
+    """ Add an entry, and drop the least recently used ones until it all fits again """
+
+    if len(data) > MAX_BYTES:
+        return
+
+    with LOCK:
+        old = ENTRIES.pop(key, None)
+        if old is not None:
+            STATS['bytes'] -= len(old[1])
+
+        ENTRIES[key] = (stamp, data)
+        STATS['bytes'] += len(data)
+
+        while STATS['bytes'] > MAX_BYTES:
+            STATS['bytes'] -= len(ENTRIES.popitem(last=False)[1][1])
+
+def cache_control(host, name):
+    """ The Cache-Control header an asset is served with """
+
+    if host == CACHE and GENERATED.match(name) is not None:
+        return CACHE_CONTROL[APP]
+
+    return CACHE_CONTROL[host]
+
+def load(uri):
+    """ [True, bytes, mime type, cache control] for a weewx:// URI, or [False, message] """
+
+    where = split(uri)
+    if where is None:
+        return [False, "Unknown asset " + uri]
+
+    filename = os.path.join(DIRECTORIES[where[0]], where[1])
+    try:
+        info = os.stat(filename)
+    except OSError as e:
+        return [False, str(e)]
+
+    # Files are checked on every request so a new radar.gif or webcam.jpg is never missed
+    stamp = (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    with LOCK:
+        entry = ENTRIES.get(uri)
+        if entry is not None and entry[0] == stamp:
+            ENTRIES.move_to_end(uri)
+            STATS['hits'] += 1
+            return [True, entry[1], mime_type(where[1]), cache_control(*where)]
+
+        STATS['misses'] += 1
+
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return [False, str(e)]
+
+    store(uri, stamp, data)
+    return [True, data, mime_type(where[1]), cache_control(*where)]
+
+def put(folder, data, extension):
+    """ Keep generated bytes, named by their content, and return their URI. They're saved in
+        CACHEBASE too so the URI still works once they've dropped out of memory """
+
+    name = folder + "/" + hashlib.sha1(data).hexdigest() + extension
+    filename = os.path.join(DIRECTORIES[CACHE], name)
+
+    # A file that's already there is touched so prune() knows it's still wanted
+    if os.path.exists(filename):
+        os.utime(filename)
+    else:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(data)
+
+    uri = cache_uri(name)
+    info = os.stat(filename)
+    store(uri, (info.st_ino, info.st_mtime_ns, info.st_size), data)
+
+    return uri
+
+def prune(keep):
+    """ Delete the files put() made that aren't in keep, a set of their URIs, and return how
+        many went. Called when the forecast they were made for is replaced """
+
+    cachebase = DIRECTORIES[CACHE]
+    oldest = time.time() - PRUNE_GRACE
+    removed = 0
+
+    try:
+        folders = [entry.name for entry in os.scandir(cachebase) if entry.is_dir()]
+    except OSError as e:
+        print("Failed to prune " + cachebase + ", " + str(e))
+        return removed
+
+    for folder in folders:
+        try:
+            entries = list(os.scandir(os.path.join(cachebase, folder)))
+        except OSError as e:
+            print("Failed to prune " + folder + ", " + str(e))
+            continue
+
+        for entry in entries:
+            name = folder + "/" + entry.name
+            uri = cache_uri(name)
+            if GENERATED.match(name) is None or uri in keep:
+                continue
+
+            try:
+                if entry.stat().st_mtime > oldest:
+                    continue
+
+                os.remove(entry.path)
+            except OSError as e:
+                print("Failed to prune " + name + ", " + str(e))
+                continue
+
+            removed += 1
+            with LOCK:
+                old = ENTRIES.pop(uri, None)
+                if old is not None:
+                    STATS['bytes'] -= len(old[1])
+
+    return removed
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+
+""" Small inline SVG trend charts drawn from the observation history """
+
+import numpy
+
+def downsample(times, values, threshold):
+    """ Cut a series down to threshold points while keeping its shape.
+
+        This is Largest-Triangle-Three-Buckets, except that each bucket is compared with the
+        average of the bucket before it rather than the point picked from it. That takes away
+        the dependency between buckets so every bucket is done at once with numpy. """
+
+    count = len(values)
+    if threshold < 3 or count <= threshold:
+        return numpy.asarray(times, dtype=float), numpy.asarray(values, dtype=float)
+
+    xs = numpy.asarray(times, dtype=float)
+    ys = numpy.asarray(values, dtype=float)
+
+    # The first and last points are always kept, everything in between is split into
+    # threshold - 2 buckets that each give up one point. edges are where each bucket starts
+    # in xs[1:-1], and every bucket has at least one point in it
+    edges = numpy.linspace(0, count - 2, threshold - 1).astype(int)
+    starts = edges[:-1]
+    sizes = numpy.diff(edges)
+    bucket = numpy.repeat(numpy.arange(threshold - 2), sizes)
+
+    inner_x = xs[1:-1]
+    inner_y = ys[1:-1]
+    mean_x = numpy.add.reduceat(inner_x, starts) / sizes
+    mean_y = numpy.add.reduceat(inner_y, starts) / sizes
+
+    prev_x = numpy.concatenate(([xs[0]], mean_x[:-1]))[bucket]
+    prev_y = numpy.concatenate(([ys[0]], mean_y[:-1]))[bucket]
+    next_x = numpy.concatenate((mean_x[1:], [xs[-1]]))[bucket]
+    next_y = numpy.concatenate((mean_y[1:], [ys[-1]]))[bucket]
+
+    # Twice the area of the triangle each point makes with its neighbouring buckets
+    area = numpy.abs((prev_x - next_x) * (inner_y - prev_y) -
+                     (prev_x - inner_x) * (next_y - prev_y))
+
+    # Sort by bucket then largest area first, the first entry for each bucket is its pick
+    order = numpy.lexsort((-area, bucket))
+    picked = numpy.concatenate(([0], order[starts] + 1, [count - 1]))
+
+    return xs[picked], ys[picked]
+
+def svg_chart(times, values, width, height, title, unit):
+    """ A line chart of the series as an inline <svg>, downsampled to one point per pixel """
+
+    if len(values) < 2:
+        return ""
+
+    xs, ys = downsample(times, values, width)
+
+    low = ys.min()
+    high = ys.max()
+    if high - low < 0.1:
+        high = low + 0.1
+
+    # Leave a little room top and bottom so the line isn't clipped
+    top = 16
+    plot = height - top - 4
+
+    px = (xs - xs[0]) / max(xs[-1] - xs[0], 1) * (width - 1)
+    py = top + (high - ys) / (high - low) * plot
+    points = " ".join("%.1f,%.1f" % point for point in zip(px.tolist(), py.tolist()))
+
+    svg = "<svg xmlns='http://www.w3.org/2000/svg' width='100%' height='" + str(height)
+    svg += "' viewBox='0 0 " + str(width) + " " + str(height) + "' preserveAspectRatio='none'>"
+    svg += "<text x='0' y='12' font-size='11' fill='currentColor'>" + title + "</text>"
+    svg += "<text x='" + str(width) + "' y='12' font-size='11' fill='currentColor' "
+    svg += "text-anchor='end'>" + ("%.1f" % ys.min()) + " &#8211; " + ("%.1f" % ys.max())
+    svg += unit + "</text>"
+    svg += "<polyline fill='none' stroke='currentColor' stroke-width='1.5' "
+    svg += "vector-effect='non-scaling-stroke' points='" + points + "'/></svg>"
+
+    return svg
@@ -1,25 +1,37 @@
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
 import configparser
 import datetime
-from ftplib import FTP
+from ftplib import FTP, error_perm
+import functools
+import hashlib
 import os
 import json
+import operator
+import random
+import shutil
 import zipfile
 import socket
+import string
+import threading
 import time
+from urllib.parse import urlparse
 import requests
 from PIL import Image
-import forecasts
-import meteofrance
-import wca
-import wgov
-import yahoo
+import assetcache
+import charts
+import day
+import history
+import providers
+import station
 
 CONFIGBASE = os.environ.get("HOME", "/tmp") + "/.config/weewxapp/"
 CACHEBASE = os.environ.get("HOME", "/tmp") + "/.cache/weewxapp/"
 APPBASE = "/usr/share/weewxapp/"
 
+assetcache.set_directories(APPBASE, CACHEBASE)
+
 HEADERS = {}
 HEADERS['User-Agent'] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 " + \
                         "(KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
@@ -32,14 +44,209 @@ INIGO_VERSION = 4000
 ICON_VERSION = 10
 ICON_URL = "https://github.com/evilbunny2008/weeWXWeatherApp/releases/download/0.8.25/icons.zip"
 
-def download(url):
-    """ Download json string from server based on a bounding box """
+# How long, in seconds, downloaded copies are used before fetching again
+DATA_MAX_AGE = 270
+WEBCAM_MAX_AGE = 270
+RADAR_MAX_AGE = 570
+FORECAST_MAX_AGE = 7170
+
+MAX_AGES = {"data": DATA_MAX_AGE, "webcam": WEBCAM_MAX_AGE, "radar": RADAR_MAX_AGE,
+            "forecast": FORECAST_MAX_AGE}
+
+# The downloaded copy of each resource, data and forecast are kept in CONFIGBASE and the
+# images in CACHEBASE
+RESOURCE_FILES = {"data": "data.txt", "webcam": "webcam.jpg", "radar": "radar.gif",
+                  "forecast": "forecast.txt"}
+
+# Number of downloads fetch_all() runs at once, and how long each one took last time
+FETCH_WORKERS = 6
+FETCH_TIMINGS = {}
+
+# Default timeouts in seconds, can be overridden with connect_timeout/read_timeout in config.ini
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# Failed downloads are retried with jittered exponential backoff starting at RETRY_BACKOFF
+# seconds, after BREAKER_THRESHOLD failures in a row a host isn't contacted again for
+# BREAKER_COOLDOWN seconds and the last cached copy is used instead
+DOWNLOAD_RETRIES = 2
+RETRY_BACKOFF = 1.0
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 300
+
+BREAKERS = {}
+BREAKER_LOCK = threading.Lock()
+
+# How many pages were rendered and how many were skipped because nothing they show changed
+RENDER_STATS = {"performed": 0, "skipped": 0}
+
+# The last parsed forecast is kept in forecast.json next to forecast.txt, keyed by a hash of
+# the raw forecast and the settings the parsers look at, so it's only parsed when it changes.
+# FORECAST_PARSES is fctype -> [times parsed, total seconds spent parsing]. The refresh
+# worker, the saver thread and the GUI all get at these, only ever under FORECAST_LOCK.
+FORECAST_CACHE = "forecast.json"
+FORECAST_STATS = {"hits": 0, "misses": 0}
+FORECAST_PARSES = {}
+FORECAST_LAST = {}
+FORECAST_LOCK = threading.Lock()
+SAVER = ThreadPoolExecutor(max_workers=1)
+
+# The last data.txt downloaded and the StationRecord parsed from it
+STATION = None
+STATION_LOCK = threading.Lock()
+
+# Every observation downloaded is also kept here, see history.py
+HISTORY_FILE = "history.db"
+
+# The last good render of each view is kept in CACHEBASE/pages and shown on startup with this
+# badge until fresh data replaces it
+PAGES_DIR = "pages"
+AGE_BADGE = "<div style='position:fixed;top:4px;right:4px;font-size:9pt;color:#000;" + \
+            "background-color:#ffd;padding:1px 4px;border-radius:3px;'>%s</div>"
+
+# Trend charts on the Weather tab, how far back each set goes and the fields drawn as
+# (field, title, StationRecord field holding its unit). CHART_WIDTH is used until the
+# window's real width is known
+CHART_SPANS = (("Last 24 hours", 86400), ("Last 7 days", 7 * 86400),
+               ("Last 30 days", 30 * 86400))
+CHART_FIELDS = (("out_temp", "Temperature", "temp_unit"),
+                ("barometer", "Pressure", "pressure_unit"),
+                ("wind_speed", "Wind", "wind_unit"),
+                ("rain_today", "Rain today", "rain_unit"))
+CHART_WIDTH = 400
+CHART_HEIGHT = 70
+
+# Parsed copy of config.ini, reloaded when the file's inode, mtime or size changes
+SETTINGS = None
+SETTINGS_STAMP = None
+SETTINGS_LOCK = threading.RLock()
+
+def get_timeouts():
+    """ Connect and read timeouts for downloads """
+
+    try:
+        connect = float(get_string("connect_timeout", str(CONNECT_TIMEOUT)))
+        read = float(get_string("read_timeout", str(READ_TIMEOUT)))
+    except ValueError:
+        connect = CONNECT_TIMEOUT
+        read = READ_TIMEOUT
+
+    return (connect, read)
+
+def breaker_allows(host):
+    """ Check if a host may be contacted, after the cooldown one trial request is let through """
+
+    with BREAKER_LOCK:
+        breaker = BREAKERS.get(host)
+        if breaker is None or breaker['state'] == "closed":
+            return True
+
+        if breaker['state'] == "open" and time.time() - breaker['opened'] >= BREAKER_COOLDOWN:
+            breaker['state'] = "half-open"
+            return True
+
+        return False
+
+def breaker_record(host, success, error="", counts=True):
+    """ Update a host's breaker with the outcome of a download, a failure that doesn't count
+        (a 404 say) is only remembered """
+
+    with BREAKER_LOCK:
+        breaker = BREAKERS.setdefault(host, {'state': "closed", 'failures': 0, 'opened': 0,
+                                             'last_error': ""})
+        if success:
+            breaker['state'] = "closed"
+            breaker['failures'] = 0
+            return
+
+        breaker['last_error'] = error
+        if not counts:
+            # The trial request after a cooldown didn't show the host is back, wait again
+            if breaker['state'] == "half-open":
+                breaker['state'] = "open"
+                breaker['opened'] = time.time()
+            return
+
+        breaker['failures'] += 1
+        if breaker['state'] == "half-open" or breaker['failures'] >= BREAKER_THRESHOLD:
+            if breaker['state'] != "open":
+                print("Not contacting " + host + " for " + str(BREAKER_COOLDOWN) + \
+                      " seconds after " + str(breaker['failures']) + " failures")
+            breaker['state'] = "open"
+            breaker['opened'] = time.time()
+
+def breaker_status():
+    """ Copy of the breaker state and failure count for every host seen """
+
+    with BREAKER_LOCK:
+        return {host: dict(breaker) for host, breaker in BREAKERS.items()}
+
+def format_breakers():
+    """ Describe hosts that are failing """
+
+    status = []
+    for host, breaker in sorted(breaker_status().items()):
+        if breaker['failures'] > 0:
+            status.append(host + " " + breaker['state'] + " (" + str(breaker['failures']) + \
+                          " failures: " + breaker['last_error'] + ")")
+
+    return ", ".join(status)
+
+def download(url, validators=None):
+    """ Download json string from server based on a bounding box
+
+        If a validators dict is passed it's used to make a conditional request and
+        is updated from the response, [True, None] means the server answered 304. """
+
+    if not url.startswith("http") and not url.startswith("ftp"):
+        return [False, "Unknown URL handle, can't continue, url: '" + url + "'"]
+
+    host = urlparse(url).hostname or ""
+    if not breaker_allows(host):
+        return [False, "Skipped " + url + ", " + host + " has failed too often recently"]
+
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        if attempt > 0:
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+        ret, transient = download_once(url, validators)
+        if ret[0] is True or not transient:
+            break
+
+    # Only timeouts, connection problems and server errors count against the host
+    if ret[0] is True:
+        breaker_record(host, True)
+    else:
+        breaker_record(host, False, str(ret[1]), transient)
+
+    return ret
+
+def download_once(url, validators=None):
+    """ Make a single download attempt, returns the result and whether it's worth retrying """
+
+    connect_timeout, read_timeout = get_timeouts()
 
     if url.startswith("http"):
+        headers = {}
+        if validators is not None:
+            if validators.get('etag', '') != "":
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified', '') != "":
+                headers['If-Modified-Since'] = validators['last_modified']
+
         try:
-            ret = SESSION.get(url)
+            ret = SESSION.get(url, headers=headers, timeout=(connect_timeout, read_timeout))
         except Exception as error:
-            return [False, str(error)]
+            return [False, str(error)], True
+
+        if validators is not None:
+            validators['url'] = url
+            validators['etag'] = ret.headers.get('ETag', validators.get('etag', ''))
+            validators['last_modified'] = ret.headers.get('Last-Modified',
+                                                          validators.get('last_modified', ''))
+
+        if ret.status_code == 304 and validators is not None:
+            return [True, None], False
 
         if ret.ok:
             if 'aemet' in url.lower():
@@ -47,33 +254,313 @@ def download(url):
             else:
                 content = ret.content
 
-            return [True, content]
+            return [True, content], False
+
+        transient = ret.status_code >= 500 or ret.status_code == 429
+        return [False, "Failed to download " + url + ", error status: " + \
+                str(ret.status_code)], transient
+
+    url = url[6:]
+    hostname, url = url.split('/', 1)
+    url = "/" + url
+    filename = os.path.basename(url)
+    url = url[:-1 * len(filename)]
+
+    try:
+        # The connection is closed on the way out of the with, even if something failed
+        with FTP(hostname, timeout=read_timeout) as ftp:
+            ftp.login()
+            ftp.cwd(url)
+
+            # Collect in memory, parallel downloads can't share a temp file
+            chunks = []
+            ftp.retrbinary('RETR %s' % filename, chunks.append)
+    except error_perm as error:
+        return [False, str(error)], False
+    except Exception as error:
+        return [False, str(error)], True
+
+    return [True, b"".join(chunks)], False
+
+def read_validators(filename, directory, url):
+    """ Load the ETag/Last-Modified saved next to a cached file """
+
+    if not os.path.exists(directory + "/" + filename):
+        return {}
+
+    try:
+        with open(directory + "/" + filename + ".http", "r") as my_file:
+            validators = json.load(my_file)
+    except (OSError, ValueError):
+        return {}
 
-        return [False, "Failed to download " + url + ", error status: " + str(ret.status_code)]
-    elif url.startswith("ftp"):
-        url = url[6:]
-        hostname, url = url.split('/', 1)
-        url = "/" + url
-        filename = os.path.basename(url)
-        url = url[:-1 * len(filename)]
+    if validators.get('url', '') != url:
+        return {}
 
-        ftp = FTP(hostname)
-        ftp.login()
-        ftp.cwd(url)
+    return validators
 
-        with open(CACHEBASE + "/tempfile.txt", 'wb') as file_name:
-            def callback(data):
-                """ Write FTP response to localfile """
-                file_name.write(data)
+def fetch_cached(url, filename, directory, save):
+    """ Conditionally download url into directory/filename.
 
-            ftp.retrbinary('RETR %s' % filename, callback)
+        save(content) writes a changed download and returns [True, ...] or [False, error].
+        When the server says the cached copy is current its timestamp is refreshed and
+        [True, None] is returned without anything being transferred or saved. """
 
-        ret = read_file("/tempfile.txt", CACHEBASE)
-        ret[1] = ret[1].encode("utf8")
-        os.remove(CACHEBASE + "/tempfile.txt")
+    validators = read_validators(filename, directory, url)
+
+    ret = download(url, validators)
+    if ret[0] is False:
+        return ret
+
+    if ret[1] is None:
+        os.utime(directory + "/" + filename, None)
         return ret
 
-    return [False, "Unknown URL handle, can't continue, url: '" + url + "'"]
+    ret = save(ret[1])
+    if ret[0] is True and (validators.get('etag', '') != "" or
+                           validators.get('last_modified', '') != ""):
+        write_file(filename + ".http", json.dumps(validators), directory)
+
+    return ret
+
+def fetch_all(jobs):
+    """ Run independent downloads at the same time.
+
+        jobs maps a name to [function, arg1, arg2, ...], the results and the time
+        each one took in seconds come back as two dicts keyed by the same names. """
+
+    results = {}
+    timings = {}
+
+    if not jobs:
+        return results, timings
+
+    def timed(func, args):
+        """ Run one job and time it """
+
+        start = time.time()
+        try:
+            ret = func(*args)
+        except Exception as error:
+            ret = [False, str(error)]
+
+        return ret, time.time() - start
+
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(jobs))) as pool:
+        futures = {}
+        for name, job in jobs.items():
+            futures[name] = pool.submit(timed, job[0], job[1:])
+
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+
+    FETCH_TIMINGS.update(timings)
+
+    return results, timings
+
+class RefreshCycle(object):
+    """ Everything loaded during one refresh, each resource is downloaded and parsed once
+        and the result shared by every tab that needs it, even across threads """
+
+    def __init__(self, settings, chart_width=CHART_WIDTH):
+        self.settings = settings
+        self.chart_width = chart_width
+        self.results = {}
+        self.lock = threading.Lock()
+        self.loaded = 0
+        self.shared = 0
+
+    def once(self, key, func, *args):
+        """ Call func(*args) the first time key is asked for, later callers wait for and get
+            the same result """
+
+        with self.lock:
+            entry = self.results.get(key)
+            if entry is None:
+                entry = [threading.Event(), None]
+                self.results[key] = entry
+                self.loaded += 1
+                owner = True
+            else:
+                self.shared += 1
+                owner = False
+
+        if owner:
+            try:
+                entry[1] = func(*args)
+            except Exception as error:
+                entry[1] = [False, str(error)]
+            finally:
+                entry[0].set()
+        else:
+            entry[0].wait()
+
+        return entry[1]
+
+    def data(self):
+        """ data.txt as bytes """
+
+        return self.once("data", download_data, self.settings.data_url)
+
+    def station(self):
+        """ data.txt parsed into a StationRecord """
+
+        return self.once("station", load_station, self)
+
+    def forecast_text(self):
+        """ The raw forecast, see get_forecast() """
+
+        return self.once("forecast_text", get_forecast, self.settings.forecast_url)
+
+    def forecast(self):
+        """ The processed forecast, see process_forecast() """
+
+        return self.once("forecast", process_forecast, self.settings, False,
+                         self.forecast_text())
+
+    def radar(self):
+        """ The radar image or url """
+
+        return self.once("radar", get_radar, self.settings.radar_url, self.settings.rad_type)
+
+    def webcam(self):
+        """ The latest webcam image """
+
+        return self.once("webcam", get_webcam, self.settings.webcam_url, False)
+
+def load_station(cycle):
+    """ Parse data.txt into a StationRecord, only once for each download """
+
+    global STATION
+
+    ret = cycle.data()
+    if ret[0] is False:
+        return ret
+
+    with STATION_LOCK:
+        if STATION is None or STATION[0] != ret[1]:
+            STATION = (ret[1], station.parse(ret[1].decode('utf8'), INIGO_VERSION))
+            record_history(STATION[1], ret[1])
+
+        return [True, STATION[1]]
+
+def record_history(record, raw):
+    """ Add an observation to the history database """
+
+    check_paths()
+
+    try:
+        history.record(CONFIGBASE + "/" + HISTORY_FILE, record, raw)
+    except Exception as error:
+        print("Failed to save to the history, " + str(error))
+
+def prefetch(cycle, resources):
+    """ Download and parse the resources a refresh needs in parallel, before rendering """
+
+    settings = cycle.settings
+    jobs = {}
+
+    if "data" in resources and settings.data_url != "":
+        jobs['data'] = [cycle.station]
+
+    if "radar" in resources and settings.radar_url != "" and settings.rad_type == "image":
+        jobs['radar'] = [cycle.radar]
+
+    if "forecast" in resources and settings.forecast_url != "":
+        jobs['forecast'] = [cycle.forecast_text]
+
+    if "webcam" in resources and settings.webcam_url != "":
+        jobs['webcam'] = [cycle.webcam]
+
+    return fetch_all(jobs)
+
+def file_digest(filename, directory=CONFIGBASE):
+    """ Hash of a file's content, or None if it can't be read """
+
+    try:
+        with open(directory + "/" + filename, "rb") as my_file:
+            return hashlib.sha1(my_file.read()).hexdigest()
+    except OSError:
+        return None
+
+def render_key(settings, *inputs):
+    """ Hash the settings and everything else a page is rendered from, the page only needs
+        rendering again when this changes """
+
+    digest = hashlib.sha1()
+    for name in settings.__slots__:
+        digest.update(repr(getattr(settings, name)).encode('utf8') + b"\0")
+
+    for part in inputs:
+        if not isinstance(part, bytes):
+            part = repr(part).encode('utf8')
+        digest.update(part + b"\0")
+
+    return digest.hexdigest()
+
+def format_timings(timings):
+    """ Turn fetch_all() timings into something readable """
+
+    return ", ".join(name + " " + ("%.2f" % secs) + "s" for name, secs in sorted(timings.items()))
+
+def memory_usage(pid=None):
+    """ {process name: [processes, resident kB]} for pid (this process by default) and
+        everything it started, WebKit's web and network processes included """
+
+    if pid is None:
+        pid = os.getpid()
+
+    names = {}
+    parents = {}
+    resident = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+
+        try:
+            with open("/proc/" + entry + "/status", "r") as my_file:
+                status = my_file.read()
+        except OSError:
+            continue
+
+        for line in status.splitlines():
+            key, _, value = line.partition(":")
+            if key == "Name":
+                names[int(entry)] = value.strip()
+            elif key == "PPid":
+                parents[int(entry)] = int(value)
+            elif key == "VmRSS":
+                resident[int(entry)] = int(value.split()[0])
+
+    # Anything pid is an ancestor of, WebKit's processes can be under a bwrap sandbox
+    family = {pid}
+    for process in parents:
+        ancestor = parents[process]
+        while ancestor not in family and ancestor in parents:
+            ancestor = parents[ancestor]
+        if ancestor in family:
+            family.add(process)
+
+    usage = {}
+    for process in family:
+        if process in names:
+            totals = usage.setdefault(names[process], [0, 0])
+            totals[0] += 1
+            totals[1] += resident.get(process, 0)
+
+    return usage
+
+def format_memory(usage):
+    """ Turn memory_usage() into something readable """
+
+    parts = []
+    for name, (count, kbytes) in sorted(usage.items()):
+        if count > 1:
+            name = str(count) + " x " + name
+        parts.append(name + " " + ("%.1f" % (kbytes / 1024)) + " MB")
+
+    total = sum(kbytes for count, kbytes in usage.values())
+    return ", ".join(parts) + ", total " + ("%.1f" % (total / 1024)) + " MB"
 
 def check_paths():
     """ check and make directories as needed. """
@@ -81,38 +568,178 @@ def check_paths():
     os.makedirs(CONFIGBASE, exist_ok=True)
     os.makedirs(CACHEBASE, exist_ok=True)
 
+def file_stamp(filename, directory=CONFIGBASE):
+    """ Identify the current version of a file on disk, or None if it doesn't exist """
+
+    try:
+        stat = os.stat(directory + "/" + filename)
+    except OSError:
+        return None
+
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def config_stamp():
+    """ Identify the current version of config.ini on disk """
+
+    return file_stamp("config.ini")
+
+def load_settings():
+    """ Return the parsed config.ini, only re-reading it if the file has changed """
+
+    global SETTINGS, SETTINGS_STAMP
+
+    with SETTINGS_LOCK:
+        stamp = config_stamp()
+        if SETTINGS is None or stamp != SETTINGS_STAMP:
+            config = configparser.ConfigParser(strict=False, interpolation=None)
+            try:
+                config.read(CONFIGBASE + "/config.ini")
+            except Exception as e:
+                print(str(e))
+
+            SETTINGS = dict(config['DEFAULT'])
+            SETTINGS_STAMP = stamp
+
+        return SETTINGS
+
 def get_string(key, defval):
     """ Get key value pair from config.ini """
 
+    val = load_settings().get(key.lower(), "")
+    if val.strip() != "":
+        return val.strip()
+
+    return defval
+
+def write_settings(changes):
+    """ Merge changes into config.ini and replace the file atomically """
+
+    global SETTINGS, SETTINGS_STAMP
+
     check_paths()
 
-    config = configparser.ConfigParser(strict=False, interpolation=None)
-    try:
-        config.read(CONFIGBASE + "/config.ini")
-        val = config['DEFAULT'][key]
-        if val.strip() != "":
-            return val.strip()
-    except Exception as e:
-        print(str(e))
+    with SETTINGS_LOCK:
+        values = dict(load_settings())
+        for key, val in changes.items():
+            values[key.lower()] = val
 
-    return defval
+        config = configparser.ConfigParser(strict=False, interpolation=None)
+        tmpname = CONFIGBASE + "/config.ini." + str(os.getpid()) + ".tmp"
+        try:
+            config['DEFAULT'] = values
+            with open(tmpname, 'w') as configfile:
+                config.write(configfile)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            os.replace(tmpname, CONFIGBASE + "/config.ini")
+        except Exception as e:
+            print(str(e))
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+            return False
+
+        SETTINGS = values
+        SETTINGS_STAMP = config_stamp()
+
+    return True
 
 def set_string(key, val):
     """ Save key value pair to config.ini """
 
-    check_paths()
+    return write_settings({key: val})
 
-    config = configparser.ConfigParser(strict=False, interpolation=None)
-    try:
-        config.read(CONFIGBASE + "/config.ini")
-        config['DEFAULT'][key] = val
-        with open(CONFIGBASE + '/config.ini', 'w') as configfile:
-            config.write(configfile)
-        return True
-    except Exception as e:
-        print(str(e))
+class SettingsBatch(object):
+    """ Collect several config.ini changes and write them out in one go """
+
+    def __init__(self):
+        self.changes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+        return False
 
-    return False
+    def get_string(self, key, defval):
+        """ Get a value, seeing changes made in this batch first """
+
+        if key.lower() in self.changes:
+            val = self.changes[key.lower()]
+            if val.strip() != "":
+                return val.strip()
+            return defval
+
+        return get_string(key, defval)
+
+    def set_string(self, key, val):
+        """ Queue a key value pair to be saved on commit """
+
+        self.changes[key.lower()] = val
+
+    def commit(self):
+        """ Save all queued values with a single write """
+
+        if not self.changes:
+            return True
+
+        ret = write_settings(self.changes)
+        self.changes = {}
+        return ret
+
+    def rollback(self):
+        """ Throw away all queued values """
+
+        self.changes = {}
+
+class Settings(object):
+    """ Read only snapshot of the settings a refresh renders with """
+
+    __slots__ = ("data_url", "forecast_url", "radar_url", "rad_type", "webcam_url",
+                 "custom_url", "fctype", "bomtown", "metierev", "use_icons", "metric",
+                 "indoor_readings", "dark_theme", "show_radar", "update_freq", "native_render")
+
+    def __init__(self, values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings snapshots are read only")
+
+    def __delattr__(self, name):
+        raise AttributeError("Settings snapshots are read only")
+
+def snapshot_settings():
+    """ Take a consistent snapshot of config.ini for one refresh """
+
+    with SETTINGS_LOCK:
+        values = {}
+        values['data_url'] = get_string("data_url", "")
+        values['forecast_url'] = get_string("forecast_url", "")
+        values['radar_url'] = get_string("radar_url", "")
+        values['rad_type'] = get_string("rad_type", "image")
+        values['webcam_url'] = get_string("webcam_url", "")
+        values['custom_url'] = get_string("custom_url", "")
+        values['fctype'] = get_string("fctype", "yahoo")
+        values['bomtown'] = get_string("bomtown", "")
+        values['metierev'] = get_string("metierev", "")
+        values['use_icons'] = get_string("use_icons", "0") == "1"
+        values['metric'] = get_string("metric", "1") == "1"
+        values['indoor_readings'] = get_string("indoor_readings", "0") == "1"
+        values['dark_theme'] = get_string("dark_theme", "0") == "1"
+        values['show_radar'] = get_string("show_radar", "1") == "1"
+        values['native_render'] = get_string("native_render", "0") == "1"
+
+        try:
+            values['update_freq'] = int(get_string("update_freq", "1"))
+        except ValueError:
+            values['update_freq'] = 1
+
+    return Settings(values)
 
 def read_file(filename, directory=CONFIGBASE):
     """ Read content from a file """
@@ -157,6 +784,114 @@ def write_binary(filename, binary, directory=CONFIGBASE):
     my_file.close()
     # print("Wrote to: " + filename)
 
+def file_age(filename, directory=CONFIGBASE):
+    """ Seconds since a file was last written, or None if it doesn't exist """
+
+    try:
+        return int(time.time() - os.path.getmtime(directory + "/" + filename))
+    except OSError:
+        return None
+
+def resource_directory(resource):
+    """ The directory a resource's downloaded copy is kept in """
+
+    if resource in ("webcam", "radar"):
+        return CACHEBASE
+
+    return CONFIGBASE
+
+def resource_age(resource):
+    """ Seconds since a resource was last downloaded, or None if it never has been """
+
+    return file_age(RESOURCE_FILES[resource], resource_directory(resource))
+
+def resource_paths(resources):
+    """ The downloaded copies of resources and their .http validators """
+
+    paths = []
+    for resource in resources:
+        if resource in RESOURCE_FILES:
+            filename = resource_directory(resource) + "/" + RESOURCE_FILES[resource]
+            paths += [filename, filename + ".http"]
+
+    return paths
+
+def keep_downloads(resources):
+    """ Copy what's downloaded for resources to .old before it's replaced, so it can be put
+        back with restore_downloads() """
+
+    for filename in resource_paths(resources):
+        try:
+            if os.path.exists(filename):
+                shutil.copy2(filename, filename + ".old")
+            elif os.path.exists(filename + ".old"):
+                os.remove(filename + ".old")
+        except OSError as e:
+            print(str(e))
+
+def restore_downloads(resources, keep_new):
+    """ Drop the .old copies keep_downloads() made if keep_new, otherwise put them back and
+        remove anything that was downloaded where there wasn't a file before """
+
+    for filename in resource_paths(resources):
+        try:
+            if keep_new:
+                if os.path.exists(filename + ".old"):
+                    os.remove(filename + ".old")
+            elif os.path.exists(filename + ".old"):
+                os.replace(filename + ".old", filename)
+            elif os.path.exists(filename):
+                os.remove(filename)
+        except OSError as e:
+            print(str(e))
+
+def save_page(name, page):
+    """ Keep the last good render of a view so it can be shown straight away next launch """
+
+    os.makedirs(CACHEBASE + "/" + PAGES_DIR, exist_ok=True)
+    filename = CACHEBASE + "/" + PAGES_DIR + "/" + name + ".json"
+
+    # Written to the side then renamed so a half written page is never read back
+    try:
+        with open(filename + ".tmp", "w") as my_file:
+            json.dump(page, my_file)
+        os.replace(filename + ".tmp", filename)
+    except (OSError, TypeError, ValueError) as error:
+        print("Failed to save " + filename + ", " + str(error))
+
+def load_page(name):
+    """ [True, [kind, content], age in seconds] for a view's last good render """
+
+    ret = read_file(PAGES_DIR + "/" + name + ".json", CACHEBASE)
+    if ret[0] is False:
+        return ret
+
+    try:
+        page = json.loads(ret[1])
+    except ValueError as error:
+        return [False, str(error)]
+
+    return [True, page, file_age(PAGES_DIR + "/" + name + ".json", CACHEBASE) or 0]
+
+def age_text(age):
+    """ How old a saved page is, for the badge shown over it """
+
+    if age < 60:
+        return "Saved just now, updating..."
+
+    if age < 3600:
+        return "Saved " + str(age // 60) + " min ago, updating..."
+
+    if age < 86400:
+        return "Saved " + str(age // 3600) + " hr ago, updating..."
+
+    return "Saved " + str(age // 86400) + " days ago, updating..."
+
+def age_badge(age):
+    """ age_text() as a badge in the corner of a page """
+
+    return AGE_BADGE % age_text(age)
+
 def download_data(data_url="", force_download=False):
     """ download and save data to local file """
 
@@ -166,34 +901,39 @@ def download_data(data_url="", force_download=False):
     if data_url is False or data_url == "":
         return [False, "Data URL is not set"]
 
+    # Only fall back to the cached copy if a fresh download wasn't explicitly asked for
+    use_cached = not force_download
+
     if os.path.exists(CONFIGBASE + "/data.txt"):
-        if time.time() - os.path.getmtime(CONFIGBASE + "/data.txt") > 270:
+        if time.time() - os.path.getmtime(CONFIGBASE + "/data.txt") > DATA_MAX_AGE:
             force_download = True
 
     if force_download is True or not os.path.exists(CONFIGBASE + "/data.txt"):
-        data = download(data_url)
-        if data[0] is False:
-            data[1] = str(data[1])
-            return data
+        def save(content):
+            """ Check the Inigo version and save the rest of the fields """
 
-        if data[1] == "":
-            return [False, "Failed to download data.txt from " + data_url]
+            if content.strip() == b"":
+                return [False, "Failed to download data.txt from " + data_url]
 
-        bits = data[1].decode('utf8').strip().split("|")
-        if int(bits[0]) < INIGO_VERSION:
-            return [False, "This app has been updated but the server you are connecting to " + \
-                    "hasn't updated the Inigo Plugin for weeWX. Fields may not show up " + \
-                    "properly until weeWX is updated."]
+            bits = content.decode('utf8').strip().split("|")
+            if int(bits[0]) < INIGO_VERSION:
+                return [False, "This app has been updated but the server you are connecting " + \
+                        "to hasn't updated the Inigo Plugin for weeWX. Fields may not show " + \
+                        "up properly until weeWX is updated."]
 
-        data = ""
-        del bits[0]
-        for bit in bits:
-            if data != "":
-                data += "|"
-            data += bit
+            data = "|".join(bits[1:])
+            write_file("data.txt", data)
+            return [True, data.encode('utf8')]
 
-        write_file("data.txt", data)
-        return [True, data.encode('utf8')]
+        data = fetch_cached(data_url, "data.txt", CONFIGBASE, save)
+        if data[0] is False:
+            if not use_cached or not os.path.exists(CONFIGBASE + "/data.txt"):
+                data[1] = str(data[1])
+                return data
+
+            print("Using cached data.txt, " + str(data[1]))
+        elif data[1] is not None:
+            return data
 
     data = read_file("data.txt")
     return [data[0], data[1].encode('utf8')]
@@ -212,6 +952,21 @@ def check_for_icons():
 
     return [True, "Icons were found and will be used."]
 
+def get_icons():
+    """ Download the icon set and unpack it into the cache dir """
+
+    binfile = download(ICON_URL)
+    if not binfile[0]:
+        binfile[1] = str(binfile[1])
+        return binfile
+
+    write_binary("icons.zip", binfile[1], CACHEBASE)
+    zip_ref = zipfile.ZipFile(CACHEBASE + "/icons.zip", 'r')
+    zip_ref.extractall(CACHEBASE + "/")
+    zip_ref.close()
+
+    return [True, "Icons were downloaded"]
+
 def get_radar(radar_url="", rad_type="", force_download=False):
     """ Get the radar image and display it """
 
@@ -227,17 +982,26 @@ def get_radar(radar_url="", rad_type="", force_download=False):
         return [False, "Radar URL is not set."]
 
     if rad_type == "image":
+        use_cached = not force_download
 
         if os.path.exists(CACHEBASE + "/radar.gif"):
-            if time.time() - os.path.getmtime(CACHEBASE + "/radar.gif") > 570:
+            if time.time() - os.path.getmtime(CACHEBASE + "/radar.gif") > RADAR_MAX_AGE:
                 force_download = True
 
         if force_download is True or not os.path.exists(CACHEBASE + "/radar.gif"):
-            dled = download(radar_url)
+            def save(content):
+                """ Save the radar image """
+
+                write_binary("radar.gif", content, CACHEBASE)
+                return [True, content]
+
+            dled = fetch_cached(radar_url, "radar.gif", CACHEBASE, save)
             if dled[0] is False:
-                dled[1] = str(dled[1])
-                return dled
-            write_binary("radar.gif", dled[1], CACHEBASE)
+                if not use_cached or not os.path.exists(CACHEBASE + "/radar.gif"):
+                    dled[1] = str(dled[1])
+                    return dled
+
+                print("Using cached radar.gif, " + str(dled[1]))
 
         picture = Image.open(CACHEBASE + '/radar.gif')
         width, height = picture.size
@@ -258,104 +1022,144 @@ def get_forecast(forecast_url="", force_download=False):
     if forecast_url == "":
         return [False, "Forecast URL is not set"]
 
+    use_cached = not force_download
+
     if os.path.exists(CONFIGBASE + "/forecast.txt"):
-        if time.time() - os.path.getmtime(CONFIGBASE + "/forecast.txt") > 7170:
+        if time.time() - os.path.getmtime(CONFIGBASE + "/forecast.txt") > FORECAST_MAX_AGE:
             force_download = True
 
     if force_download is True or not os.path.exists(CONFIGBASE + "/forecast.txt"):
-        data = download(forecast_url)
-        if data[0] is False:
-            data[1] = str(data[1])
-            return data
+        def save(content):
+            """ Save the raw forecast """
 
-        if data[1].strip() == "":
-            return [False, "Failed to download forecast from " + forecast_url]
+            if content.strip() == b"":
+                return [False, "Failed to download forecast from " + forecast_url]
 
-        write_file("forecast.txt", data[1])
+            write_file("forecast.txt", content)
+            return [True, content]
 
-        return [True, data[1]]
+        data = fetch_cached(forecast_url, "forecast.txt", CONFIGBASE, save)
+        if data[0] is False:
+            if not use_cached or not os.path.exists(CONFIGBASE + "/forecast.txt"):
+                data[1] = str(data[1])
+                return data
 
-    data = read_file("forecast.txt")
-    return [True, data]
+            print("Using cached forecast.txt, " + str(data[1]))
+        elif data[1] is not None:
+            return data
 
-def process_forecast(force_download=False):
-    """ Process forecast data ready to display """
+    return read_file("forecast.txt")
 
-    if os.path.exists(CONFIGBASE + "/forecast.txt"):
-        if time.time() - os.path.getmtime(CONFIGBASE + "/forecast.txt") > 7170:
-            force_download = True
+def process_forecast(settings, force_download=False, forecast=None):
+    """ Process forecast data ready to display, forecast is what get_forecast() returned if
+        the caller already has it """
 
-    if force_download is True or not os.path.exists(CONFIGBASE + "/forecast.txt"):
-        ret = get_forecast(force_download=True)
-        if ret[0] is False:
-            return ret
+    ret = forecast
+    if ret is None:
+        ret = get_forecast(settings.forecast_url, force_download)
+
+    if ret[0] is False:
+        return ret
 
     ftime = os.path.getmtime(CONFIGBASE + "/forecast.txt")
     ftime = datetime.datetime.fromtimestamp(ftime)
     ftime = ftime.strftime("%d %b %Y %H:%M")
 
-    data = read_file("forecast.txt")
-    if data[0] is False:
-        data[1] = str(data[1])
-        return data
-
-    fctype = get_string("fctype", "yahoo")
-
-    if fctype == "yahoo":
-        ret = yahoo.process_yahoo(data[1])
-    elif fctype == "weatherzone":
-        ret = forecasts.process_wz(data[1])
-    elif fctype == "yr.no":
-        ret = forecasts.process_yrno(data[1])
-    elif fctype == "bom.gov.au":
-        ret = forecasts.process_bom1(data[1])
-    elif fctype == "wmo.int":
-        ret = forecasts.process_wmo(data[1])
-    elif fctype == "weather.gov":
-        ret = wgov.process_wgov(data[1])
-    elif fctype == "weather.gc.ca":
-        ret = wca.process_wca(data[1])
-    elif fctype == "weather.gc.ca-fr":
-        ret = wca.process_wcafr(data[1])
-    elif fctype == "metoffice.gov.uk":
-        ret = forecasts.process_metoffice(data[1])
-    elif fctype == "bom2":
-        ret = forecasts.process_bom2(data[1])
-    elif fctype == "aemet.es":
-        ret = forecasts.process_aemet(data[1])
-    elif fctype == "dwd.de":
-        ret = forecasts.process_dwd(data[1])
-    elif fctype == "metservice.com":
-        ret = forecasts.process_metservice(data[1])
-    elif fctype == "meteofrance.com":
-        ret = meteofrance.process_mf(data[1])
-    elif fctype == "darksky.net":
-        ret = forecasts.process_darksky(data[1])
-    elif fctype == "openweathermap.org":
-        ret = forecasts.process_owm(data[1])
-    elif fctype == "apixu.com":
-        ret = forecasts.process_apixu(data[1])
-    elif fctype == "weather.com":
-        ret = forecasts.process_wcom(data[1])
-    elif fctype == "met.ie":
-        ret = forecasts.process_metie(data[1])
-    else:
+    # get_forecast() already has the content, either freshly downloaded or read from disk
+    data = list(ret)
+    if isinstance(data[1], bytes):
+        data[1] = data[1].decode('utf8')
+
+    fctype = settings.fctype
+
+    provider = providers.get(fctype)
+    if provider is None:
         ret = [False, "fctype is '" + fctype + "' which is invalid or not coded yet.", ""]
+    else:
+        key = forecast_key(settings, data[1], provider)
+        ret = cached_forecast(key)
+        if ret is None:
+            start = time.perf_counter()
+            ret = provider.parse(data[1], settings)
+            with FORECAST_LOCK:
+                parses = FORECAST_PARSES.setdefault(fctype, [0, 0.0])
+                parses[0] += 1
+                parses[1] += time.perf_counter() - start
+
+            if ret[0] is not False:
+                save_forecast(key, ret)
 
     if ret[0] is False:
         ret[1] = str(ret[1])
 
     return ret[0], ret[1], fctype, ftime, ret[2]
 
-def refresh_forecast():
-    """ Deal with refreshes from the GUI """
+def forecast_key(settings, raw, provider):
+    """ Hash of the raw forecast and everything else the parsers use. The date is in there
+        as some parsers work out day names from today. The units mostly aren't, the days are
+        kept in the provider's units and only converted when they're shown, but a provider
+        that sends both units is parsed in the one that's asked for """
 
-    ret = get_forecast()
-    if ret[0] is False:
-        return ret
+    digest = hashlib.sha1(raw.encode('utf8'))
+    for value in (settings.fctype, settings.use_icons, settings.bomtown, settings.metierev,
+                  settings.forecast_url, datetime.date.today().isoformat(),
+                  provider.uses_units and settings.metric):
+        digest.update(b"\0" + str(value).encode('utf8'))
 
-    ret = process_forecast()
-    return ret
+    return digest.hexdigest()
+
+def cached_forecast(key):
+    """ The parsed forecast saved under key, or None if it has to be parsed again """
+
+    with FORECAST_LOCK:
+        # forecast.json is only read the first time, after that the copy in memory is the same
+        if not FORECAST_LAST:
+            ret = read_file(FORECAST_CACHE)
+            try:
+                cached = json.loads(ret[1]) if ret[0] else {}
+                cached['result'][1] = [day.from_dict(output) for output in cached['result'][1]]
+            except (ValueError, TypeError, KeyError, IndexError):
+                cached = {}
+
+            FORECAST_LAST.update(cached, loaded=True)
+
+        if FORECAST_LAST.get('key') != key:
+            FORECAST_STATS['misses'] += 1
+            return None
+
+        FORECAST_STATS['hits'] += 1
+        return list(FORECAST_LAST['result'])
+
+def save_forecast(key, ret):
+    """ Keep a parsed forecast for cached_forecast() """
+
+    result = list(ret)
+    with FORECAST_LOCK:
+        FORECAST_LAST.update(key=key, result=result, loaded=True)
+
+    # The days are only turned into JSON on the other thread, when forecast.json is written.
+    # It gets its own reference to the result so it never has to look at FORECAST_LAST.
+    SAVER.submit(write_forecast, key, result)
+
+def write_forecast(key, result):
+    """ Save forecast.json, written to the side then renamed so it's never half written """
+
+    try:
+        content = json.dumps({"key": key, "result": [result[0],
+                                                     [myday.as_dict() for myday in result[1]],
+                                                     result[2]]})
+        write_file(FORECAST_CACHE + ".tmp", content)
+        os.replace(CONFIGBASE + "/" + FORECAST_CACHE + ".tmp", CONFIGBASE + "/" + FORECAST_CACHE)
+    except (TypeError, ValueError, OSError) as error:
+        print("Failed to save " + FORECAST_CACHE + ", " + str(error))
+
+    # Icons made for the forecast this one replaced aren't needed any more
+    assetcache.prune({myday.icon for myday in result[1]})
+
+def refresh_forecast(settings):
+    """ Deal with refreshes from the GUI """
+
+    return process_forecast(settings)
 
 def get_custom():
     """ Get the custom url from config """
@@ -379,6 +1183,51 @@ def deal_with_url(url):
 
     return [True, proto, hostname, port, rest]
 
+def get_mjpeg_frame(webcam_url):
+    """ Grab a single frame from an MJPEG stream """
+
+    ret = deal_with_url(webcam_url)
+    if ret[0] is False:
+        return ret
+
+    host = ret[2]
+    if not breaker_allows(host):
+        return [False, "Skipped " + webcam_url + ", " + host + " has failed too often recently"]
+
+    connect_timeout, read_timeout = get_timeouts()
+
+    try:
+        with socket.create_connection((host, int(ret[3])), timeout=connect_timeout) as sock:
+            sock.settimeout(read_timeout)
+            ret[4] = 'GET ' + ret[4] + ' HTTP/1.0\r\n\r\n'
+            sock.sendall(ret[4].encode('utf8'))
+            data = sock.recv(1024)
+            lines = data.split(b"\r\n")
+            file_size = lines[len(lines) - 3].decode('utf8')
+            file_size = file_size.split(':', 1)[1].strip()
+            file_size = int(file_size)
+            data = lines[len(lines) - 1]
+            while len(data) < file_size:
+                req_size = file_size - len(data)
+                if req_size > 1024:
+                    req_size = 1024
+                chunk = sock.recv(req_size)
+                if chunk == b"":
+                    raise OSError("Connection closed after " + str(len(data)) + " bytes")
+                data += chunk
+    except (OSError, ValueError, IndexError) as error:
+        breaker_record(host, False, str(error))
+        return [False, str(error)]
+
+    breaker_record(host, True)
+
+    write_binary('webcam.jpg', data, CACHEBASE)
+    im1 = Image.open(CACHEBASE + "/webcam.jpg")
+    im2 = im1.transpose(Image.ROTATE_270)
+    im2.save(CACHEBASE + "/webcam.jpg")
+
+    return [True, data]
+
 def get_webcam(webcam_url="", force_download=True):
     """ download webcam image """
 
@@ -390,59 +1239,45 @@ def get_webcam(webcam_url="", force_download=True):
     if webcam_url == "":
         return [False, "Webcam URL is not set"]
 
+    use_cached = not force_download
+
     if os.path.exists(CACHEBASE + "/webcam.jpg"):
-        if time.time() - os.path.getmtime(CACHEBASE + "/webcam.jpg") > 270:
+        if time.time() - os.path.getmtime(CACHEBASE + "/webcam.jpg") > WEBCAM_MAX_AGE:
             force_download = True
 
     if force_download is True or not os.path.exists(CACHEBASE + "/webcam.jpg"):
         if webcam_url.lower().endswith('mjpg') or webcam_url.lower().endswith('mjpeg'):
-            data = b""
-
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                ret = deal_with_url(webcam_url)
-                if ret is False:
-                    return ret
-
-                sock.connect((ret[2], int(ret[3])))
-                ret[4] = 'GET ' + ret[4] + ' HTTP/1.0\r\n\r\n'
-                sock.sendall(ret[4].encode('utf8'))
-                data = sock.recv(1024)
-                lines = data.split(b"\r\n")
-                file_size = lines[len(lines) - 3].decode('utf8')
-                file_size = file_size.split(':', 1)[1].strip()
-                file_size = int(file_size)
-                data = lines[len(lines) - 1]
-                while len(data) < file_size:
-                    req_size = file_size - len(data)
-                    if req_size > 1024:
-                        req_size = 1024
-                    data += sock.recv(req_size)
-
-                sock.close()
-                write_binary('webcam.jpg', data, CACHEBASE)
+            dled = get_mjpeg_frame(webcam_url)
+        else:
+            def save(content):
+                """ Save and rotate the webcam image """
+
+                write_binary("webcam.jpg", content, CACHEBASE)
                 im1 = Image.open(CACHEBASE + "/webcam.jpg")
                 im2 = im1.transpose(Image.ROTATE_270)
                 im2.save(CACHEBASE + "/webcam.jpg")
-        else:
-            dled = download(webcam_url)
-            if dled[0] is False:
+                return [True, content]
+
+            dled = fetch_cached(webcam_url, "webcam.jpg", CACHEBASE, save)
+
+        if dled[0] is False:
+            if not use_cached or not os.path.exists(CACHEBASE + "/webcam.jpg"):
                 dled[1] = str(dled[1])
                 return dled
 
-            write_binary("webcam.jpg", dled[1], CACHEBASE)
-            im1 = Image.open(CACHEBASE + "/webcam.jpg")
-            im2 = im1.transpose(Image.ROTATE_270)
-            im2.save(CACHEBASE + "/webcam.jpg")
+            print("Using cached webcam.jpg, " + str(dled[1]))
 
     picture = Image.open(CACHEBASE + '/webcam.jpg')
     width, height = picture.size
 
     return [True, "Webcam URL was ok", width, height]
 
-def webcam():
-    ret = get_webcam()
-    html = htmlheader()
-    html += "<img style='height:99vh;width:99vw;' src='file://" + CACHEBASE + "/webcam.jpg'>"
+def webcam(cycle):
+    settings = cycle.settings
+    ret = cycle.webcam()
+    html = htmlheader(settings)
+    html += "<img style='height:99vh;width:99vw;' src='" + assetcache.cache_uri("webcam.jpg")
+    html += "'>"
     html += htmlfooter()
 
     return html
@@ -467,7 +1302,7 @@ def get_config():
             CACHEBASE, rad_type, radar_url, fctype, APPBASE, update_freq, wifidownload]
 
 def save_config(settings_url, indoor_readings, dark_theme, metric,
-                show_radar, use_icons, update_freq, wifidownload):
+                show_radar, use_icons, update_freq, wifidownload, native_render=False):
     """ Save config variables to ini file """
 
     if indoor_readings:
@@ -500,20 +1335,44 @@ def save_config(settings_url, indoor_readings, dark_theme, metric,
     else:
         wifidownload = "0"
 
+    if native_render:
+        native_render = "1"
+    else:
+        native_render = "0"
+
     if update_freq < 0 or update_freq > 5:
         update_freq = "1"
     else:
         update_freq = str(update_freq)
 
-    set_string('settings_url', settings_url)
-    set_string('indoor_readings', indoor_readings)
-    set_string('dark_theme', dark_theme)
-    set_string('metric', metric)
-    set_string('show_radar', show_radar)
-    set_string('use_icons', use_icons)
-    set_string('saved', '1')
-    set_string('update_freq', update_freq)
-    set_string('wifidownload', wifidownload)
+    batch = SettingsBatch()
+
+    batch.set_string('settings_url', settings_url)
+    batch.set_string('indoor_readings', indoor_readings)
+    batch.set_string('dark_theme', dark_theme)
+    batch.set_string('metric', metric)
+    batch.set_string('show_radar', show_radar)
+    batch.set_string('use_icons', use_icons)
+    batch.set_string('saved', '1')
+    batch.set_string('update_freq', update_freq)
+    batch.set_string('wifidownload', wifidownload)
+    batch.set_string('native_render', native_render)
+
+    # Units, theme and the like only change how the pages are drawn, forecasts are kept in
+    # the provider's units. If nothing else changed settings.txt isn't downloaded again and
+    # the pages are just drawn again from what's already on disk
+    display = {'indoor_readings': indoor_readings, 'dark_theme': dark_theme, 'metric': metric,
+               'show_radar': show_radar, 'update_freq': update_freq,
+               'wifidownload': wifidownload, 'native_render': native_render}
+
+    if get_string('saved', '0') == '1' and settings_url == get_string('settings_url', '') and \
+       use_icons == get_string('use_icons', '0') and \
+       any(get_string(name, '') != value for name, value in display.items()):
+        if not batch.commit():
+            return [False, "Failed to save settings to " + CONFIGBASE + "/config.ini"]
+
+        return [True, "Everything looks a-ok...", get_string('rad_type', 'image'),
+                get_string('radar_url', ''), get_string('fctype', 'yahoo')]
 
     olddata = get_string('data_url', '')
     oldradar = get_string('radar_url', '')
@@ -562,247 +1421,342 @@ def save_config(settings_url, indoor_readings, dark_theme, metric,
     if data_url == "" or data_url == "https://example.com/weewx/inigo-data.txt":
         return [False, "Invalid data URL supplied. Please check the URL before trying again."]
 
+    jobs = {}
+
     if data_url != olddata:
-        data = download_data(data_url, True)
-        if data[0] is False:
-            data[1] = str(data[1])
-            return data
+        jobs['data'] = [download_data, data_url, True]
 
     if radar_url != "" and radar_url != oldradar:
-        ret = get_radar(radar_url, rad_type, True)
+        jobs['radar'] = [get_radar, radar_url, rad_type, True]
+
+    if forecast_url != "":
+        provider = providers.get(fctype)
+        if provider is None:
+            return [False, "Forecast type '" + fctype + "' isn't a valid option."]
+
+        ret = provider.build_url(forecast_url)
         if ret[0] is False:
-            ret[1] = str(ret[1])
             return ret
 
-    bomtown = metierev = ""
-    lat = lon = "0.0"
-
-    if forecast_url != "" and forecast_url != oldforecast:
-        if fctype == "yahoo":
-            if not forecast_url.startswith("http"):
-                return [False, "Yahoo API recently changed, you need to update your settings."]
-        elif fctype == "weatherzone":
-            forecast_url = "https://rss.weatherzone.com.au/?u=12994-1285&lt=aploc&lc=" + \
-                           forecast_url + "&obs=0&fc=1&warn=0"
-        elif fctype == "yr.no":
-            pass
-        elif fctype == "bom.gov.au":
-            bomtown = forecast_url.split(",", 1)[1].strip()
-            forecast_url = "ftp://ftp.bom.gov.au/anon/gen/fwo/" + \
-                           forecast_url.split(",", 1)[0].strip() + ".xml"
-            set_string("bomtown", bomtown)
-        elif fctype == "wmo.int":
-            if not forecast_url.startswith("http"):
-                forecast_url = "https://worldweather.wmo.int/en/json/" + forecast_url.strip() + \
-                               "_en.xml"
-        elif fctype == "weather.gov":
-            if "?" in forecast_url:
-                forecast_url = forecast_url.split("?", 1)[1]
-                if "lat" not in forecast_url or "lon" not in forecast_url:
-                    return [False, "Failed to get a valid url or coordinates."]
-
-                for bit in forecast_url.split("&"):
-                    if bit.startswith("lat="):
-                        lat = bit[4:].strip()
-                    if bit.startswith("lon="):
-                        lon = bit[4:].strip()
-
-            else:
-                lat = forecast_url.split(",", 1)[0]
-                lon = forecast_url.split(",", 1)[1]
+        # The url is compared once it's built, it's what was saved last time
+        forecast_url = ret[1]
+        if "bomtown" in ret[2]:
+            batch.set_string("bomtown", ret[2]['bomtown'])
 
-            if lat == "0.0" and lon == "0.0":
-                return [False, "Longitude or Latitude was not specified for weather.gov forecasts"]
+        if forecast_url != oldforecast:
+            if "metierev" in ret[2]:
+                jobs['metierev'] = [download, ret[2]['metierev']]
 
-            forecast_url = "https://forecast.weather.gov/MapClick.php?lat=" + lat + "&lon=" + \
-                            lon + "&unit=0&lg=english&FcstType=json"
-        elif fctype == "weather.gc.ca":
-            pass
-        elif fctype == "weather.gc.ca-fr":
-            pass
-        elif fctype == "metoffice.gov.uk":
-            pass
-        elif fctype == "bom2":
-            pass
-        elif fctype == "aemet.es":
-            pass
-        elif fctype == "dwd.de":
-            pass
-        elif fctype == "metservice.com":
-            forecast_url = "https://www.metservice.com/publicData/localForecast" + forecast_url
-        elif fctype == "meteofrance.com":
-            pass
-        elif fctype == "darksky.net":
-            forecast_url += "?exclude=currently,minutely,hourly,alerts,flags&lang=en"
-            if metric == "1":
-                forecast_url += "&units=ca"
-        elif fctype == "openweathermap.org":
-            if metric:
-                forecast_url += "&units=metric"
-            else:
-                forecast_url += "&units=imperial"
-        elif fctype == "apixu.com":
-            forecast_url += "&days=10"
-        elif fctype == "weather.com":
-            forecast_url = "https://api.weather.com/v2/turbo/vt1dailyForecast?apiKey=d522" + \
-                           "aa97197fd864d36b418f39ebb323&format=json&geocode=" + forecast_url + \
-                           "&language=en-US"
-            if metric:
-                forecast_url += "&units=m"
-            else:
-                forecast_url += "&units=e"
-        elif fctype == "met.ie":
-            metierev = "https://prodapi.metweb.ie/location/reverse/" + \
-                       forecast_url.replace(",", "/")
-            forecast_url = "https://prodapi.metweb.ie/weather/daily/" + \
-                           forecast_url.replace(",", "/") + "/10"
-
-            metierev = download(metierev)
-            metierev[1] = metierev[1].decode('utf8')
-            if metierev[0] is False:
-                metierev[1] = str(metierev[1])
-                return metierev
-
-            jobj = json.loads(metierev[1].strip())
-            metierev = jobj["city"] + ", Ireland"
-            set_string("metierev", metierev)
-        else:
-            return [False, "Forecast type '" + fctype + "' isn't a valid option."]
-
-        data = get_forecast(forecast_url, True)
-        if data[0] is False:
-            data[1] = str(data[1])
-            return data
+            jobs['forecast'] = [get_forecast, forecast_url, True]
 
-    if (fctype == "weather.gov" or fctype == "yahoo") and use_icons != "1":
+    provider = providers.get(fctype)
+    if provider is not None and provider.needs_icons and use_icons != "1":
         return [False, "Forecast type '" + fctype + "' needs to have icons available, " + \
                        "Please switch to using icons and try again."]
 
     if use_icons == "1" and \
         (check_for_icons()[0] is False or int(get_string("icon_version", 0)) < ICON_VERSION):
-        binfile = download(ICON_URL)
-        if not binfile[0]:
-            binfile[1] = str(binfile[1])
-            return binfile
-
-        write_binary("icons.zip", binfile[1], CACHEBASE)
-        zip_ref = zipfile.ZipFile(CACHEBASE + "/icons.zip", 'r')
-        zip_ref.extractall(CACHEBASE + "/")
-        zip_ref.close()
-        set_string('icon_version', str(ICON_VERSION))
+        jobs['icons'] = [get_icons]
 
     if webcam_url != "" and webcam_url != oldwebcam:
-        dled = get_webcam(webcam_url, True)
-        if dled[0] is False:
-            dled[1] = str(dled[1])
-            return dled
+        jobs['webcam'] = [get_webcam, webcam_url, True]
 
     if custom_url != "" and custom_url != oldcustom:
-        dled = download(custom_url)
-        if dled[0] is False:
-            dled[1] = str(dled[1])
-            return dled
+        jobs['custom'] = [download, custom_url]
 
-    set_string('data_url', data_url)
-    set_string('rad_type', rad_type)
-    set_string('radar_url', radar_url)
-    set_string('fctype', fctype)
-    set_string('forecast_url', forecast_url)
-    set_string('webcam_url', webcam_url)
-    set_string('custom_url', custom_url)
+    # The new downloads replace the copies fetched for the old settings, which are put back
+    # if the new settings don't end up being saved
+    keep_downloads(jobs)
+    saved = False
+    try:
+        # The timings end up in FETCH_TIMINGS like any other fetch_all()
+        results = fetch_all(jobs)[0]
 
-    return [True, "Everything looks a-ok...", rad_type, radar_url, fctype]
+        for name in ['data', 'radar', 'metierev', 'forecast', 'icons', 'webcam', 'custom']:
+            if name in results and results[name][0] is False:
+                results[name][1] = str(results[name][1])
+                return results[name]
 
-def loadCurrentConditions(iw):
-    try:
-        bits = download_data()[1].decode('utf8').split('|')
-    except Exception as e:
-        return "<div style='text-align:center;vertical-align:middle;font-size:12pt;'>Data is " + \
-            "unavailable</div>"
-
-    content = "<div style='text-align:center;font-size:20pt'>" + bits[56] + "</div><br/>"
-    content += "<div style='text-align:center;font-size:12pt''>" + bits[54] + " " + bits[55]
-    content += "</div>"
-    content += "<table style='width:100%;border:0px;'>"
-    content += "<tr><td style='font-size:36pt;text-align:right;'>" + bits[0] + bits[60] + "</td>"
-
-    if len(bits) > 204:
-        content += "<td style='font-size:" + iw + "pt;text-align:right;vertical-align:bottom;'>AT: "
-        content += bits[203] + bits[60] +"</td></tr></table>"
+        if 'metierev' in results:
+            jobj = json.loads(results['metierev'][1].decode('utf8').strip())
+            metierev = jobj["city"] + ", Ireland"
+            batch.set_string("metierev", metierev)
+
+        if 'icons' in results:
+            batch.set_string('icon_version', str(ICON_VERSION))
+
+        batch.set_string('data_url', data_url)
+        batch.set_string('rad_type', rad_type)
+        batch.set_string('radar_url', radar_url)
+        batch.set_string('fctype', fctype)
+        batch.set_string('forecast_url', forecast_url)
+        batch.set_string('webcam_url', webcam_url)
+        batch.set_string('custom_url', custom_url)
+
+        if not batch.commit():
+            return [False, "Failed to save settings to " + CONFIGBASE + "/config.ini"]
+
+        saved = True
+        return [True, "Everything looks a-ok...", rad_type, radar_url, fctype]
+    finally:
+        restore_downloads(jobs, saved)
+
+# Page templates for the Weather and Stats tabs. They're written with {name} placeholders,
+# filled from the StationRecord's fields plus a few extra values, so {out_temp} is the
+# station's out_temp field.
+
+class PageTemplate(object):
+    """ A template compiled once into a %-format string and a getter that pulls every value
+        it needs out of a dict in one go """
+
+    __slots__ = ("text", "fields", "getter")
+
+    def __init__(self, template):
+        text = []
+        self.fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            text.append(literal.replace("%", "%%"))
+            if field:
+                text.append("%s")
+                self.fields.append(field)
+
+        self.text = "".join(text)
+        if not self.fields:
+            self.getter = None
+        elif len(self.fields) == 1:
+            # itemgetter() of one name returns the value rather than a tuple
+            self.getter = lambda values, name=self.fields[0]: (values[name],)
+        else:
+            self.getter = operator.itemgetter(*self.fields)
+
+    def fill(self, values):
+        """ The template with the values filled in """
+
+        if not self.fields:
+            return self.text
+
+        return self.text % self.getter(values)
+
+# Replaces the content of each element named in the patch, anything not there yet is left
+# for the next full load
+SHELL_SCRIPT = "<script>function weewxPatch(patch) { for (var id in patch) { " + \
+               "var el = document.getElementById(id); if (el) el.innerHTML = patch[id]; } }" + \
+               "</script>"
+
+UNAVAILABLE = "<div style='text-align:center;vertical-align:middle;font-size:12pt;'>" + \
+              "Data is unavailable</div>"
+
+STATION_HEADER = "<div style='text-align:center;font-size:20pt'>{station}</div><br/>" + \
+                 "<div style='text-align:center;font-size:12pt'>{date} {time}</div>"
+
+def conditions_row(left_icon, left, right, right_icon):
+    """ A row of the current conditions, an icon and a value on each side """
+
+    return "<tr><td><i style='font-size:" + left_icon[0] + ";' class='" + left_icon[1] + \
+           "'></i></td><td>" + left + "</td><td style='text-align:right;'>" + right + \
+           "</td><td style='text-align:right'><i style='font-size:" + right_icon[0] + \
+           ";' class='" + right_icon[1] + "'></i></td></tr>"
+
+CONDITIONS_TEMP = PageTemplate(
+    STATION_HEADER + "<table style='width:100%;border:0px;'>" +
+    "<tr><td style='font-size:36pt;text-align:right;'>{out_temp}{temp_unit}</td>")
+
+CONDITIONS_AT = PageTemplate(
+    "<td style='font-size:{iw}pt;text-align:right;vertical-align:bottom;'>" +
+    "AT: {apparent_temp}{temp_unit}</td></tr></table>")
+
+CONDITIONS_NO_AT = PageTemplate("<td>&nbsp</td></tr></table>")
+
+CONDITIONS_MAIN = PageTemplate(
+    "<table style='width:100%;border:0px;'>" +
+    conditions_row(("16pt", "flaticon-windy"), "{wind_speed}{wind_unit}",
+                   "{barometer}{pressure_unit}", ("{iw}pt", "wi wi-barometer")) +
+    conditions_row(("{iw}pt", "wi wi-wind wi-towards-{wind_towards}"), "{wind_dir}",
+                   "{out_humidity}{humidity_unit}", ("{iw}pt", "wi wi-humidity")) +
+    conditions_row(("{iw}pt", "wi wi-umbrella"), "{rain}", "{dewpoint}{temp_unit}",
+                   ("{drop}pt", "wi wi-raindrop")) +
+    conditions_row(("{iw}pt", "flaticon-women-sunglasses"), "{uv}UVI",
+                   "{radiation}W/m\u00B2", ("{iw}pt", "flaticon-women-sunglasses")))
+
+CONDITIONS_INDOOR = PageTemplate(
+    conditions_row(("{iw}pt", "flaticon-home-page"), "{indoor_temp}{temp_unit}",
+                   "{indoor_humidity}{humidity_unit}", ("{iw}pt", "flaticon-home-page")))
+
+CONDITIONS_SUN = PageTemplate(
+    "</table><table style='width:100%;border:0px;'><tr>" +
+    "".join("<td><i style='font-size:{iw}pt;' class='wi wi-" + name + "'></i></td>" +
+            "<td style='font-size:10pt'>{" + name + "}</td>"
+            for name in ("sunrise", "sunset", "moonrise", "moonset")) +
+    "</tr></table>")
+
+STATS_HEADER = PageTemplate(STATION_HEADER)
+
+def stats_row(icon, size, low, high):
+    """ A row of the stats, the low and when it happened on the left and the high on the
+        right """
+
+    return "<tr><td><i style='font-size:" + size + ";' class='" + icon + "'></i></td>" + \
+           "<td>" + low + "</td><td>{" + low[1:low.index("}")] + "_time}</td>" + \
+           "<td style='text-align:right;'>{" + high[1:high.index("}")] + "_time}</td>" + \
+           "<td style='text-align:right;'>" + high + "</td><td style='text-align:right'>" + \
+           "<i style='font-size:" + size + ";' class='" + icon + "'></i></td></tr>"
+
+def stats_templates(period):
+    """ The templates for one period of the Stats tab """
+
+    def pair(field, unit):
+        return ("{" + field + "_" + period + "_low}" + unit,
+                "{" + field + "_" + period + "_high}" + unit)
+
+    templates = {}
+    templates['head'] = "<div style='text-align:center;font-size:18pt;" + \
+                        "font-weight:bold;'>{title}</div><table style='width:100%;border:0px;'>"
+    templates['main'] = \
+        stats_row("flaticon-temperature", "{size}", *pair("temp", "{temp_unit}")) + \
+        stats_row("wi wi-raindrop", "{drop}", *pair("dewpoint", "{temp_unit}")) + \
+        stats_row("wi wi-humidity", "{size}", *pair("humidity", "{humidity_unit}")) + \
+        stats_row("wi wi-barometer", "{size}", *pair("barometer", "{pressure_unit}"))
+    templates['indoor'] = \
+        stats_row("flaticon-home-page", "{size}", *pair("indoor_temp", "{temp_unit}")) + \
+        stats_row("flaticon-home-page", "{size}", *pair("indoor_humidity", "{humidity_unit}"))
+    templates['uv'] = "<tr><td><i style='font-size:{size};' " + \
+        "class='flaticon-women-sunglasses'></i></td><td>{uv_" + period + "}UVI</td>" + \
+        "<td>{uv_" + period + "_time}</td><td style='text-align:right;'>{radiation_" + \
+        period + "_time}</td><td style='text-align:right;'>{radiation_" + period + \
+        "}W/m\u00B2</td><td style='text-align:right'><i style='font-size:{size};' " + \
+        "class='flaticon-women-sunglasses'></i></td></tr>"
+    templates['wind'] = "<tr><td><i style='font-size:{size};' class='flaticon-windy'></i>" + \
+        "</td><td colspan='3'>{wind_" + period + "}{wind_unit} {wind_" + period + \
+        "_dir} {wind_" + period + "_time}</td><td style='text-align:right;'>{rain}" + \
+        "{rain_unit}</td><td style='text-align:right'><i style='font-size:{size};' " + \
+        "class='wi wi-umbrella'></i></td></tr>"
+    templates['since'] = "<tr><td colspan='4'>&nbsp;</td><td style='text-align:right;' " + \
+                         "colspan='2'>{since}</td></tr>"
+    templates['foot'] = "</table><br>"
+
+    for name in templates:
+        templates[name] = PageTemplate(templates[name])
+
+    # Times are shown differently depending on the period, so they're converted beforehand,
+    # these are the ones each part of the section needs
+    templates['times'] = {}
+    for name in ("main", "indoor", "uv", "wind"):
+        templates['times'][name] = [field for field in templates[name].fields
+                                    if field.endswith("_time")]
+
+    return templates
+
+# (period, heading, the size unit its icons use, True if its times need convert())
+STATS_PERIODS = (("today", "Today's Statistics", "pt", True),
+                 ("yesterday", "Yesterday's Statistics", "px", True),
+                 ("month", "This Month's Statistics", "px", False),
+                 ("year", "This Year's Statistics", "px", False),
+                 ("alltime", "All Time Statistics", "px", False))
+
+STATS_TEMPLATES = {period[0]: stats_templates(period[0]) for period in STATS_PERIODS}
+
+def conditions_rain(record):
+    """ Today's rain for the Weather tab, with when it's been counted since """
+
+    if record.rain_since_hour != "":
+        return record.rain_since_today + record.rain_unit + " since " + record.rain_since_hour
+
+    return record.rain_today + record.rain_unit + " since mn"
+
+def stats_rain(record, period):
+    """ The rain for one period of the Stats tab and when it's been counted since, since is
+        None for periods that don't show it """
+
+    if period == "today":
+        rain = record.rain_today
+        since = "since mn"
+        if record.rain_since_hour != "":
+            rain = record.rain_since_today
+        if record.rain_since_today != "" and record.rain_since_hour != "":
+            since = "since " + record.rain_since_hour
+    elif period == "yesterday":
+        rain = record.rain_yesterday
+        since = "before mn"
+        if record.rain_since_yesterday != "":
+            rain = record.rain_since_yesterday
+        if record.rain_since_yesterday != "" and record.rain_since_hour != "":
+            since = "before " + record.rain_since_hour
     else:
-        content += "<td>&nbsp</td></tr></table>"
-
-    content += "<table style='width:100%;border:0px;'>"
-    content += "<tr><td><i style='font-size:16pt;' class='flaticon-windy'></i></td><td>" + bits[25]
-    content += bits[61] + "</td>"
-    content += "<td style='text-align:right;'>" + bits[37] + bits[63]
-    content += "</td><td style='text-align:right;'>"
-    content += "<i style='font-size:" + iw + "pt;' class='wi wi-barometer'></i></td></tr>"
-
-    content += "<tr><td><i style='font-size:" + iw + "pt;' class='wi wi-wind wi-towards-"
-    content += bits[30].lower() + "'></i></td><td>" + bits[30] + "</td>"
-    content += "<td style='text-align:right;'>" + bits[6] + bits[64]
-    content += "</td><td style='text-align:right'>"
-    content += "<i style='font-size:" + iw + "pt;' class='wi wi-humidity'></i></td></tr>"
-
-    rain = bits[20] + bits[62] + " since mn"
-    if len(bits) > 160 and bits[160] != "":
-        rain = bits[158] + bits[62] + " since " + bits[160]
-
-    content += "<tr><td><i style='font-size:" + iw + "pt;' class='wi wi-umbrella'></i></td><td>"
-    content += rain + "</td>"
-    content += "<td style='text-align:right;'>" + bits[12] + bits[60]
-    content += "</td><td style='text-align:right'>"
-    content += "<i style='font-size:" + str(float(iw) * 1.4)
-    content += "pt;' class='wi wi-raindrop'></i></td></tr>"
-
-    content += "<tr><td><i style='font-size:" + iw
-    content += "pt;' class='flaticon-women-sunglasses'></i></td><td>"
-    content += bits[45] + "UVI</td>"
-    content += "<td style='text-align:right;'>" + bits[43]
-    content += "W/m\u00B2</td><td style='text-align:right'>"
-    content += "<i style='font-size:" + iw + "pt;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    if len(bits) > 202 and get_string("indoor_readings", "0") == '1':
-        content += "<tr><td><i style='font-size:" + iw
-        content += "pt;' class='flaticon-home-page'></i></td><td>"
-        content += bits[161] + bits[60] + "</td>"
-        content += "<td style='text-align:right;'>" + bits[166] + bits[64]
-        content += "</td><td style='text-align:right'>"
-        content += "<i style='font-size:" + iw + "pt;' class='flaticon-home-page'></i></td></tr>"
-
-    content += "</table>"
-
-    content += "<table style='width:100%;border:0px;'>"
-
-    content += "<tr><td><i style='font-size:" + iw + "pt;' class='wi wi-sunrise'></i></td>"
-    content += "<td style='font-size:10pt'>" + bits[57] + "</td>"
-    content += "<td><i style='font-size:" + iw
-    content += "pt;' class='wi wi-sunset'></i></td><td style='font-size:10pt'>"
-    content += bits[58] + "</td>"
-    content += "<td><i style='font-size:" + iw
-    content += "pt;' class='wi wi-moonrise'></i></td><td style='font-size:10pt'>"
-    content += bits[47] + "</td>"
-    content += "<td><i style='font-size:" + iw
-    content += "pt;' class='wi wi-moonset'></i></td><td style='font-size:10pt'>"
-    content += bits[48] + "</td></tr>"
-
-    content += "</table>"
+        rain = record.get("rain_" + period)
+        since = None
+
+    return rain, since
+
+def loadCurrentConditions(iw, cycle):
+    """ The Weather tab's body as a list of sections, see htmlshell() """
+
+    settings = cycle.settings
+    ret = cycle.station()
+    if ret[0] is False:
+        return [UNAVAILABLE]
+
+    record = ret[1]
+
+    values = dict(record.as_dict())
+    values.update(iw=iw, drop=str(float(iw) * 1.4), rain=conditions_rain(record),
+                  wind_towards=record.wind_dir.lower())
+
+    if record.has("apparent_temp"):
+        current = CONDITIONS_TEMP.fill(values) + CONDITIONS_AT.fill(values)
+    else:
+        current = CONDITIONS_TEMP.fill(values) + CONDITIONS_NO_AT.fill(values)
+
+    rows = [CONDITIONS_MAIN.fill(values)]
+
+    if settings.indoor_readings and record.has("indoor_humidity_alltime_low_time"):
+        rows.append(CONDITIONS_INDOOR.fill(values))
+
+    rows.append(CONDITIONS_SUN.fill(values))
+
+    return [current, "".join(rows), trendCharts(record, cycle.chart_width)]
+
+def trendCharts(record, width):
+    """ Charts of the last day, week and month from the history """
+
+    filename = CONFIGBASE + "/" + HISTORY_FILE
+    now = time.time()
+    content = ""
+
+    for heading, span in CHART_SPANS:
+        section = ""
+        for field, title, unit in CHART_FIELDS:
+            try:
+                rows = history.series(filename, field, now - span, now, now=now)
+            except Exception as error:
+                print("Failed to read the history, " + str(error))
+                return ""
+
+            times = [row[0] for row in rows]
+            values = [row[1] for row in rows]
+            section += charts.svg_chart(times, values, width, CHART_HEIGHT, title,
+                                        record.get(unit))
+
+        if section != "":
+            content += "<div style='text-align:center;font-size:14pt;font-weight:bold;'>"
+            content += heading + "</div>" + section
 
     return content
 
-def htmlheader():
-    ssheader = "<link rel='stylesheet' type='text/css' href='" + APPBASE
-    ssheader += "assets/weathericons.css'>"
-    ssheader += "<link rel='stylesheet' type='text/css' href='" + APPBASE
-    ssheader += "assets/weathericons_wind.css'>"
-    ssheader += "<link rel='stylesheet' type='text/css' href='" + APPBASE
-    ssheader += "assets/flaticon.css'>"
+def htmlheader(settings=None):
+    ssheader = "<link rel='stylesheet' type='text/css' href='"
+    ssheader += assetcache.app_uri("weathericons.css") + "'>"
+    ssheader += "<link rel='stylesheet' type='text/css' href='"
+    ssheader += assetcache.app_uri("weathericons_wind.css") + "'>"
+    ssheader += "<link rel='stylesheet' type='text/css' href='"
+    ssheader += assetcache.app_uri("flaticon.css") + "'>"
 
     header = "<html><head><meta charset='utf-8'/><style>"
     header += "html { overflow: scroll; overflow-x: hidden; }"
     header += "table tbody tr td {font-size:11.5pt}</style>" + ssheader + "</head><body>"
-    if get_string('dark_theme', '0') == '1':
+    if settings is None:
+        settings = snapshot_settings()
+
+    if settings.dark_theme:
         header = "<html><head><meta charset='utf-8'/><style>body { color: #fff; background-color:"
         header += " #000;}"
         header += "html { overflow: scroll; overflow-x: hidden; } table tbody tr td {font-size:"
@@ -810,94 +1764,129 @@ def htmlheader():
 
     return header
 
+def htmlshell(settings, sections):
+    """ A whole page with each section in its own element, so later refreshes can replace
+        just the sections that changed with shell_patch() instead of loading a new page """
+
+    html = [htmlheader(settings)]
+    for i, section in enumerate(sections):
+        html.append("<div id='section" + str(i) + "'>" + section + "</div>")
+
+    html.append(SHELL_SCRIPT)
+    html.append(htmlfooter())
+
+    return "".join(html)
+
+def shell_patch(old, new):
+    """ Javascript that turns a page made by htmlshell(settings, old) into one showing new,
+        "" if nothing changed or None if the sections don't line up and the page has to be
+        loaded again """
+
+    if len(old) != len(new):
+        return None
+
+    patch = {}
+    for i, section in enumerate(new):
+        if section != old[i]:
+            patch["section" + str(i)] = section
+
+    if not patch:
+        return ""
+
+    return "weewxPatch(" + json.dumps(patch) + ");"
+
 def htmlfooter():
     return "</body></html>"
 
-def loadForecast1():
-    results = process_forecast()
+def loadForecast1(cycle):
+    """ The forecast as a list of sections, the banner then the days """
+
+    settings = cycle.settings
+    results = cycle.forecast()
     if results[0] is False:
-        return results[1]
+        return [results[1]]
 
     fctype = results[2]
     ftime = results[3]
     desc = results[4]
 
-    html = htmlheader()
+    html = "<table style='width:100%;border:0px;'>"
 
-    html += doForecastBanner(fctype, ftime, desc, False)
-
-    html += "<table style='width:100%;border:0px;'>"
-
-    for JsonObject in json.loads(results[1]):
-        html += doForecastRow(JsonObject)
+    for myday in results[1]:
+        html += doForecastRow(myday, settings)
 
     html += "</table>"
-    html += htmlfooter()
 
-    return html
+    return [doForecastBanner(fctype, ftime, desc, False), html]
+
+def loadForecast2(cycle):
+    """ The forecast with today shown large, as a list of sections, the banner then the
+        days """
 
-def loadForecast2():
-    results = process_forecast()
+    settings = cycle.settings
+    results = cycle.forecast()
     if results[0] is False:
-        return results[1]
+        return [results[1]]
 
     fctype = results[2]
     ftime = results[3]
     desc = results[4]
 
-    html = htmlheader()
-
-    html += doForecastBanner(fctype, ftime, desc, True)
+    html = ""
 
     i = 0
-    for JsonObject in json.loads(results[1]):
+    for myday in results[1]:
         if i != 0:
-            html += doForecastRow(JsonObject)
+            html += doForecastRow(myday, settings)
         else:
+            high = myday.high(settings.metric)
+            low = myday.low(settings.metric)
+
             html += "<table style='width:100%;border:0px;'>"
 
-            if JsonObject['max'] == "&deg;C" or JsonObject['max'] == "&deg;F":
+            if high is None:
                 html += "<tr><td style='width:50%;font-size:48pt;'>&nbsp;</td>"
             else:
-                html += "<tr><td style='width:50%;font-size:48pt;'>" + JsonObject['max'] + "</td>"
+                html += "<tr><td style='width:50%;font-size:48pt;'>" + high + "</td>"
 
-            if get_string('use_icons', '0') == "1" and get_string('fctype', 'yahoo') != "wmo.int":
-                if JsonObject['icon'][0:10] != "data:image" and JsonObject['icon'][0:4] != "http":
+            if settings.use_icons and settings.fctype != "wmo.int":
+                if not icon_is_uri(myday.icon):
                     html += "<td style='width:50%;text-align:right;'><img width='80"
-                    html += "pt' src='file://" + CACHEBASE + "/" + JsonObject['icon']
+                    html += "pt' src='" + assetcache.cache_uri(myday.icon)
                     html += "'></td></tr>"
                 else:
                     html += "<td style='width:50%;text-align:right;'><img width='80pt' src='"
-                    html += JsonObject['icon'] + "'></td></tr>"
+                    html += myday.icon + "'></td></tr>"
             else:
                 html += "<td style='width:50%;text-align:right;'><i style='font-size:80pt;'"
-                html += " class='" + JsonObject['icon'] + "'></i></td></tr>"
+                html += " class='" + myday.icon + "'></i></td></tr>"
 
-            if JsonObject['min'] == "&deg;C" or JsonObject['min'] == "&deg;F":
+            if low is None:
                 html += "<tr><td style='text-align:right;16pt;' colspan='2'>"
-                html += JsonObject['text'] + "</td></tr></table><br />"
+                html += myday.text + "</td></tr></table><br />"
             else:
-                html += "<tr><td style='font-size:16pt;'>" + JsonObject['min'] + "</td>"
-                html += "<td style='text-align:right;font-size:16pt;'>" + JsonObject['text']
+                html += "<tr><td style='font-size:16pt;'>" + low + "</td>"
+                html += "<td style='text-align:right;font-size:16pt;'>" + myday.text
                 html += "</td></tr></table><br />"
 
             html += "<table style='width:100%;border:0px;'>"
         i += 1
 
     html += "</table>"
-    html += htmlfooter()
 
-    return html
+    return [doForecastBanner(fctype, ftime, desc, True), html]
 
-def loadRadar():
-    ret = get_radar()
+def loadRadar(cycle):
+    settings = cycle.settings
+    ret = cycle.radar()
     if ret[0] is False:
         return ret[1]
 
-    if get_string("rad_type", "image") == "image":
-        html = htmlheader() + "<div style='position:absolute;top:300px;left:-100px;width:100%'>" 
+    if settings.rad_type == "image":
+        html = htmlheader(settings)
+        html += "<div style='position:absolute;top:300px;left:-100px;width:100%'>" 
         html += "<img style='transform:rotate(90deg);width:1300px;'"
-        html += " src='file://" + CACHEBASE + "/radar.gif'>"
+        html += " src='" + assetcache.cache_uri("radar.gif") + "'>"
         html += "</div>" + htmlfooter()
 
         return html
@@ -907,63 +1896,10 @@ def loadRadar():
 def doForecastBanner(fctype, ftime, desc, showHeader):
     html = ""
 
-    if fctype == "yahoo":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/purple.png'/></div></br>"
-    elif fctype == "weatherzone":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/wz.png'/></div></br>"
-    elif fctype == "yr.no":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/yrno.png'/></div></br>"
-    elif fctype == "bom.gov.au":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/bom.png'/></div></br>"
-    elif fctype == "wmo.int":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/wmo.png'/></div></br>"
-    elif fctype == "weather.gov":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/wgov.png'/></div></br>"
-    elif fctype == "weather.gc.ca":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/wca.png'/></div></br>"
-    elif fctype == "weather.gc.ca-fr":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/wca.png'/></div></br>"
-    elif fctype == "metoffice.gov.uk":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/met.png'/></div></br>"
-    elif fctype == "bom2":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/bom.png'/></div></br>"
-    elif fctype == "aemet.es":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/aemet.jpg'/></div></br>"
-    elif fctype == "dwd.de":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/dwd.jpg'/></div></br>"
-    elif fctype == "metservice.com":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/metservice.png'/></div></br>"
-    elif fctype == "meteofrance.com":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/mf.png'/></div></br>"
-    elif fctype == "darksky.net":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/darksky.png'/></div></br>"
-    elif fctype == "openweathermap.org":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/owm.png'/></div></br>"
-    elif fctype == "apixu.com":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/apixu.png'/></div></br>"
-    elif fctype == "weather.com":
+    provider = providers.get(fctype)
+    if provider is not None:
         html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/weather_com.png'/></div></br>"
-    elif fctype == "met.ie":
-        html = "<div style='text-align:center;'><img style='display:block;margin:0 auto;' "
-        html += "height='29px' src='file://" + APPBASE + "/assets/met_ie.png'/></div></br>"
+        html += "height='29px' src='" + assetcache.app_uri(provider.banner) + "'/></div></br>"
     else:
         html = "<div style='text-align:center;font-size:16pt;'>Error occured...</div><br>"
 
@@ -974,434 +1910,104 @@ def doForecastBanner(fctype, ftime, desc, showHeader):
 
     return html
 
-def doForecastRow(JsonObject):
+def icon_is_uri(icon):
+    """ True if a forecast icon is already a URI rather than a file in CACHEBASE """
+
+    return icon.startswith(("data:image", "http", assetcache.SCHEME + ":"))
+
+def doForecastRow(myday, settings):
+    high = myday.high(settings.metric)
+    low = myday.low(settings.metric)
+
     html = ""
-    if get_string('use_icons', '0') == "1" and get_string('fctype', 'yahoo') != "wmo.int" and \
-        get_string('fctype', 'yahoo') != "darksky.net" and \
-        get_string('fctype', 'yahoo') != "openweathermap.org":
-        if JsonObject['icon'] is None:
+    if settings.use_icons and settings.fctype != "wmo.int" and \
+        settings.fctype != "darksky.net" and settings.fctype != "openweathermap.org":
+        if myday.icon is None:
             html = "<tr><td style='width:10%;vertical-align:top;' rowspan='2'>"
             html += "<i style='font-size:20pt;'>N/A</i></td>"
-        elif JsonObject['icon'][0:10] != "data:image" and JsonObject['icon'][0:4] != "http":
+        elif not icon_is_uri(myday.icon):
             html = "<tr><td style='width:10%;vertical-align:top;' rowspan='2'><img width='40pt' "
-            html += "src='file://" + CACHEBASE + "/" + JsonObject['icon'] + "'></td>"
+            html += "src='" + assetcache.cache_uri(myday.icon) + "'></td>"
         else:
             html = "<tr><td style='width:10%;vertical-align:top;' rowspan='2'><img width='40pt' "
-            html += "src='file://" + CACHEBASE + "/" +  JsonObject['icon'] + "'></td>"
+            html += "src='" + myday.icon + "'></td>"
     else:
         html = "<tr><td style='width:10%;vertical-align:top;' rowspan='2'><i "
-        html += "style='font-size:30pt;' class='" + JsonObject['icon'] + "'></i></td>"
+        html += "style='font-size:30pt;' class='" + myday.icon + "'></i></td>"
 
-    html += "<td style='width:80%;'><b>" + JsonObject['day'] + "</b></td>"
+    html += "<td style='width:80%;'><b>" + myday.day + "</b></td>"
 
-    if JsonObject['max'] != "&deg;C" and JsonObject['max'] != "&deg;F":
+    if high is not None:
         html += "<td style='width:10%;text-align:right;vertical-align:top;'><b>"
-        html += JsonObject['max'] + "</b></td></tr>"
+        html += high + "</b></td></tr>"
     else:
         html += "<td style='width:10%;'><b>&nbsp;</b></td></tr>"
 
-    if JsonObject['min'] != "&deg;C" and JsonObject['min'] != "&deg;F":
-        html += "<tr><td>" + JsonObject['text'] + "</td>" + "<td style='width:10%;"
-        html += "text-align:right;vertical-align:top;'>" + JsonObject['min'] + "</td></tr>"
+    if low is not None:
+        html += "<tr><td>" + myday.text + "</td>" + "<td style='width:10%;"
+        html += "text-align:right;vertical-align:top;'>" + low + "</td></tr>"
     else:
-        html += "<tr><td colspan='2'>" + JsonObject['text'] + "</td></tr>"
+        html += "<tr><td colspan='2'>" + myday.text + "</td></tr>"
 
     html += "<tr><td colspan='2'>&nbsp;</td></tr>"
 
     return html
 
-def getStats(iw):
-    try:
-        bits = download_data()[1].decode('utf8').split('|')
-    except Exception as e:
-        return "<div style='text-align:center;vertical-align:middle;" + \
-                "font-size:12pt;'>Data is unavailable</div>"
-
-    html = "<body>"
-
-    # Today's stats
-
-    html += "<div style='text-align:center;font-size:20pt'>" + bits[56] + "</div><br/>"
-    html += "<div style='text-align:center;font-size:12pt'>" + bits[54] + " " + bits[55] + "</div>"
-
-    html += "<div style='text-align:center;font-size:18pt;font-weight:bold;'>"
-    html += "Today's Statistics</div>"
-    html += "<table style='width:100%;border:0px;'>"
-
-    html += "<tr><td><i style='font-size:" + iw + "pt;' class='flaticon-temperature'></i></td><td>"
-    html += bits[3] + bits[60] + "</td><td>" + convert(bits[4])
-    html += "</td><td style='text-align:right;'>" + convert(bits[2])
-    html += "</td><td style='text-align:right;'>" + bits[1] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "pt;' class='flaticon-temperature'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + str(float(iw) * 1.4)
-    html += "px;' class='wi wi-raindrop'></i></td><td>" + bits[15] + bits[60]
-    html += "</td><td>" + convert(bits[16])
-    html += "</td><td style='text-align:right;'>" + convert(bits[14])
-    html += "</td><td style='text-align:right;'>" + bits[13] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + str(float(iw) * 1.4)
-    html += "pt;' class='wi wi-raindrop'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "pt;' class='wi wi-humidity'></i></td><td>" + bits[9] + bits[64]
-    html += "</td><td>" + convert(bits[10])
-    html += "</td><td style='text-align:right;'>" + convert(bits[8])
-    html += "</td><td style='text-align:right;'>" + bits[6] + bits[64]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "pt;' class='wi wi-humidity'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw + "pt;' class='wi wi-barometer'></i></td><td>"
-    html += bits[39] + bits[63] + "</td><td>" + convert(bits[40])
-    html += "</td><td style='text-align:right;'>" + convert(bits[42])
-    html += "</td><td style='text-align:right;'>" + bits[41] + bits[63]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "pt;' class='wi wi-barometer'></i></td></tr>"
-
-    if get_string('indoor_readings', '0') == "1":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "pt;' class='flaticon-home-page'></i></td><td>" + bits[164] + bits[60]
-        html += "</td><td>" + convert(bits[165])
-        html += "</td><td style='text-align:right;'>" + convert(bits[163])
-        html += "</td><td style='text-align:right;'>" + bits[162] + bits[60]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "pt;' class='flaticon-home-page'></i></td></tr>"
-
-        html += "<tr><td><i style='font-size:" + iw
-        html += "pt;' class='flaticon-home-page'></i></td><td>" + bits[169] + bits[64]
-        html += "</td><td>" + convert(bits[170])
-        html += "</td><td style='text-align:right;'>" + convert(bits[168])
-        html += "</td><td style='text-align:right;'>" + bits[167] + bits[64]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "pt;' class='flaticon-home-page'></i></td></tr>"
-
-    if len(bits) > 205 and bits[205] != "":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "pt;' class='flaticon-women-sunglasses'></i></td><td>" + bits[205] + "UVI</td><td>"
-        html += convert(bits[206])
-        html += "</td><td style='text-align:right;'>" + convert(bits[208])
-        html += "</td><td style='text-align:right;'>" + bits[207]
-        html += "W/m\u00B2</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "pt;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    rain = bits[20]
-    since = "since mn"
-
-    if len(bits) > 160 and bits[160] != "":
-        rain = bits[158]
-
-    if len(bits) > 160 and bits[158] != "" and bits[160] != "":
-        since = "since " + bits[160]
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "pt;' class='flaticon-windy'></i></td><td colspan='3'>" + bits[19] + bits[61] + " "
-    html += bits[32] + " " + convert(bits[33])
-    html += "</td><td style='text-align:right;'>" + rain + bits[62]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "pt;' class='wi wi-umbrella'></i></td></tr>"
-    html += "<tr><td colspan='4'>&nbsp;</td><td style='text-align:right;' colspan='2'>"
-    html += since + "</td></tr>"
-
-    html += "</table><br>"
-
-    # Yesterday's stats
-
-    html += "<div style='text-align:center;font-size:18pt;font-weight:bold;'>"
-    html += "Yesterday's Statistics</div>"
-    html += "<table style='width:100%;border:0px;'>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='flaticon-temperature'></i></td><td>"
-    html += bits[67] + bits[60] + "</td><td>" + convert(bits[68])
-    html += "</td><td style='text-align:right;'>" + convert(bits[66])
-    html += "</td><td style='text-align:right;'>" + bits[65] + bits[60]
-    html += "</td><td><i style='text-align:right;font-size:" + iw
-    html += "px;' class='flaticon-temperature'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + str(float(iw) * 1.4)
-    html += "pt;' class='wi wi-raindrop'></td><td>" + bits[78] + bits[60] + "</td><td>"
-    html += convert(bits[79])
-    html += "</td><td style='text-align:right;'>" + convert(bits[77])
-    html += "</td><td style='text-align:right;'>" + bits[76] + bits[60]
-    html += "</td><td style='text-align:right;'><i style='font-size:" + str(float(iw) * 1.4)
-    html += "pt;' class='wi wi-raindrop'></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='wi wi-humidity'></i></td><td>"
-    html += bits[82] + bits[64] + "</td><td>" + convert(bits[83])
-    html += "</td><td style='text-align:right;'>" + convert(bits[81])
-    html += "</td><td style='text-align:right;'>" + bits[80] + bits[64]
-    html += "</td><td style='text-align:right;'><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='wi wi-barometer'></i></td><td>"
-    html += bits[84] + bits[63] + "</td><td>" + convert(bits[85])
-    html += "</td><td style='text-align:right;'>" + convert(bits[87])
-    html += "</td><td style='text-align:right;'>" + bits[86] + bits[63]
-    html += "</td><td style='text-align:right;'><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td></tr>"
-
-    if len(bits) > 202 and get_string('indoor_readings', '0') == "1":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[173] + bits[60]
-        html += "</td><td>" + convert(bits[174])
-        html += "</td><td style='text-align:right;'>" + convert(bits[172])
-        html += "</td><td style='text-align:right;'>" + bits[171] + bits[60]
-        html += "</td><td style='text-align:right;'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[177] + bits[64]
-        html += "</td><td>" + convert(bits[178])
-        html += "</td><td style='text-align:right'>" + convert(bits[176])
-        html += "</td><td style='text-align:right;'>" + bits[175] + bits[64]
-        html += "</td><td style='text-align:right;'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-    if len(bits) > 209 and bits[209] != "":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td><td>" + bits[209]
-        html += "UVI</td><td>" + convert(bits[210])
-        html += "</td><td style='text-align:right'>" + convert(bits[212])
-        html += "</td><td style='text-align:right;'>" + bits[211]
-        html += "W/m\u00B2</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    rain = bits[21]
-    since = "before mn"
-
-    if len(bits) > 160 and bits[159] != "":
-        rain = bits[159]
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-windy'></i></td><td colspan='3'>" + bits[69] + bits[61] + " "
-    html += bits[70] + " " + convert(bits[71])
-    html += "</td><td style='text-align:right'>" + rain + bits[62]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-umbrella'></i></td></tr>"
-
-    if len(bits) > 160 and bits[159] != "" and bits[160] != "":
-        since = "before " + bits[160]
-
-    html += "<tr><td colspan='4'>&nbsp;</td><td style='text-align:right' colspan='2'>"
-    html += since + "</td></tr></table><br>"
-
-    # This month's stats
-
-    html += "<div style='text-align:center;font-size:18pt;font-weight:bold;'>"
-    html += "This Month's Statistics</div>"
-    html += "<table style='width:100%;border:0px;'>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-temperature'></i></td><td>" + bits[90]
-    html += bits[60] + "</td><td>" + getTime(bits[91])
-    html += "</td><td style='text-align:right'>" + getTime(bits[89])
-    html += "</td><td style='text-align:right'>" + bits[88] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:"
-    html += iw + "px;' class='flaticon-temperature'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + str(float(iw) * 1.4)
-    html += "pt;' class='wi wi-raindrop'></td><td>" + bits[101] + bits[60] + "</td><td>"
-    html += getTime(bits[102])
-    html += "</td><td style='text-align:right'>" + getTime(bits[100])
-    html += "</td><td style='text-align:right'>" + bits[99] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + str(float(iw) * 1.4)
-    html += "pt;' class='wi wi-raindrop'></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='wi wi-humidity'></i></td><td>"
-    html += bits[105] + bits[64] + "</td><td>" + getTime(bits[106])
-    html += "</td><td style='text-align:right'>" + getTime(bits[104])
-    html += "</td><td style='text-align:right'>" + bits[103] + bits[64]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='wi wi-barometer'></i></td><td>"
-    html += bits[107] + bits[63] + "</td><td>" + getTime(bits[108])
-    html += "</td><td style='text-align:right'>" + getTime(bits[110])
-    html += "</td><td style='text-align:right'>" + bits[109] + bits[63]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td></tr>"
-
-    if len(bits) > 202 and get_string("indoor_readings", "0") == "1":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[181] + bits[60]
-        html += "</td><td>" + getTime(bits[182])
-        html += "</td><td style='text-align:right'>" + getTime(bits[180])
-        html += "</td><td style='text-align:right'>" + bits[179] + bits[60]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[185] + bits[64]
-        html += "</td><td>" + getTime(bits[186])
-        html += "</td><td style='text-align:right'>" + getTime(bits[184])
-        html += "</td><td style='text-align:right'>" + bits[183] + bits[64]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-    if len(bits) > 213 and bits[213] != "":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td><td>" + bits[213]
-        html += "UVI</td><td>" + getTime(bits[214])
-        html += "</td><td style='text-align:right'>" + getTime(bits[216])
-        html += "</td><td style='text-align:right'>" + bits[215]
-        html += "W/m\u00B2</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-windy'></i></td><td colspan='3'>" + bits[92] + bits[61]
-    html += " " + bits[93] + " " + getTime(bits[94])
-    html += "</td><td style='text-align:right'>" + bits[22] + bits[62]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-umbrella'></i></td></tr>"
-
-    html += "</table><br>"
-
-    # This years stats
-
-    html += "<div style='text-align:center;font-size:18pt;font-weight:bold;'>"
-    html += "This Year's Statistics</div>"
-    html += "<table style='width:100%;border:0px;'>"
-
-    html += "<tr><td><i style='font-size:" + iw + "px;' class='flaticon-temperature'></i></td><td>"
-    html += bits[113] + bits[60] + "</td><td>" + getTime(bits[114])
-    html += "</td><td style='text-align:right'>" + getTime(bits[112])
-    html += "</td><td style='text-align:right'>" + bits[111] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='flaticon-temperature'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + str(float(iw) * 1.4)
-    html += "px;' class='wi wi-raindrop'></td><td>" + bits[124] + bits[60]
-    html += "</td><td>" + getTime(bits[125])
-    html += "</td><td style='text-align:right'>" + getTime(bits[123])
-    html += "</td><td style='text-align:right'>" + bits[122] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + str(float(iw) * 1.4)
-    html += "px;' class='wi wi-raindrop'></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td><td>" + bits[128] + bits[64]
-    html += "</td><td>" + getTime(bits[129])
-    html += "</td><td style='text-align:right'>" + getTime(bits[127])
-    html += "</td><td style='text-align:right'>" + bits[126] + bits[64]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td><td>" + bits[130] + bits[63]
-    html += "</td><td>" + getTime(bits[131])
-    html += "</td><td style='text-align:right'>" + getTime(bits[133])
-    html += "</td><td style='text-align:right'>" + bits[132] + bits[63]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td></tr>"
-
-    if len(bits) > 202 and get_string("indoor_readings", "0") == "1":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>"
-        html += bits[189] + bits[60] + "</td><td>" + getTime(bits[190])
-        html += "</td><td style='text-align:right'>" + getTime(bits[188])
-        html += "</td><td style='text-align:right'>" + bits[187] + bits[60]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[193] + bits[64]
-        html += "</td><td>" + getTime(bits[194])
-        html += "</td><td style='text-align:right'>" + getTime(bits[192])
-        html += "</td><td style='text-align:right'>" + bits[191] + bits[64]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-    if len(bits) > 217 and bits[217] != "":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td><td>" + bits[217]
-        html += "UVI</td><td>" + getTime(bits[218])
-        html += "</td><td style='text-align:right'>" + getTime(bits[220])
-        html += "</td><td style='text-align:right'>" + bits[219]
-        html += "W/m\u00B2</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-windy'></i></td><td colspan='3'>" + bits[115] + bits[61] + " "
-    html += bits[116] + " " + getTime(bits[117])
-    html += "</td><td style='text-align:right'>" + bits[23] + bits[62]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-umbrella'></i></td></tr>"
-
-    html += "</table><br>"
-
-    # All time stats
-
-    html += "<div style='text-align:center;font-size:18pt;font-weight:bold;'>"
-    html += "All Time Statistics</div>"
-    html += "<table style='width:100%;border:0px;'>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-temperature'></i></td><td>" + bits[136] + bits[60]
-    html += "</td><td>" + getTime(bits[137])
-    html += "</td><td style='text-align:right'>" + getTime(bits[135])
-    html += "</td><td style='text-align:right'>" + bits[134] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='flaticon-temperature'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + str(float(iw) * 1.4)
-    html += "px;' class='wi wi-raindrop'></td><td>" + bits[147] + bits[60]
-    html += "</td><td>" + getTime(bits[148])
-    html += "</td><td style='text-align:right'>" + getTime(bits[146])
-    html += "</td><td style='text-align:right'>" + bits[145] + bits[60]
-    html += "</td><td style='text-align:right'><i style='font-size:"
-    html += str(float(iw) * 1.4) + "px;' class='wi wi-raindrop'></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td><td>" + bits[151] + bits[64]
-    html += "</td><td>" + getTime(bits[152])
-    html += "</td><td style='text-align:right'>" + getTime(bits[150])
-    html += "</td><td style='text-align:right'>" + bits[149] + bits[64]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-humidity'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td><td>" + bits[153] + bits[63]
-    html += "</td><td>" + getTime(bits[154])
-    html += "</td><td style='text-align:right'>" + getTime(bits[156])
-    html += "</td><td style='text-align:right'>" + bits[155] + bits[63]
-    html += "</td><td style='text-align:right'><i style='font-size:" + iw
-    html += "px;' class='wi wi-barometer'></i></td></tr>"
-
-    if len(bits) > 202 and get_string("indoor_readings", "0") == "1":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[197] + bits[60]
-        html += "</td><td>" + getTime(bits[198])
-        html += "</td><td style='text-align:right'>" + getTime(bits[196])
-        html += "</td><td style='text-align:right'>" + bits[195] + bits[60]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td><td>" + bits[201] + bits[64]
-        html += "</td><td>" + getTime(bits[202])
-        html += "</td><td style='text-align:right'>" + getTime(bits[200])
-        html += "</td><td style='text-align:right'>" + bits[199] + bits[64]
-        html += "</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-home-page'></i></td></tr>"
-
-    if len(bits) > 221 and bits[221] != "":
-        html += "<tr><td><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td><td>" + bits[221]
-        html += "UVI</td><td>" + getTime(bits[222])
-        html += "</td><td style='text-align:right'>" + getTime(bits[224])
-        html += "</td><td style='text-align:right'>" + bits[223]
-        html += "W/m\u00B2</td><td style='text-align:right'><i style='font-size:" + iw
-        html += "px;' class='flaticon-women-sunglasses'></i></td></tr>"
-
-    html += "<tr><td><i style='font-size:" + iw
-    html += "px;' class='flaticon-windy'></i></td><td colspan='3'>"
-    html += bits[138] + bits[61] + " " + bits[139] + " " + getTime(bits[140])
-    html += "</td><td style='text-align:right'>" + bits[157] + bits[62]
-    html += "</td><td style='text-align:right'><i style='font-size:"
-    html += iw + "px;' class='wi wi-umbrella'></i></td></tr>"
-
-    html += "</table><br>"
+def getStats(iw, cycle):
+    """ The Stats tab's body as a list of sections, one for each period """
 
-    return html
+    settings = cycle.settings
+    ret = cycle.station()
+    if ret[0] is False:
+        return [UNAVAILABLE]
+
+    record = ret[1]
+    indoor = settings.indoor_readings and record.has("indoor_humidity_alltime_low_time")
+
+    fields = record.as_dict()
+    sections = [STATS_HEADER.fill(fields)]
+
+    # One copy of the fields for the whole page, each period only overwrites the extra values
+    # and its own times
+    values = dict(fields)
+
+    for period, title, unit, clock in STATS_PERIODS:
+        templates = STATS_TEMPLATES[period]
+
+        rain, since = stats_rain(record, period)
+        values.update(title=title, rain=rain, since=since, size=iw + unit,
+                      drop=str(float(iw) * 1.4) + unit)
+
+        parts = ["main", "wind"]
+        if indoor:
+            parts.append("indoor")
+        if record.get("uv_" + period) != "":
+            parts.append("uv")
+
+        times = convert if clock else getTime
+        for part in parts:
+            for name in templates['times'][part]:
+                values[name] = times(fields[name])
+
+        html = [templates['head'].fill(values), templates['main'].fill(values)]
+
+        if "indoor" in parts:
+            html.append(templates['indoor'].fill(values))
+
+        if "uv" in parts:
+            html.append(templates['uv'].fill(values))
+
+        html.append(templates['wind'].fill(values))
+
+        if since is not None:
+            html.append(templates['since'].fill(values))
+
+        html.append(templates['foot'].fill(values))
+        sections.append("".join(html))
+
+    return sections
 
+@functools.lru_cache(maxsize=256)
 def convert(cur):
     cur = cur.strip()
     if " " not in cur:
@@ -1416,18 +2022,14 @@ def convert(cur):
         return cur
 
     hours = int(time[0])
-    mins = int(time[1])
-    secs = int(time[2])
-    pm = False
-    if bits[1].strip().lower() == "pm":
-        pm = True
+    pm = bits[1].strip().lower() == "pm"
 
     if not pm and hours == 12:
         hours = 0
     elif pm and hours != 12:
         hours = hours + 12
 
-    return zeroPad(hours, 10) + zeroPad(mins, 10) + zeroPad(secs, 10)
+    return "%02d%02d%02d" % (hours, int(time[1]), int(time[2]))
 
 def getTime(mystr):
     mystr = mystr.strip()
@@ -1465,5 +2067,3 @@ Forecasts by
 
 weeWX Weather App is by <a href='https://odiousapps.com'>OdiousApps</a>.</span>"""
 
-TMP = read_file("/assets/apixu.json", APPBASE)
-CONDITIONS = json.loads(TMP[1])
@@ -1,33 +1,88 @@
 #!/usr/bin/python3
 
-"""blah!"""
+""" One day of a forecast, the parsers return a list of these and the pages are drawn
+    straight from them """
 
 import json
 
 class Day(object):
-    """ Store day details in a class """
+    """ Store day details in a class. max and min are numbers in unit, "C" or "F", as the
+        provider sent them and are only converted when they're shown. A string is shown as
+        is, for providers that put rain or chance of rain there, and None is left blank """
 
-    day = ""
-    icon = ""
-    text = ""
-    max = ""
-    min = ""
-    timestamp = 0
+    __slots__ = ("day", "icon", "text", "max", "min", "unit", "timestamp")
 
     def __init__(self):
-        pass
+        self.day = ""
+        self.icon = ""
+        self.text = ""
+        self.max = ""
+        self.min = ""
+        self.unit = "C"
+        self.timestamp = 0
+
+    def high(self, metric):
+        """ max ready to show, or None if there isn't one """
+
+        return show(self.max, self.unit, metric)
+
+    def low(self, metric):
+        """ min ready to show, or None if there isn't one """
+
+        return show(self.min, self.unit, metric)
+
+    def as_dict(self):
+        """ The day as a dict, ready for json.dumps() """
+
+        return {'day': self.day, 'icon': self.icon, 'text': self.text, 'max': self.max,
+                'min': self.min, 'unit': self.unit, 'timestamp': self.timestamp}
 
     def __str__(self):
+        return json.dumps(self.as_dict())
+
+def from_dict(output):
+    """ Rebuild a Day that was saved with as_dict() """
+
+    myday = Day()
+    for name in Day.__slots__:
+        setattr(myday, name, output[name])
+
+    return myday
+
+def temperature(value):
+    """ A temperature from a forecast as a number, None if it's missing. Anything that isn't
+        a number is kept as it is """
+
+    if value is None:
+        return None
+
+    if not isinstance(value, str):
+        return value
+
+    value = value.replace("&deg;", "").replace("°", "").strip()
+    if value == "":
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def show(value, unit, metric):
+    """ A temperature in unit, rounded and formatted in the unit the settings ask for """
+
+    if value is None or isinstance(value, str):
+        return value
+
+    want = "C" if metric else "F"
+    if unit == "C" and want == "F":
+        value = value * 9 / 5 + 32
+    elif unit == "F" and want == "C":
+        value = (value - 32) * 5 / 9
 
-        output = {}
-        output['day'] = self.day
-        output['icon'] = self.icon
-        output['text'] = self.text
-        output['max'] = self.max
-        output['min'] = self.min
-        output['timestamp'] = self.timestamp
-        # dd MMM yyyy HH:mm
-        # output['ftime'] = datetime.datetime.fromtimestamp(self.timestamp)
-        # output['ftime'] = output['ftime'].strftime("%d %b. %Y %H:%M")
-
-        return json.dumps(output)
+    return str(round(value)) + "&deg;" + want
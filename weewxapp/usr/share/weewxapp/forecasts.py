@@ -8,6 +8,7 @@ import time
 import json
 import os
 import collections
+import functools
 import xmltodict
 import day
 import common
@@ -16,6 +17,12 @@ DE_DAYS = {"monday": "Montag", "tuesday": "Dienstag", "wednesday": "Mittwoch",
            "thursday": "Donnerstag", "friday": "Freitag", "saturday": "Samstag",
            "sunday": "Sonntag"}
 
+@functools.lru_cache(maxsize=1)
+def apixu_conditions():
+    """ apixu.com's condition codes, only read once an apixu forecast needs them """
+
+    return json.loads(common.read_file("/assets/apixu.json", common.APPBASE)[1])
+
 def convert_day_to_ts(day_name, last_ts, lang="en_AU"):
     """ Search for the current day name and turn it into a timestamp """
 
@@ -39,7 +46,7 @@ def convert_day_to_ts(day_name, last_ts, lang="en_AU"):
         if last_ts > start_ts + 864000:
             return 0
 
-def process_wz(data):
+def process_wz(data, settings):
     """ Process Weather Zone forecast """
 
     jobj = xmltodict.parse(data)
@@ -53,10 +60,9 @@ def process_wz(data):
 
     mydesc = jobj['item'][0]["description"].split("<b>")
 
-    days = ""
+    days = []
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
     for line in mydesc:
         line = line.strip()
@@ -84,7 +90,7 @@ def process_wz(data):
         myday.text = mybits[2].strip()
         myrange = mybits[3].split(" - ", 1)
 
-        if use_icons != "1":
+        if not use_icons:
             if myimg != "frost-then-sunny":
                 myday.icon = "wi wi-weatherzone-" + myimg
             else:
@@ -92,32 +98,24 @@ def process_wz(data):
         else:
             myday.icon = "wz" + myimg.replace("-", "_") + ".png"
 
-        myday.max = myrange[1].strip()
-        myday.min = myrange[0].strip()
-
-        if metric != "1":
-            myday.max = str(round(float(myrange[1][:-7]) * 9.0 / 5.0 + 32.0, 0)) + "&deg;F"
-            myday.min = str(round(float(myrange[0][:-7]) * 9.0 / 5.0 + 32.0, 0)) + "&deg;F"
-
-        days += str(myday) + ","
+        myday.max = day.temperature(myrange[1].replace("&#176;C", ""))
+        myday.min = day.temperature(myrange[0].replace("&#176;C", ""))
 
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_yrno(data):
+def process_yrno(data, settings):
     """ Process yr.no forecast """
 
-    use_icons = common.get_string("use_icons", "0")
+    use_icons = settings.use_icons
 
     jobj = xmltodict.parse(data)
     jobj = jobj['weatherdata']
     location = jobj['location']
     desc = location['name'] + ", " + location['country']
 
-    days = ""
+    days = []
     jarr = jobj['forecast']['tabular']['time']
 
     for line in jarr:
@@ -126,7 +124,7 @@ def process_yrno(data):
         to_time = line['@to']
         code = line['symbol']['@var']
         myday.min = line['precipitation']['@value'] + "mm"
-        myday.max = line['temperature']['@value'] + "&deg;C"
+        myday.max = day.temperature(line['temperature']['@value'])
 
         myday.text = line['windSpeed']['@name'] + ", " + line['windSpeed']['@mps'] + "m/s from the "
         myday.text += line['windDirection']['@name']
@@ -140,45 +138,63 @@ def process_yrno(data):
         date = datetime.datetime.fromtimestamp(date1).strftime("%A")
         myday.day = date + ": " + from_time + "-" + to_time
 
-        if use_icons != "1":
+        if not use_icons:
             myday.icon = "wi wi-yrno-" + code
         else:
             myday.icon = "yrno" + code + ".png"
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_bom1(data):
+def is_bom_area(path, bomtown):
+    """ True if path is product/forecast/area, the <area> for bomtown """
+
+    if len(path) != 3 or path[1][0] != "forecast" or path[2][0] != "area":
+        return False
+
+    return path[2][1] is not None and path[2][1].get("description") == bomtown
+
+def find_bom_area(data, bomtown):
+    """ The <area> for bomtown from a BoM FTP product, or None. Products cover a whole state
+        so they're streamed an area at a time, other areas are thrown away as soon as they
+        end and parsing stops once the town's area has ended """
+
+    found = []
+
+    def area_done(path, item):
+        if not is_bom_area(path, bomtown):
+            return True
+
+        found.append(item)
+        return False
+
+    try:
+        xmltodict.parse(data, item_depth=3, item_callback=area_done)
+    except xmltodict.ParsingInterrupted:
+        pass
+
+    if not found:
+        return None
+
+    return found[0]
+
+def process_bom1(data, settings):
     """ Process BoM FTP forecast """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
-    bomtown = common.get_string("bomtown", "")
+    use_icons = settings.use_icons
+    bomtown = settings.bomtown
 
     if bomtown == "":
         return [False, "Town or suburb not set, update settings.txt"]
 
-    jobj = xmltodict.parse(data)['product']
-    # content = jobj["amoc"]["issue-time-local"]['#text']
-
-    days = ""
-    loc_content = None
+    days = []
 
-    for area in jobj["forecast"]["area"]:
-        if bomtown == area['@description']:
-            loc_content = area
-            break
-
-    if loc_content is None:
+    jobj = find_bom_area(data, bomtown)
+    if jobj is None:
         return[False, "Unable to match '" + bomtown + "'", ""]
 
-    jobj = loc_content
-    desc = jobj["@description"] + ", Australia"
+    desc = bomtown + ", Australia"
 
     for forecast in jobj['forecast-period']:
         myday = day.Day()
@@ -206,7 +222,7 @@ def process_bom1(data):
             if forecast['text'][i]['@type'] == "precis":
                 myday.text = forecast['text'][i]['#text']
 
-        if use_icons != "1":
+        if not use_icons:
             if myday.icon != "14":
                 myday.icon = "wi wi-bom-ftp-" + myday.icon
             else:
@@ -214,33 +230,23 @@ def process_bom1(data):
         else:
             myday.icon = "bom" + myday.icon + ".png"
 
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-            myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
+        myday.max = day.temperature(myday.max)
+        myday.min = day.temperature(myday.min)
 
-        if myday.max == "&deg;C" or myday.max == "&deg;F" or myday.max == "":
+        if myday.max is None:
             myday.max = "N/A"
 
-        if myday.min == "&deg;C" or myday.min == "&deg;F":
+        if myday.min is None:
             myday.min = ""
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_wmo(data):
+def process_wmo(data, settings):
     """ Process WMO forecast """
 
-    metric = common.get_string("metric", "1")
-
-    days = ""
+    days = []
 
     jobj = json.loads(data)
 
@@ -257,11 +263,16 @@ def process_wmo(data):
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
 
         myday.text = j['weather']
-        myday.max = j['maxTemp'] + "&deg;C"
-        myday.min = j['minTemp'] + "&deg;C"
-        if metric != "1":
-            myday.max = j['maxTempF'] + "&deg;F"
-            myday.min = j['minTempF'] + "&deg;F"
+
+        # WMO sends both units, the provider's own Fahrenheit values are used rather than
+        # converting them
+        if settings.metric:
+            myday.max = day.temperature(j['maxTemp'])
+            myday.min = day.temperature(j['minTemp'])
+        else:
+            myday.max = day.temperature(j['maxTempF'])
+            myday.min = day.temperature(j['minTempF'])
+            myday.unit = "F"
 
         code = str(j['weatherIcon'])[:-2]
 
@@ -278,21 +289,16 @@ def process_wmo(data):
         else:
             myday.icon = "wi wi-wmo-" + code
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_metoffice(data):
+def process_metoffice(data, settings):
     """ Process MET Office forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
     desc = data.split('<title>', 1)[1].split(' weather - Met Office</title>', 1)[0].strip()
     forecasts = data.split('<ul id="dayNav"', 2)[1].split('</ul>', 2)[0].split('<li')
@@ -315,37 +321,28 @@ def process_metoffice(data):
         myday.text = myday.text.split("</div>", 1)[0]
         myday.text = myday.text.replace('</span>', '').replace('<span>', '').strip()
 
-        if metric == "1":
-            myday.min += "C"
-            myday.max += "C"
-        else:
-            myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-            myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
+        myday.min = day.temperature(myday.min)
+        myday.max = day.temperature(myday.max)
 
-        if use_icons == "1":
+        if use_icons:
             myday.icon = "met" + myday.icon
         else:
             myday.icon = "wi wi-metoffice-" + myday.icon[:-4]
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_bom2(data):
+def process_bom2(data, settings):
     """ Process BoM forecasts method 2 """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
     desc = data.split('<title>', 1)[1].split(' Weather - Bureau of Meteorology</title>', 1)[0]
     desc = desc + ", Australia"
 
     data = data.split('<div class="forecasts">', 1)[1]
-    days = ""
+    days = []
 
     bits = data.split('<dl class="forecast-summary">')
     del bits[0]
@@ -368,7 +365,7 @@ def process_bom2(data):
     myday.text = bit.split('<dd class="summary">', 1)[1].split('</dd>', 1)[0].strip()
 
     file_name = os.path.basename(myday.icon)[:-4]
-    if use_icons != "1":
+    if not use_icons:
         if file_name != "frost":
             myday.icon = "wi wi-bom-" + file_name
         else:
@@ -376,26 +373,16 @@ def process_bom2(data):
     else:
         myday.icon = "bom2" + file_name.replace('-', '_') + ".png"
 
-    myday.max = myday.max.replace("°C", "").replace("&deg;C", "").strip()
-    myday.min = myday.min.replace("°C", "").replace("&deg;C", "").strip()
-
-    if metric == "1":
-        myday.max += "&deg;C"
-        myday.min += "&deg;C"
-    else:
-        if myday.min != "":
-            myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-        if myday.max != "":
-            myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
+    myday.max = day.temperature(myday.max.replace("°C", "").replace("&deg;C", ""))
+    myday.min = day.temperature(myday.min.replace("°C", "").replace("&deg;C", ""))
 
-    if myday.min.startswith("&deg;"):
+    if myday.min is None:
         myday.min = ""
 
-    if myday.max == "" or myday.max.startswith("&deg;"):
+    if myday.max is None:
         myday.max = "N/A"
 
-    days += str(myday) + ","
+    days.append(myday)
 
     del bits[0]
 
@@ -415,7 +402,7 @@ def process_bom2(data):
         myday.text = bit.split('<dd class="summary">', 1)[1].split('</dd>', 1)[0].strip()
 
         file_name = os.path.basename(myday.icon)[:-4]
-        if use_icons != "1":
+        if not use_icons:
             if file_name != "frost":
                 myday.icon = "wi wi-bom-" + file_name
             else:
@@ -423,38 +410,23 @@ def process_bom2(data):
         else:
             myday.icon = "bom2" + file_name.replace('-', '_') + ".png"
 
-        myday.max = myday.max.replace("°C", "").replace("&deg;C", "").strip()
-        myday.min = myday.min.replace("°C", "").replace("&deg;C", "").strip()
+        myday.max = day.temperature(myday.max.replace("°C", "").replace("&deg;C", ""))
+        myday.min = day.temperature(myday.min.replace("°C", "").replace("&deg;C", ""))
 
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            if myday.min != "":
-                myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-            if myday.max != "":
-                myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-        if myday.min.startswith("&deg;"):
+        if myday.min is None:
             myday.min = ""
 
-        if myday.max == "" or myday.max.startswith("&deg;"):
+        if myday.max is None:
             myday.max = "N/A"
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_aemet(data):
+def process_aemet(data, settings):
     """ Process AEMET forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
     jobj = xmltodict.parse(data)
 
@@ -468,7 +440,7 @@ def process_aemet(data):
     # dayname = datetime.datetime.fromtimestamp(timestamp).strftime("%A -- %H:%M")
     # print(dayname)
 
-    days = ""
+    days = []
 
     dates = jobj['prediccion']['dia']
     for date in dates:
@@ -494,7 +466,7 @@ def process_aemet(data):
                 except KeyError:
                     pass
 
-        if use_icons != "1":
+        if not use_icons:
             if myday.icon != "7":
                 myday.icon = "wi wi-aemet-" + myday.icon
             else:
@@ -502,37 +474,25 @@ def process_aemet(data):
         else:
             myday.icon = "aemet_" + myday.icon + "_g.png"
 
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            if myday.min != "":
-                myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-            if myday.max != "":
-                myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
+        myday.max = day.temperature(myday.max)
+        myday.min = day.temperature(myday.min)
 
-        if myday.min.startswith("&deg;"):
+        if myday.min is None:
             myday.min = ""
 
-        if myday.max == "" or myday.max.startswith("&deg;"):
+        if myday.max is None:
             myday.max = "N/A"
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_dwd(data):
+def process_dwd(data, settings):
     """ Process DWD.de forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
     bits = data.split("<title>", 1)[1]
     desc = bits.split("</title>", 1)[0]
@@ -578,35 +538,25 @@ def process_dwd(data):
         myday.icon = myday.icon.replace('?__blob=normal', '').strip()
         myday.icon = "dwd_" + myday.icon.replace('-', '_')
 
-        if use_icons != "1":
+        if not use_icons:
             myday.icon = myday.icon[4:-4]
             if myday.icon != "pic-48" and myday.icon != "pic-66" and myday.icon != "pic67":
                 myday.icon = "wi wi-dwd-" + myday.icon
             else:
                 myday.icon = "flaticon-thermometer"
 
-        if metric == "1":
-            myday.max += "&deg;C"
-        else:
-            if myday.max != "":
-                myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-        if not myday.max.startswith('&deg;'):
-            days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        myday.max = day.temperature(myday.max)
+        if myday.max is not None:
+            days.append(myday)
 
     return [True, days, desc]
 
-def process_metservice(data):
+def process_metservice(data, settings):
     """ Process metservice forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
     jobj = json.loads(data)
     loop = jobj['days']
@@ -619,8 +569,8 @@ def process_metservice(data):
         myday.timestamp = time.mktime(time.strptime(jtmp['dateISO'], "%Y-%m-%dT%H:%M:%S"))
         myday.day = jtmp["dow"]
         myday.text = jtmp["forecast"]
-        myday.max = jtmp["max"]
-        myday.min = jtmp["min"]
+        myday.max = day.temperature(jtmp["max"])
+        myday.min = day.temperature(jtmp["min"])
 
         if "partDayData" in jtmp:
             myday.icon = jtmp["partDayData"]["afternoon"]["forecastWord"]
@@ -629,7 +579,7 @@ def process_metservice(data):
 
         myday.icon = myday.icon.lower().replace(" ", "-").strip()
 
-        if use_icons != "1":
+        if not use_icons:
             if myday.icon != "frost":
                 myday.icon = "wi wi-metservice-" + myday.icon
             else:
@@ -638,27 +588,18 @@ def process_metservice(data):
             myday.icon = myday.icon.replace("-", "_")
             myday.icon = "ms_" + myday.icon + ".png"
 
-        if metric:
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-            myday.min = str(round(float(myday.min) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_darksky(data):
+def process_darksky(data, settings):
     """ Process darksky forecasts """
 
-    metric = common.get_string("metric", "1")
+    # Forecasts are downloaded in Celsius, settings saved by older versions may still ask
+    # for Fahrenheit by leaving the units off
+    unit = "C" if "units=" in settings.forecast_url else "F"
 
-    days = ""
+    days = []
 
     jobj = json.loads(data)
     desc = str(jobj["latitude"]) + ", " + str(jobj["longitude"])
@@ -669,35 +610,23 @@ def process_darksky(data):
         myday.icon = jarr["icon"]
         myday.timestamp = jarr['time']
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
-        myday.max = str(round(float(jarr['temperatureHigh'])))
-        myday.min = str(round(float(jarr['temperatureLow'])))
-
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            myday.max += "&deg;F"
-            myday.min += "&deg;F"
+        myday.max = float(jarr['temperatureHigh'])
+        myday.min = float(jarr['temperatureLow'])
+        myday.unit = unit
 
         myday.icon = "wi wi-forecast-io-" + myday.icon
         myday.text = jarr["summary"]
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
-
-    print(days)
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_owm(data):
+def process_owm(data, settings):
     """ Process OpenWeatherMap.org forecasts """
 
-    metric = common.get_string("metric", "1")
+    unit = "F" if "units=imperial" in settings.forecast_url else "C"
 
-    days = ""
+    days = []
 
     jobj = json.loads(data)
 
@@ -707,8 +636,9 @@ def process_owm(data):
         myday = day.Day()
         myday.timestamp = j['dt']
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
-        myday.max = str(round(float(j['temp']['max'])))
-        myday.min = str(round(float(j['temp']['min'])))
+        myday.max = float(j['temp']['max'])
+        myday.min = float(j['temp']['min'])
+        myday.unit = unit
         weather = j['weather'][0]
 
         myday.text = weather['description']
@@ -718,28 +648,16 @@ def process_owm(data):
         else:
             myday.icon = "wi wi-owm-night-" + str(weather['id'])
 
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            myday.max += "&deg;F"
-            myday.min += "&deg;F"
-
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_apixu(data):
+def process_apixu(data, settings):
     """ Process apixu.com forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
     jobj = json.loads(data)
     desc = jobj["location"]["name"] + ", " + jobj["location"]["country"]
@@ -749,39 +667,31 @@ def process_apixu(data):
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
         this_day = j["day"]
 
-        if metric == "1":
-            myday.min = str(this_day['mintemp_c']) + "&deg;C"
-            myday.max = str(this_day['maxtemp_c']) + "&deg;C"
-        else:
-            myday.min = str(this_day['mintemp_f']) + "&deg;F"
-            myday.max = str(this_day['maxtemp_f']) + "&deg;F"
+        myday.min = day.temperature(this_day['mintemp_c'])
+        myday.max = day.temperature(this_day['maxtemp_c'])
 
-        for cond in common.CONDITIONS:
+        for cond in apixu_conditions():
             if cond["code"] == this_day["condition"]["code"]:
                 myday.icon = str(cond["icon"])
                 myday.text = cond["day"]
                 break
 
-        if use_icons != "1":
+        if not use_icons:
             myday.icon = "wi wi-apixu-" + myday.icon
         else:
             myday.icon = "apixu_" + myday.icon + ".png"
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_wcom(data):
+def process_wcom(data, settings):
     """ Process weather.com forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
+    unit = "F" if "units=e" in settings.forecast_url else "C"
 
-    days = ""
+    days = []
 
     jobj = json.loads(data)
     desc = jobj["id"]
@@ -799,61 +709,41 @@ def process_wcom(data):
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
         myday.text = phrase[i]
         myday.icon = icons[i]
-        myday.max = str(day_temp[i])
-        myday.min = str(night_temp[i])
+        myday.max = day.temperature(day_temp[i])
+        myday.min = day.temperature(night_temp[i])
+        myday.unit = unit
 
-        if use_icons != "1":
-            myday.icon = "wi wi-yahoo-" + myday.icon
+        if not use_icons:
+            myday.icon = "wi wi-yahoo-" + str(myday.icon)
         else:
             myday.icon = "yahoo" + str(myday.icon) + ".gif"
 
-        if metric == "1":
-            myday.max += "&deg;C"
-            myday.min += "&deg;C"
-        else:
-            myday.max += "&deg;F"
-            myday.min += "&deg;F"
-
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
 
-def process_metie(data):
+def process_metie(data, settings):
     """ Process met.ie forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
-    desc = common.get_string('metierev', '')
+    desc = settings.metierev
     for jobj in json.loads(data):
         myday = day.Day()
         tmp_day = jobj["date"] + "T" + jobj["time"]
         myday.timestamp = time.mktime(time.strptime(tmp_day, '%Y-%m-%dT%H:%M'))
         myday.day = datetime.datetime.fromtimestamp(myday.timestamp).strftime("%A")
-        myday.max = str(jobj["temperature"])
+        myday.max = day.temperature(jobj["temperature"])
         myday.icon = jobj["weatherNumber"]
         myday.text = jobj["weatherDescription"]
 
-        if use_icons != "1":
+        if not use_icons:
             myday.icon = "wi wi-met-ie-" + myday.icon
         else:
             myday.icon = "y" + myday.icon + ".png"
 
-        if metric == "1":
-            myday.max += "&deg;C"
-        else:
-            myday.max = str(round(float(myday.max) * 9.0 / 5.0 + 32.0)) + "&deg;F"
-
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
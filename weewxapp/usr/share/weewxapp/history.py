@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+
+""" Keep a local history of station observations in SQLite """
+
+import datetime
+import hashlib
+import sqlite3
+import threading
+import time
+
+# StationRecord fields that get stored, all of them are averaged when rolled up
+FIELDS = ("out_temp", "apparent_temp", "dewpoint", "out_humidity", "barometer", "wind_speed",
+          "rain_today", "uv", "radiation", "indoor_temp", "indoor_humidity")
+
+# Each observation is folded into a 5 minute, an hourly and a daily average as it's added,
+# these are (level, seconds per bucket, seconds to keep it for). Daily buckets start at local
+# midnight, so they're worked out separately.
+FIVE_MIN = 0
+HOURLY = 1
+DAILY = 2
+
+LEVELS = ((FIVE_MIN, 300, 7 * 86400), (HOURLY, 3600, 366 * 86400),
+          (DAILY, 86400, 10 * 366 * 86400))
+
+# How often old buckets are pruned
+PRUNE_EVERY = 3600
+
+SCHEMA_VERSION = 2
+
+CONNECTIONS = {}
+LOCK = threading.Lock()
+LAST_PRUNE = {}
+
+def connect(filename):
+    """ Open (and if need be create) the history database, connections are reused """
+
+    conn = CONNECTIONS.get(filename)
+    if conn is not None:
+        return conn
+
+    conn = sqlite3.connect(filename, check_same_thread=False)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        # Each field also counts the samples it actually had a value in, so gaps don't drag
+        # its average down
+        columns = ", ".join(field + " REAL, " + field + "_samples INTEGER NOT NULL"
+                            for field in FIELDS)
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS obs")
+            # The primary key is the only index, WITHOUT ROWID stores the rows in it so range
+            # scans on (level, ts) never have to look anywhere else
+            conn.execute("CREATE TABLE obs (level INTEGER NOT NULL, ts INTEGER NOT NULL, " +
+                         "samples INTEGER NOT NULL, " + columns +
+                         ", PRIMARY KEY (level, ts)) WITHOUT ROWID")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("PRAGMA user_version = " + str(SCHEMA_VERSION))
+
+    CONNECTIONS[filename] = conn
+    return conn
+
+def to_number(value):
+    """ Turn a field as the server formatted it into a float, or None """
+
+    try:
+        return float(value.strip().replace(",", "."))
+    except (AttributeError, ValueError):
+        return None
+
+def bucket(level, seconds, when):
+    """ Start of the bucket when falls into """
+
+    if level == DAILY:
+        day = datetime.datetime.fromtimestamp(when).replace(hour=0, minute=0, second=0,
+                                                             microsecond=0)
+        return int(day.timestamp())
+
+    return int(when) // seconds * seconds
+
+def record(filename, station, raw, when=None):
+    """ Add one observation, raw is the payload it was parsed from and is used to skip
+        observations that have already been recorded """
+
+    if when is None:
+        when = time.time()
+
+    digest = hashlib.sha1(raw).hexdigest()
+    values = []
+    for field in FIELDS:
+        value = to_number(station.get(field))
+        values += [value, int(value is not None)]
+
+    # Running averages over the samples each field had a value in, a missing value leaves the
+    # bucket's average as it was
+    updates = ", ".join(field + " = CASE WHEN excluded." + field + " IS NULL THEN " + field +
+                        " WHEN " + field + " IS NULL THEN excluded." + field +
+                        " ELSE (" + field + " * " + field + "_samples + excluded." + field +
+                        ") / (" + field + "_samples + 1) END, " + field + "_samples = " +
+                        field + "_samples + excluded." + field + "_samples"
+                        for field in FIELDS)
+    columns = ", ".join(field + ", " + field + "_samples" for field in FIELDS)
+    sql = "INSERT INTO obs (level, ts, samples, " + columns + ") VALUES (?, ?, 1" + \
+          ", ?" * len(values) + ") ON CONFLICT (level, ts) DO UPDATE SET " + updates + \
+          ", samples = samples + 1"
+
+    with LOCK:
+        conn = connect(filename)
+        last = conn.execute("SELECT value FROM meta WHERE key = 'last_digest'").fetchone()
+        if last is not None and last[0] == digest:
+            return False
+
+        with conn:
+            for level, seconds, keep in LEVELS:
+                conn.execute(sql, [level, bucket(level, seconds, when)] + values)
+
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_digest', ?)",
+                         (digest,))
+
+        if when - LAST_PRUNE.get(filename, 0) > PRUNE_EVERY:
+            prune(conn, when)
+            LAST_PRUNE[filename] = when
+
+    return True
+
+def prune(conn, now):
+    """ Throw away buckets older than their level is kept for """
+
+    with conn:
+        for level, seconds, keep in LEVELS:
+            conn.execute("DELETE FROM obs WHERE level = ? AND ts < ?", (level, int(now - keep)))
+
+def level_for(start, now=None):
+    """ The finest level that still has data going back to start """
+
+    if now is None:
+        now = time.time()
+
+    for level, seconds, keep in LEVELS:
+        if start >= now - keep:
+            return level
+
+    return DAILY
+
+def series(filename, field, start, end=None, level=None, now=None):
+    """ [(timestamp, value), ...] for one field between start and end, oldest first. The
+        level is picked for how far start is before now, callers that worked start out from
+        their own now pass it in too so a span that's exactly a level's age still uses it """
+
+    if field not in FIELDS:
+        raise ValueError(field + " isn't kept in the history")
+
+    if now is None:
+        now = time.time()
+
+    if end is None:
+        end = now
+
+    if level is None:
+        level = level_for(start, now)
+
+    with LOCK:
+        conn = connect(filename)
+        rows = conn.execute("SELECT ts, " + field + " FROM obs WHERE level = ? AND ts >= ? " +
+                            "AND ts <= ? AND " + field + " IS NOT NULL ORDER BY ts",
+                            (level, int(start), int(end))).fetchall()
+
+    return rows
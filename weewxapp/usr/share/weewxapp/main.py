@@ -3,13 +3,17 @@
 
 import gi
 import threading
+import time
+import assetcache
 import common
+import native
 
 gi.require_version('Gtk', "3.0")
 gi.require_version('WebKit2', '4.0')
 gi.require_version('Handy', '0.0')
+gi.require_version('Soup', '2.4')
 
-from gi.repository import Gtk, Gio, GLib, GObject
+from gi.repository import Gtk, Gio, GLib, GObject, Soup
 from gi.repository import WebKit2 as Webkit
 from gi.repository import Handy
 
@@ -22,11 +26,162 @@ INTERVALS = ["Manual Updates",
              "Every 30 Minutes",
              "Every Hour"]
 
+# Seconds between updates for each entry in INTERVALS
+UPDATE_PERIODS = [0, 300, 600, 900, 1800, 3600]
+
 iw = "18"
 base_uri = "file:///"
 
 ICON_FILE = "/usr/share/pixmaps/weewxapp.png"
 
+# The WebViews on each notebook page, in page order
+TAB_VIEWS = [["webview1", "webview2"], ["webview3"], ["webview4"], ["webview5"], ["webview6"]]
+
+# Megabytes a web process can grow to before WebKit starts freeing memory, WebKit 2.34+
+MEMORY_LIMIT = 200
+
+# With measure = 1 in config.ini each refresh reports how long it took, how long the main
+# loop was blocked and the memory the app and its WebKit processes use, printed and in the
+# header bar's tooltip. The main loop is checked every STALL_TICK ms for that.
+STALL_TICK = 20
+
+def web_context(cache_model):
+    """ A WebContext for a group of tabs. WebKit gives every view its own web process unless
+        it's built related to another view, see mainScreen.create_view() """
+
+    kwargs = {}
+    if hasattr(Webkit, "MemoryPressureSettings"):
+        pressure = Webkit.MemoryPressureSettings.new()
+        pressure.set_memory_limit(MEMORY_LIMIT)
+        kwargs['memory_pressure_settings'] = pressure
+    else:
+        print("WebKit is older than 2.34, web processes won't be held to " +
+              str(MEMORY_LIMIT) + " MB")
+
+    context = Webkit.WebContext(**kwargs)
+    context.set_cache_model(cache_model)
+    return context
+
+def serve_asset(request):
+    """ Answer a weewx:// request from the asset cache """
+
+    ret = assetcache.load(request.get_uri())
+    if ret[0] is False:
+        print(ret[1])
+        request.finish_error(GLib.Error.new_literal(Gio.io_error_quark(), ret[1],
+                                                    Gio.IOErrorEnum.NOT_FOUND))
+        return
+
+    stream = Gio.MemoryInputStream.new_from_bytes(GLib.Bytes.new(ret[1]))
+
+    # Responses can only carry headers from WebKit 2.36
+    if hasattr(Webkit, "URISchemeResponse"):
+        response = Webkit.URISchemeResponse.new(stream, len(ret[1]))
+        response.set_content_type(ret[2])
+        headers = Soup.MessageHeaders.new(Soup.MessageHeadersType.RESPONSE)
+        headers.append("Cache-Control", ret[3])
+        response.set_http_headers(headers)
+        request.finish_with_response(response)
+    else:
+        request.finish(stream, len(ret[1]), ret[2])
+
+def view_resources(settings):
+    """ The resource each view shows, by name """
+
+    if settings.show_radar:
+        return {"webview1": "data", "webview2": "radar", "webview3": "data",
+                "webview4": "forecast", "webview5": "webcam", "webview6": "custom"}
+
+    return {"webview1": "data", "webview2": "forecast", "webview3": "data",
+            "webview4": "radar", "webview5": "webcam", "webview6": "custom"}
+
+class refreshScheduler(object):
+    """ Keep one GLib timer per downloaded resource. Each fires once the resource's copy on
+        disk is older than its max age, but never sooner than the update period, and is
+        armed again from the file's age when the refresh it started has finished """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.period = None
+        self.sources = {}
+
+    def set_update_freq(self, update_freq):
+        """ (Re)start the timers for a new update frequency """
+
+        if update_freq < 0 or update_freq >= len(UPDATE_PERIODS):
+            update_freq = 1
+
+        period = UPDATE_PERIODS[update_freq]
+        if period == self.period:
+            return
+
+        self.cancel()
+        self.period = period
+
+        for resource in common.MAX_AGES:
+            self.arm(resource)
+
+    def delay(self, resource):
+        """ Seconds until resource is due. The extra second is so it's past its max age
+            when the timer fires, the download functions only fetch once it's older """
+
+        age = common.resource_age(resource)
+        if age is None:
+            return self.period
+
+        return max(self.period, common.MAX_AGES[resource] - age + 1)
+
+    def arm(self, resource):
+        """ Start resource's timer again from the age of its copy on disk """
+
+        if self.period is None or self.period == 0 or resource not in common.MAX_AGES:
+            return
+
+        source = self.sources.pop(resource, None)
+        if source is not None:
+            GLib.source_remove(source)
+
+        self.sources[resource] = GLib.timeout_add_seconds(self.delay(resource), self.on_timer,
+                                                          resource)
+
+    def fetched(self, resources):
+        """ A refresh of resources has finished, time their next one from their new age """
+
+        for resource in resources:
+            self.arm(resource)
+
+    def on_timer(self, resource):
+        del self.sources[resource]
+        self.callback([resource])
+        return False
+
+    def cancel(self):
+        for source in self.sources.values():
+            GLib.source_remove(source)
+
+        self.sources = {}
+
+class stallMeter(object):
+    """ Time how late a STALL_TICK ms timer fires, that's how long the main loop was blocked """
+
+    def __init__(self):
+        self.worst = 0.0
+        self.last = time.monotonic()
+        GLib.timeout_add(STALL_TICK, self.on_tick)
+
+    def on_tick(self):
+        now = time.monotonic()
+        self.worst = max(self.worst, (now - self.last) * 1000 - STALL_TICK)
+        self.last = now
+        return True
+
+    def reset(self):
+        """ The longest stall in ms since the last reset """
+
+        worst = self.worst
+        self.worst = 0.0
+        return worst
+
 class aboutScreen(Gtk.ApplicationWindow):
     def __init__(self, app):
         Gtk.ApplicationWindow.__init__(self, title="Test", application=app)
@@ -143,6 +298,17 @@ class settingsScreen(Gtk.ApplicationWindow):
         hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
         vbox.pack_start(hbox, False, False, 0)
 
+        label = Gtk.Label(label="Draw Weather and Stats without WebKit?")
+        hbox.pack_start(label, False, False, 0)
+
+        self.native_render = Gtk.Switch()
+        if common.get_string("native_render", "0") == "1":
+            self.native_render.set_active(True)
+        hbox.pack_end(self.native_render, False, True, 0)
+
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        vbox.pack_start(hbox, False, False, 0)
+
         label = Gtk.Label(label="Update Frequency:")
         hbox.pack_start(label, False, False, 0)
 
@@ -181,9 +347,11 @@ class settingsScreen(Gtk.ApplicationWindow):
         icons = self.icons.get_active()
         wifi = self.wifi.get_active()
         update = self.interval.get_active()
+        native_render = self.native_render.get_active()
 
         my_thread = threading.Thread(target=do_save,
-                                     args=(url, indoor, dark, metric, radar, icons, update, wifi))
+                                     args=(url, indoor, dark, metric, radar, icons, update, wifi,
+                                           native_render))
         my_thread.start()
 
         self.destroy()
@@ -206,10 +374,25 @@ class mainScreen(Gtk.ApplicationWindow):
 
         header = Gtk.HeaderBar(title="weeWX App")
         header.set_show_close_button(False)
+        self.header = header
 
         button = Gtk.MenuButton()
         header.pack_end(button)
 
+        self.spinner = Gtk.Spinner()
+        header.pack_end(self.spinner)
+
+        self.refreshing = False
+        self.refresh_pending = None
+        self.last_update = None
+        self.page_keys = {}
+        self.shells = {}
+        self.scheduler = refreshScheduler(self.refresh_data)
+
+        self.stalls = None
+        if common.get_string("measure", "0") == "1":
+            self.stalls = stallMeter()
+
         menumodel = Gio.Menu()
         menumodel.append("Settings", "win.settings")
         menumodel.append("About", "win.about")
@@ -230,39 +413,31 @@ class mainScreen(Gtk.ApplicationWindow):
 
         self.set_titlebar(header)
 
-        self.webview1 = Webkit.WebView()
-        self.webview1.load_html(content, base_uri)
-
-        self.webview2 = Webkit.WebView()
-        self.webview2.load_html(content, base_uri)
-
-        self.webview3 = Webkit.WebView()
-        self.webview3.load_html(content, base_uri)
-
-        self.webview4 = Webkit.WebView()
-        self.webview4.load_html(content, base_uri)
-
-        self.webview5 = Webkit.WebView()
-        self.webview5.load_html(content, base_uri)
-
-        self.webview6 = Webkit.WebView()
-        self.webview6.load_html(content, base_uri)
-
-        hbox1 = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        hbox1.pack_start(self.webview1, True, True, 0)
-        hbox1.pack_start(self.webview2, True, True, 0)
-
-        hbox2 = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        hbox2.pack_start(self.webview3, True, True, 0)
-
-        hbox3 = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        hbox3.pack_start(self.webview4, True, True, 0)
-
-        hbox4 = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        hbox4.pack_start(self.webview5, True, True, 0)
-
-        hbox5 = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        hbox5.pack_start(self.webview6, True, True, 0)
+        # The pages this app builds itself are small and loaded from strings, so they keep next
+        # to nothing cached and share one web process. Radar and custom web pages get a
+        # browser sized cache and processes of their own so they can't bloat the local tabs.
+        self.local_context = web_context(Webkit.CacheModel.DOCUMENT_VIEWER)
+        self.remote_context = web_context(Webkit.CacheModel.WEB_BROWSER)
+
+        # Icons, stylesheets, radar and webcam images come from memory over weewx://, only
+        # the local pages can load them
+        self.local_context.register_uri_scheme(assetcache.SCHEME, serve_asset)
+        security = self.local_context.get_security_manager()
+        security.register_uri_scheme_as_local(assetcache.SCHEME)
+        security.register_uri_scheme_as_secure(assetcache.SCHEME)
+        security.register_uri_scheme_as_cors_enabled(assetcache.SCHEME)
+
+        # WebViews are only built the first time their tab is shown, see create_tab()
+        self.loading_page = content
+        self.boxes = []
+        for views in TAB_VIEWS:
+            self.boxes.append(Gtk.Box(orientation=Gtk.Orientation.VERTICAL))
+            for name in views:
+                setattr(self, name, None)
+
+        # Views on hidden tabs that missed a refresh, name -> the resource to refresh
+        self.dirty = {}
+        self.current_tab = 0
 
         self.notebook = Gtk.Notebook()
         self.notebook.set_scrollable(True)
@@ -274,72 +449,425 @@ class mainScreen(Gtk.ApplicationWindow):
         self.wclabel = Gtk.Label(label="Webcam")
         self.clabel = Gtk.Label(label="Custom")
 
-        self.notebook.append_page(hbox1, self.wlabel)
-        self.notebook.append_page(hbox2, self.slabel)
-        self.notebook.append_page(hbox3, self.frlabel)
-        self.notebook.append_page(hbox4, self.wclabel)
-        self.notebook.append_page(hbox5, self.clabel)
+        self.notebook.append_page(self.boxes[0], self.wlabel)
+        self.notebook.append_page(self.boxes[1], self.slabel)
+        self.notebook.append_page(self.boxes[2], self.frlabel)
+        self.notebook.append_page(self.boxes[3], self.wclabel)
+        self.notebook.append_page(self.boxes[4], self.clabel)
         self.add(self.notebook)
-        self.refresh_data()
+        self.create_tab(0)
+        self.notebook.connect("switch-page", self.switch_page)
+        self.reschedule()
+
+    def create_tab(self, index):
+        """ Build the WebViews for a notebook page if they don't exist yet """
 
-    def refresh_data(self):
-        update_freq = int(common.get_string("update_freq", "1"))
-        if update_freq == 0:
-            timer = 0
-        elif update_freq == 2:
-            timer = 600000
-        elif update_freq == 3:
-            timer = 900000
-        elif update_freq == 4:
-            timer = 1800000
-        elif update_freq == 5:
-            timer = 3600000
+        settings = common.snapshot_settings()
+        if settings.show_radar:
+            radar_view = "webview2"
         else:
-            timer = 300000
+            radar_view = "webview4"
 
-        if timer > 0:
-            GLib.timeout_add(timer, self.refresh_data)
+        for name in TAB_VIEWS[index]:
+            if getattr(self, name) is not None:
+                continue
 
-        show_radar = common.get_string("show_radar", "1")
-        rad_type = common.get_string("rad_type", "image")
-        radar_url = common.get_string("radar_url", "")
-        custom_url = common.get_string("custom_url", "")
+            if settings.native_render and name in native.VIEWS:
+                self.create_view(name, "native")
+            elif name == "webview6" or (name == radar_view and settings.rad_type != "image"):
+                self.create_view(name, "remote")
+            else:
+                self.create_view(name, "local")
 
-        if common.get_string("show_radar", "1") == '0':
-            self.frlabel.set_label("Radar")
-        else:
-            self.frlabel.set_label("Forecast")
+    def view_kind(self, name):
+        """ "native" for a GTK view, otherwise the context its WebView is in """
+
+        webview = getattr(self, name)
+        if isinstance(webview, native.nativeView):
+            return "native"
+
+        if webview.get_context() == self.remote_context:
+            return "remote"
 
-        content = common.loadCurrentConditions(iw)
-        content = common.htmlheader() + content + common.htmlfooter()
-        self.webview1.load_html(content, base_uri)
+        return "local"
 
-        if show_radar == "1" and rad_type == "image":
-            content = common.loadRadar()
-            self.webview2.load_html(content, base_uri)
-        elif show_radar == "1" and rad_type != "image":
-            self.webview2.load_uri(radar_url)
+    def create_view(self, name, kind):
+        """ Build a native view or a WebView in the local or remote context, replacing the
+            view already there """
+
+        for index, views in enumerate(TAB_VIEWS):
+            if name in views:
+                box = self.boxes[index]
+
+        if kind == "native":
+            # The icon fonts and styles are only loaded once native rendering is actually used
+            native.setup()
+            webview = native.VIEWS[name](iw)
+            webview.start()
         else:
-            content = common.loadForecast1()
-            self.webview2.load_html(content, base_uri)
+            related = None
+            if kind == "remote":
+                context = self.remote_context
+            else:
+                context = self.local_context
+                related = self.local_view()
+
+            # Local views are built related to one that's already there so they all share its
+            # web process, the first one starts it
+            if related is None:
+                webview = Webkit.WebView.new_with_context(context)
+            else:
+                webview = Webkit.WebView(web_context=context, related_view=related)
+
+        box.pack_start(webview, True, True, 0)
+
+        # The first time a view is built it shows what it had last run, if there is anything
+        old = getattr(self, name)
+        shown = old is None and self.show_saved(name, webview, kind)
+        if not shown and kind != "native":
+            webview.load_html(self.loading_page, base_uri)
+
+        if old is not None:
+            box.reorder_child(webview, box.child_get_property(old, "position"))
+            old.destroy()
+            self.page_keys.pop(name, None)
+            self.shells.pop(name, None)
+
+        webview.show()
+        setattr(self, name, webview)
+        return webview
+
+    def local_view(self):
+        """ A local WebView that's already built, or None """
+
+        for views in TAB_VIEWS:
+            for name in views:
+                webview = getattr(self, name)
+                if webview is not None and self.view_kind(name) == "local":
+                    return webview
+
+        return None
+
+    def show_saved(self, name, webview, kind):
+        """ Show a view's last good render with a badge saying how old it is, False if
+            there isn't one it can show """
+
+        ret = common.load_page(name)
+        if ret[0] is False or kind == "remote":
+            return False
+
+        settings = common.snapshot_settings()
+        page = ret[1]
+        if (page[0] == "native") != (kind == "native") or \
+           page[2] != view_resources(settings)[name]:
+            return False
+
+        if page[0] == "native":
+            webview.update(page[1])
+            webview.show_badge(common.age_text(ret[2]))
+            return True
+
+        badge = common.age_badge(ret[2])
+        if page[0] == "html":
+            webview.load_html(page[1].replace("<body>", "<body>" + badge, 1), base_uri)
+            return True
+
+        # The badge goes in the first section so the first patch with fresh data removes it
+        sections = [badge + page[1][0]] + page[1][1:]
+        webview.load_html(common.htmlshell(settings, sections), base_uri)
+        self.shells[name] = [common.htmlheader(settings), sections]
+        return True
+
+    def switch_page(self, notebook, page, page_num):
+        """ Build the tab being switched to and catch it up on refreshes it missed """
+
+        self.current_tab = page_num
+        self.create_tab(page_num)
+
+        resources = set()
+        for name in TAB_VIEWS[page_num]:
+            if name in self.dirty:
+                resources.add(self.dirty.pop(name))
+
+        if resources:
+            self.refresh_data(resources)
+
+    def reschedule(self):
+        """ Apply a new update frequency, then refresh everything """
+
+        self.scheduler.set_update_freq(common.snapshot_settings().update_freq)
+        self.refresh_data()
+        return False
+
+    def refresh_data(self, resources=None):
+        """ Refresh the tabs that depend on resources, or every tab if None. Only the tab
+            that's showing is rendered, the rest are marked dirty until they're shown """
+
+        if resources is None:
+            resources = list(common.MAX_AGES) + ["custom"]
+        elif "data" in resources:
+            resources = list(resources) + ["custom"]
+
+        if self.refreshing:
+            if self.refresh_pending is None:
+                self.refresh_pending = set()
+            self.refresh_pending.update(resources)
+            return False
+
+        settings = common.snapshot_settings()
+
+        # Charts are drawn with one point per pixel of the Weather tab, less its margins
+        chart_width = self.webview1.get_allocated_width() - 20
+        if chart_width < 100:
+            chart_width = common.CHART_WIDTH
+
+        self.refreshing = True
+        self.spinner.start()
+        self.header.set_subtitle("Updating...")
+
+        my_thread = threading.Thread(target=self.build_pages,
+                                     args=(settings, set(resources), chart_width,
+                                           set(TAB_VIEWS[self.current_tab])), daemon=True)
+        my_thread.start()
 
-        content = common.htmlheader() + common.getStats(iw) + common.htmlfooter()
-        self.webview3.load_html(content, base_uri)
+        return False
 
-        if show_radar == "0" and rad_type == "image":
-            content = common.loadRadar()
-            self.webview4.load_html(content, base_uri)
-        elif show_radar == "0" and rad_type != "image":
-            self.webview4.load_uri(radar_url)
+    def build_pages(self, settings, resources, chart_width, visible):
+        """ Download and render the affected tabs, this runs in a worker thread """
+
+        started = time.perf_counter()
+        pages = {}
+        timings = {}
+        dirty = {}
+
+        def wanted(name, resource):
+            """ Views that aren't showing are marked dirty instead of being rendered """
+
+            if name in visible:
+                return True
+
+            dirty[name] = resource
+            return False
+
+        if settings.show_radar:
+            radar_view, forecast_view = "webview2", "webview4"
         else:
-            content = common.loadForecast2()
-            self.webview4.load_html(content, base_uri)
+            radar_view, forecast_view = "webview4", "webview2"
+
+        try:
+            # Everything is fetched and parsed at once, rendering then shares the results
+            cycle = common.RefreshCycle(settings, chart_width)
+
+            # The station data is always fetched so the history keeps up, anything else is
+            # left until its tab is showing
+            views = {"radar": radar_view, "forecast": forecast_view, "webcam": "webview5"}
+            fetch = set()
+            for resource in resources:
+                if resource not in views or wanted(views[resource], resource):
+                    fetch.add(resource)
+
+            timings = common.prefetch(cycle, fetch)[1]
+
+            # Pages whose inputs hash the same as last time are left alone
+            if "data" in resources:
+                # Only the Weather page has charts, so only its key has their width in it
+                key = common.render_key(settings, cycle.data(), chart_width)
+                if wanted("webview1", "data") and self.needs_render(["webview1"], key):
+                    if settings.native_render:
+                        pages['webview1'] = ["native", native.conditions_model(cycle), key]
+                    else:
+                        pages['webview1'] = ["sections",
+                                             common.loadCurrentConditions(iw, cycle), key]
+
+                key = common.render_key(settings, cycle.data())
+                if wanted("webview3", "data") and self.needs_render(["webview3"], key):
+                    if settings.native_render:
+                        pages['webview3'] = ["native", native.stats_model(cycle), key]
+                    else:
+                        pages['webview3'] = ["sections", common.getStats(iw, cycle), key]
+
+            if "radar" in fetch:
+                if settings.rad_type == "image":
+                    key = common.render_key(settings, cycle.radar(),
+                                            common.file_digest("radar.gif", common.CACHEBASE))
+                    if self.needs_render([radar_view], key):
+                        pages[radar_view] = ["html", common.loadRadar(cycle), key]
+                else:
+                    pages[radar_view] = ["uri", settings.radar_url]
+
+            if "forecast" in fetch:
+                key = common.render_key(settings, cycle.forecast_text(),
+                                        common.file_stamp("forecast.txt"))
+                if self.needs_render([forecast_view], key):
+                    if forecast_view == "webview2":
+                        content = common.loadForecast1(cycle)
+                    else:
+                        content = common.loadForecast2(cycle)
+                    pages[forecast_view] = ["sections", content, key]
+
+            if "webcam" in fetch:
+                key = common.render_key(settings, cycle.webcam(),
+                                        common.file_digest("webcam.jpg", common.CACHEBASE))
+                if self.needs_render(["webview5"], key):
+                    pages['webview5'] = ["html", common.webcam(cycle), key]
+
+            if "custom" in resources and settings.custom_url != "" and \
+               wanted("webview6", "custom"):
+                pages['webview6'] = ["uri", settings.custom_url]
+            # Pages rendered from good data are kept to show straight away next launch
+            shows = view_resources(settings)
+            good = {"data": cycle.station, "radar": cycle.radar, "forecast": cycle.forecast,
+                    "webcam": cycle.webcam}
+            for name, page in pages.items():
+                if page[0] != "uri" and good[shows[name]]()[0]:
+                    common.save_page(name, [page[0], page[1], shows[name]])
+        except Exception as e:
+            print(str(e))
+
+        GLib.idle_add(self.show_pages, settings, resources, pages, timings, dirty,
+                      time.perf_counter() - started)
+
+    def needs_render(self, names, key):
+        """ Check if the pages shown in the named webviews are out of date, and count it """
+
+        for name in names:
+            if self.page_keys.get(name) != key:
+                common.RENDER_STATS['performed'] += len(names)
+                return True
+
+        common.RENDER_STATS['skipped'] += len(names)
+        return False
+
+    def show_page(self, settings, header, name, page):
+        """ Put one rendered page in its view """
+
+        # Web pages and the app's own pages are kept in different contexts, a view moves
+        # over if the settings changed what it shows
+        kind = {"uri": "remote", "native": "native"}.get(page[0], "local")
+        webview = getattr(self, name)
+        if self.view_kind(name) != kind:
+            webview = self.create_view(name, kind)
+
+        if page[0] == "native":
+            webview.update(page[1])
+            self.page_keys[name] = page[2]
+            return
+
+        if page[0] == "uri":
+            webview.load_uri(page[1])
+            self.page_keys.pop(name, None)
+            self.shells.pop(name, None)
+            return
+
+        self.page_keys[name] = page[2]
+
+        if page[0] == "html":
+            webview.load_html(page[1], base_uri)
+            self.shells.pop(name, None)
+            return
+
+        # Sections go into the page already showing if it was built with the same
+        # header, only the ones that changed are replaced
+        script = None
+        shell = self.shells.get(name)
+        if shell is not None and shell[0] == header and not webview.is_loading():
+            script = common.shell_patch(shell[1], page[1])
+
+        if script is None:
+            webview.load_html(common.htmlshell(settings, page[1]), base_uri)
+        elif script != "":
+            webview.run_javascript(script, None, None, None)
+
+        self.shells[name] = [header, page[1]]
+
+    def show_pages(self, settings, resources, pages, timings, dirty, worker_time):
+        """ Hand the rendered pages to the webviews on the main loop """
+
+        started = time.perf_counter()
+        self.dirty.update(dirty)
+        for name in pages:
+            self.dirty.pop(name, None)
+
+        if not settings.show_radar:
+            self.frlabel.set_label("Radar")
+        else:
+            self.frlabel.set_label("Forecast")
+
+        header = common.htmlheader(settings)
 
-        ret = common.webcam()
-        self.webview5.load_html(ret, base_uri)
+        shown = []
+        for name, page in pages.items():
+            view_started = time.perf_counter()
+            self.show_page(settings, header, name, page)
+            if self.stalls is not None:
+                shown.append(name + " " + self.view_kind(name) + " " +
+                             ("%.1f" % ((time.perf_counter() - view_started) * 1000)) + " ms")
 
-        if custom_url != "":
-            self.webview6.load_uri(custom_url)
+        age = common.file_age("data.txt")
+        if age is not None:
+            self.last_update = GLib.DateTime.new_now_local().add_seconds(-age)
+
+        if self.last_update is None:
+            self.header.set_subtitle("No data yet")
+        elif age is None or age > common.DATA_MAX_AGE * 2:
+            self.header.set_subtitle("Stale, last updated " + self.last_update.format("%H:%M"))
+        else:
+            self.header.set_subtitle("Updated " + self.last_update.format("%H:%M"))
+
+        tooltip = []
+        if timings:
+            tooltip.append("Last download: " + common.format_timings(timings))
+
+        tooltip.append("Pages rendered: " + str(common.RENDER_STATS['performed']) +
+                       ", unchanged: " + str(common.RENDER_STATS['skipped']))
+
+        with common.FORECAST_LOCK:
+            forecasts = dict(common.FORECAST_STATS)
+
+        if forecasts['misses'] or forecasts['hits']:
+            tooltip.append("Forecasts parsed: " + str(forecasts['misses']) +
+                           ", from cache: " + str(forecasts['hits']))
+
+        failing = common.format_breakers()
+        if failing != "":
+            tooltip.append("Failing hosts: " + failing)
+
+        # The worker does what refresh_data() used to do on the main loop, so its time is
+        # how long the window froze for before
+        if self.stalls is not None:
+            measured = "Refresh: %.1f ms in the worker, %.1f ms on the main loop, " \
+                       "longest main loop stall since the last refresh %.1f ms" % \
+                       (worker_time * 1000, (time.perf_counter() - started) * 1000,
+                        self.stalls.reset())
+            if shown:
+                measured += "\nShown: " + ", ".join(shown)
+            print(measured)
+            tooltip.append(measured)
+
+            memory = "Memory: " + common.format_memory(common.memory_usage())
+            print(memory)
+            tooltip.append(memory)
+
+        if tooltip:
+            self.header.set_tooltip_text("\n".join(tooltip))
+
+        self.spinner.stop()
+        self.refreshing = False
+        self.scheduler.fetched(resources)
+
+        # The tab may have been switched while this refresh was running
+        for name in TAB_VIEWS[self.current_tab]:
+            if name in self.dirty:
+                if self.refresh_pending is None:
+                    self.refresh_pending = set()
+                self.refresh_pending.add(self.dirty.pop(name))
+
+        if self.refresh_pending is not None:
+            resources = self.refresh_pending
+            self.refresh_pending = None
+            self.refresh_data(resources)
+
+        return False
 
     def settings_callback(self, action, parameter):
         self.settings = settingsScreen(app)
@@ -366,13 +894,13 @@ class Application(Gtk.Application):
     def do_startup(self):
         Gtk.Application.do_startup(self)
 
-def do_save(url, indoor, dark, metric, radar, icons, update, wifi):
+def do_save(url, indoor, dark, metric, radar, icons, update, wifi, native_render):
 
-    ret = common.save_config(url, indoor, dark, metric, radar, icons, update, wifi)
+    ret = common.save_config(url, indoor, dark, metric, radar, icons, update, wifi, native_render)
     if ret[0] is False:
         return ret[1]
 
-    app.win.refresh_data()
+    GLib.idle_add(app.win.reschedule)
 
 if __name__ == "__main__":
     app = Application()
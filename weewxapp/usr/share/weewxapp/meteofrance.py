@@ -3,13 +3,12 @@
 import common
 import day
 
-def process_mf(data):
+def process_mf(data, settings):
     """ Process meteofrance.com Forecasts """
 
-    use_icons = common.get_string("use_icons", "0")
-    metric = common.get_string("metric", "1")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
 
     desc = data.split("<h1>", 1)[1].split("</h1>", 1)[0].strip()
     data = data.split("<!-- LISTE JOURS -->", 1)[1].split("<!-- LISTE JOURS/ -->", 1)[0].strip()
@@ -21,23 +20,18 @@ def process_mf(data):
     for bit in bits:
         myday = day.Day()
         myday.day = bit.split("<a>", 1)[1].split("</a>", 1)[0].strip()
-        myday.min = bit.split('class="min-temp">', 1)[1].split('°C Minimale', 1)[0].strip()
-        myday.max = bit.split('class="max-temp">', 1)[1].split('°C Maximale', 1)[0].strip()
+        mintemp = bit.split('class="min-temp">', 1)[1].split('°C Minimale', 1)[0]
+        maxtemp = bit.split('class="max-temp">', 1)[1].split('°C Maximale', 1)[0]
+        myday.min = day.temperature(mintemp)
+        myday.max = day.temperature(maxtemp)
         myday.icon = bit.split('<dd class="pic40 ', 1)[1].split('">', 1)[0].strip()
 
-        if metric == "1":
-            myday.max = myday.max + "&deg;C"
-            myday.min = myday.min + "&deg;C"
-        else:
-            myday.max = str(round(int(myday.max) * 9 / 5 + 32)) + "&deg;F"
-            myday.min = str(round(int(myday.max) * 9 / 5 + 32)) + "&deg;F"
-
         icon = TABLE.get(myday.icon)
         if icon is None:
             # TODO: report/log missing CSS name
             myday.icon = None
         else:
-            if use_icons != "1":
+            if not use_icons:
                 if icon.replace("_", "-") != 'j-w1-8-n"':
                     myday.icon = "wi wi-meteofrance-" + icon.replace('_', '-')
                 else:
@@ -45,13 +39,7 @@ def process_mf(data):
             else:
                 myday.icon = "mf_" + icon + ".png"
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
-
-    print(days)
+        days.append(myday)
 
     return [True, days, desc]
 
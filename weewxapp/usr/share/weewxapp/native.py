@@ -0,0 +1,401 @@
+#!/usr/bin/python3
+
+""" The Weather and Stats tabs drawn with GTK widgets instead of a WebView """
+
+import ctypes
+import functools
+import html
+import os
+import re
+
+import gi
+
+gi.require_version('Gtk', "3.0")
+
+from gi.repository import Gtk, Gdk
+
+import common
+
+# The icon fonts the HTML pages use, each icon's glyph is read from the stylesheets
+STYLESHEETS = (("weathericons.css", "Weather Icons"), ("weathericons_wind.css", "Weather Icons"),
+               ("flaticon.css", "Flaticon"))
+FONT_FILES = ("weathericons.woff", "flaticon.woff")
+
+# CSS class -> (font family, glyph), and wi-towards-* -> degrees clockwise
+GLYPHS = {}
+ROTATIONS = {}
+
+STYLE = b"""
+.weewx-station { font-size: 20pt; }
+.weewx-heading { font-size: 18pt; font-weight: bold; }
+.weewx-temp { font-size: 36pt; }
+.weewx-small { font-size: 10pt; }
+.weewx-value { font-size: 11.5pt; }
+"""
+
+# The rows of the Stats tab, (field, icon, the unit field) in the order they're shown
+STATS_ROWS = (("temp", "flaticon-temperature", "temp_unit"),
+              ("dewpoint", "wi wi-raindrop", "temp_unit"),
+              ("humidity", "wi wi-humidity", "humidity_unit"),
+              ("barometer", "wi wi-barometer", "pressure_unit"),
+              ("indoor_temp", "flaticon-home-page", "temp_unit"),
+              ("indoor_humidity", "flaticon-home-page", "humidity_unit"))
+
+UV_ICON = "flaticon-women-sunglasses"
+
+# The field names of each row above for every period, worked out once
+STATS_FIELDS = {period[0]: [(field + "_" + period[0] + "_low", field + "_" + period[0] +
+                             "_low_time", field + "_" + period[0] + "_high_time", field + "_" +
+                             period[0] + "_high", unit_field)
+                            for field, icon, unit_field in STATS_ROWS]
+                for period in common.STATS_PERIODS}
+
+def setup():
+    """ Load the icon fonts and styles, this has to happen before the first view is drawn """
+
+    if GLYPHS:
+        return
+
+    try:
+        fontconfig = ctypes.CDLL("libfontconfig.so.1")
+        for name in FONT_FILES:
+            filename = os.path.join(common.APPBASE, "assets", name)
+            if not fontconfig.FcConfigAppFontAddFile(None, filename.encode()):
+                print("Failed to load " + filename)
+    except OSError as error:
+        print("Failed to load the icon fonts, " + str(error))
+
+    for stylesheet, family in STYLESHEETS:
+        ret = common.read_file("assets/" + stylesheet, common.APPBASE)
+        if ret[0] is False:
+            print(ret[1])
+            continue
+
+        for name, code in re.findall(r'\.([\w-]+):before\s*\{\s*content:\s*"\\(\w+)"', ret[1]):
+            GLYPHS[name] = (family, chr(int(code, 16)))
+
+        for name, degrees in re.findall(r'\.(wi-towards-\w+)\s*\{[^}]*?transform:\s*' +
+                                        r'rotate\((\d+)deg\)', ret[1]):
+            ROTATIONS[name] = int(degrees)
+
+    provider = Gtk.CssProvider()
+    provider.load_from_data(STYLE)
+    Gtk.StyleContext.add_provider_for_screen(Gdk.Screen.get_default(), provider,
+                                             Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+
+@functools.lru_cache(maxsize=512)
+def text(value):
+    """ A value as the server formatted it, for a label rather than HTML """
+
+    if "&" not in value:
+        return value
+
+    return html.unescape(value)
+
+def set_icon(label, classes, size):
+    """ Show the icon for the CSS classes the HTML pages use, size is in points """
+
+    glyph = None
+    angle = 0
+    for name in classes.split():
+        glyph = GLYPHS.get(name, glyph)
+        angle = ROTATIONS.get(name, angle)
+
+    if glyph is None:
+        label.set_text("")
+        return
+
+    label.set_markup("<span font_family='" + glyph[0] + "' size='" +
+                     str(int(size * 1024)) + "'>" + glyph[1] + "</span>")
+
+    # Labels turn anticlockwise, CSS rotates clockwise
+    label.set_angle(-angle % 360)
+
+def new_label(style=None, xalign=0.0):
+    """ A label for a value that's filled in later """
+
+    label = Gtk.Label(label="")
+    label.set_xalign(xalign)
+    label.set_hexpand(True)
+    if style is not None:
+        label.get_style_context().add_class(style)
+
+    return label
+
+def new_icon(classes, size):
+    """ A label showing an icon """
+
+    label = Gtk.Label()
+    set_icon(label, classes, size)
+    return label
+
+def conditions_model(cycle):
+    """ Everything the Weather tab shows as label text, None if the data is unavailable.
+        This runs in the refresh thread so it mustn't touch any widgets """
+
+    ret = cycle.station()
+    if ret[0] is False:
+        return None
+
+    record = ret[1]
+    values = record.as_dict()
+
+    model = {}
+    model['station'] = text(values['station'])
+    model['when'] = text(values['date'] + " " + values['time'])
+    model['temp'] = text(values['out_temp'] + values['temp_unit'])
+    model['at'] = None
+    if record.has("apparent_temp"):
+        model['at'] = text("AT: " + values['apparent_temp'] + values['temp_unit'])
+
+    model['wind'] = text(values['wind_speed'] + values['wind_unit'])
+    model['wind_dir'] = text(values['wind_dir'])
+    model['towards'] = "wi wi-wind wi-towards-" + values['wind_dir'].lower()
+    model['barometer'] = text(values['barometer'] + values['pressure_unit'])
+    model['humidity'] = text(values['out_humidity'] + values['humidity_unit'])
+    model['rain'] = text(common.conditions_rain(record))
+    model['dewpoint'] = text(values['dewpoint'] + values['temp_unit'])
+    model['uv'] = text(values['uv'] + "UVI")
+    model['radiation'] = text(values['radiation'] + "W/m\u00B2")
+
+    model['indoor'] = None
+    if cycle.settings.indoor_readings and record.has("indoor_humidity_alltime_low_time"):
+        model['indoor'] = (text(values['indoor_temp'] + values['temp_unit']),
+                           text(values['indoor_humidity'] + values['humidity_unit']))
+
+    for name in ("sunrise", "sunset", "moonrise", "moonset"):
+        model[name] = text(values[name])
+
+    return model
+
+def stats_model(cycle):
+    """ Everything the Stats tab shows as label text, None if the data is unavailable """
+
+    ret = cycle.station()
+    if ret[0] is False:
+        return None
+
+    record = ret[1]
+    values = record.as_dict()
+    indoor = cycle.settings.indoor_readings and record.has("indoor_humidity_alltime_low_time")
+
+    model = {"station": text(values['station']),
+             "when": text(values['date'] + " " + values['time']), "periods": []}
+
+    for period, title, unit, clock in common.STATS_PERIODS:
+        times = common.convert if clock else common.getTime
+
+        rows = []
+        for low, low_time, high_time, high, unit_field in STATS_FIELDS[period]:
+            if low.startswith("indoor") and not indoor:
+                rows.append(None)
+                continue
+
+            rows.append((text(values[low] + values[unit_field]), times(values[low_time]),
+                         times(values[high_time]), text(values[high] + values[unit_field])))
+
+        uv = None
+        if values['uv_' + period] != "":
+            uv = (text(values['uv_' + period] + "UVI"), times(values['uv_' + period + "_time"]),
+                  times(values['radiation_' + period + "_time"]),
+                  text(values['radiation_' + period] + "W/m\u00B2"))
+
+        rain, since = common.stats_rain(record, period)
+        wind = values['wind_' + period] + values['wind_unit'] + " " + \
+               values['wind_' + period + "_dir"] + " " + times(values['wind_' + period + "_time"])
+
+        model['periods'].append({"title": title, "rows": rows, "uv": uv, "wind": text(wind),
+                                 "rain": text(rain + values['rain_unit']), "since": since})
+
+    return model
+
+class nativeView(Gtk.ScrolledWindow):
+    """ A scrolling page of labels that are updated in place """
+
+    def __init__(self):
+        Gtk.ScrolledWindow.__init__(self)
+        self.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+
+        self.box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.box.set_border_width(8)
+        self.add(self.box)
+
+        self.badge = new_label("weewx-small", 1.0)
+        self.box.pack_start(self.badge, False, False, 0)
+
+        self.station = new_label("weewx-station", 0.5)
+        self.when = new_label(None, 0.5)
+        self.box.pack_start(self.station, False, False, 0)
+        self.box.pack_start(self.when, False, False, 0)
+
+        self.unavailable = Gtk.Label(label="Data is still loading.")
+        self.box.pack_start(self.unavailable, False, False, 0)
+
+        self.content = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.box.pack_start(self.content, False, False, 0)
+
+    def start(self):
+        """ Show the view with only the loading message, call once it's been built """
+
+        self.show_all()
+
+        # These come and go with the data, so a later show_all() on the window or the tab
+        # leaves them alone instead of showing empty rows over the loading message
+        for widget in (self.badge, self.station, self.when, self.unavailable, self.content):
+            widget.set_no_show_all(True)
+
+        for widget in (self.badge, self.station, self.when, self.content):
+            widget.hide()
+
+    def show_badge(self, age):
+        """ Mark what's showing as saved from an earlier run, until the next update() """
+
+        set_text(self.badge, age)
+        self.badge.show()
+
+    def update(self, model):
+        """ Show a new model from conditions_model() or stats_model() """
+
+        self.badge.hide()
+        set_text(self.unavailable, "Data is unavailable")
+        self.unavailable.set_visible(model is None)
+        for widget in (self.station, self.when, self.content):
+            widget.set_visible(model is not None)
+
+        if model is None:
+            return
+
+        set_text(self.station, model['station'])
+        set_text(self.when, model['when'])
+        self.fill(model)
+
+def set_text(label, value):
+    """ Change a label only if its text has changed """
+
+    if label.get_text() != value:
+        label.set_text(value)
+
+def set_row(labels, values):
+    """ Fill in one row of a grid, or hide it if values is None """
+
+    for label in labels:
+        label.set_visible(values is not None)
+
+    if values is not None:
+        for label, value in zip(labels[1:], values):
+            set_text(label, value)
+
+class conditionsView(nativeView):
+    """ The Weather tab """
+
+    def __init__(self, iw):
+        nativeView.__init__(self)
+        size = float(iw)
+
+        grid = Gtk.Grid(column_spacing=8)
+        self.temp = new_label("weewx-temp", 1.0)
+        self.at = new_label(None, 1.0)
+        self.at.set_valign(Gtk.Align.END)
+        grid.attach(self.temp, 0, 0, 1, 1)
+        grid.attach(self.at, 1, 0, 1, 1)
+        self.content.pack_start(grid, False, False, 0)
+
+        grid = Gtk.Grid(column_spacing=8, row_spacing=4)
+        self.rows = []
+        for row, icons in enumerate(((("flaticon-windy", 16), ("wi wi-barometer", size)),
+                                     (("wi wi-wind", size), ("wi wi-humidity", size)),
+                                     (("wi wi-umbrella", size), ("wi wi-raindrop", size * 1.4)),
+                                     ((UV_ICON, size), (UV_ICON, size)),
+                                     (("flaticon-home-page", size),
+                                      ("flaticon-home-page", size)))):
+            labels = [new_icon(*icons[0]), new_label("weewx-value"),
+                      new_label("weewx-value", 1.0), new_icon(*icons[1])]
+            for column, label in enumerate(labels):
+                grid.attach(label, column, row, 1, 1)
+            self.rows.append(labels)
+
+        self.content.pack_start(grid, False, False, 0)
+        self.size = size
+
+        grid = Gtk.Grid(column_spacing=4)
+        self.sun = {}
+        for column, name in enumerate(("sunrise", "sunset", "moonrise", "moonset")):
+            grid.attach(new_icon("wi wi-" + name, size), column * 2, 0, 1, 1)
+            self.sun[name] = new_label("weewx-small")
+            grid.attach(self.sun[name], column * 2 + 1, 0, 1, 1)
+
+        self.content.pack_start(grid, False, False, 0)
+
+    def fill(self, model):
+        set_text(self.temp, model['temp'])
+        self.at.set_visible(model['at'] is not None)
+        set_text(self.at, model['at'] or "")
+
+        set_row(self.rows[0], [model['wind'], model['barometer']])
+        set_row(self.rows[1], [model['wind_dir'], model['humidity']])
+        set_row(self.rows[2], [model['rain'], model['dewpoint']])
+        set_row(self.rows[3], [model['uv'], model['radiation']])
+        set_row(self.rows[4], model['indoor'])
+        set_icon(self.rows[1][0], model['towards'], self.size)
+
+        for name, label in self.sun.items():
+            set_text(label, model[name])
+
+class statsView(nativeView):
+    """ The Stats tab """
+
+    def __init__(self, iw):
+        nativeView.__init__(self)
+
+        self.periods = []
+        for period, title, unit, clock in common.STATS_PERIODS:
+            # The HTML pages size every period's icons but today's in px rather than pt
+            size = float(iw)
+            if unit == "px":
+                size = size * 0.75
+
+            heading = new_label("weewx-heading", 0.5)
+            self.content.pack_start(heading, False, False, 0)
+
+            grid = Gtk.Grid(column_spacing=8, row_spacing=4)
+            rows = []
+            icons = [row[1] for row in STATS_ROWS] + [UV_ICON]
+            for row, icon in enumerate(icons):
+                icon_size = size
+                if icon == "wi wi-raindrop":
+                    icon_size = size * 1.4
+
+                labels = [new_icon(icon, icon_size), new_label("weewx-value"),
+                          new_label("weewx-small"), new_label("weewx-small", 1.0),
+                          new_label("weewx-value", 1.0), new_icon(icon, icon_size)]
+                for column, label in enumerate(labels):
+                    grid.attach(label, column, row, 1, 1)
+                rows.append(labels)
+
+            row = len(rows)
+            wind = [new_icon("flaticon-windy", size), new_label("weewx-value"),
+                    new_label("weewx-value", 1.0), new_icon("wi wi-umbrella", size)]
+            grid.attach(wind[0], 0, row, 1, 1)
+            grid.attach(wind[1], 1, row, 3, 1)
+            grid.attach(wind[2], 4, row, 1, 1)
+            grid.attach(wind[3], 5, row, 1, 1)
+
+            since = new_label("weewx-small", 1.0)
+            grid.attach(since, 4, row + 1, 2, 1)
+
+            self.content.pack_start(grid, False, False, 0)
+            self.periods.append((heading, rows, wind, since))
+
+    def fill(self, model):
+        for (heading, rows, wind, since), period in zip(self.periods, model['periods']):
+            set_text(heading, period['title'])
+
+            for labels, values in zip(rows, period['rows'] + [period['uv']]):
+                set_row(labels, values)
+
+            set_row(wind, [period['wind'], period['rain']])
+            since.set_visible(period['since'] is not None)
+            set_text(since, period['since'] or "")
+
+# The views that can be native, by the WebView they stand in for
+VIEWS = {"webview1": conditionsView, "webview3": statsView}
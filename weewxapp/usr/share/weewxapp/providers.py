@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+
+""" Every forecast provider the app knows, by fctype. The module that parses a provider's
+    forecasts is only imported the first time that provider is used. """
+
+import importlib
+
+class Provider(object):
+    """ How to set up, parse and credit one fctype. uses_units is True for the providers
+        whose parser picks values for the units setting, so their parsed forecasts are kept
+        per unit """
+
+    __slots__ = ("fctype", "module", "parser", "banner", "needs_icons", "url", "uses_units")
+
+    def __init__(self, fctype, module, parser, banner, needs_icons=False, url=None,
+                 uses_units=False):
+        self.fctype = fctype
+        self.module = module
+        self.parser = parser
+        self.banner = banner
+        self.needs_icons = needs_icons
+        self.url = url
+        self.uses_units = uses_units
+
+    def parse(self, data, settings):
+        """ Run the provider's parser, importing its module if need be """
+
+        return getattr(importlib.import_module(self.module), self.parser)(data, settings)
+
+    def build_url(self, forecast_url):
+        """ [True, url to download, {extra setting: value}] from the forecast setting in
+            settings.txt, or [False, message]. Forecasts are always downloaded in the same
+            units so changing the units setting doesn't mean downloading them again """
+
+        if self.url is None:
+            return [True, forecast_url, {}]
+
+        return self.url(forecast_url)
+
+def yahoo_url(forecast_url):
+    if not forecast_url.startswith("http"):
+        return [False, "Yahoo API recently changed, you need to update your settings."]
+
+    return [True, forecast_url, {}]
+
+def wz_url(forecast_url):
+    return [True, "https://rss.weatherzone.com.au/?u=12994-1285&lt=aploc&lc=" + forecast_url +
+            "&obs=0&fc=1&warn=0", {}]
+
+def bom_url(forecast_url):
+    bomtown = forecast_url.split(",", 1)[1].strip()
+    return [True, "ftp://ftp.bom.gov.au/anon/gen/fwo/" + forecast_url.split(",", 1)[0].strip() +
+            ".xml", {"bomtown": bomtown}]
+
+def wmo_url(forecast_url):
+    if not forecast_url.startswith("http"):
+        forecast_url = "https://worldweather.wmo.int/en/json/" + forecast_url.strip() + "_en.xml"
+
+    return [True, forecast_url, {}]
+
+def wgov_url(forecast_url):
+    lat = lon = "0.0"
+
+    if "?" in forecast_url:
+        forecast_url = forecast_url.split("?", 1)[1]
+        if "lat" not in forecast_url or "lon" not in forecast_url:
+            return [False, "Failed to get a valid url or coordinates."]
+
+        for bit in forecast_url.split("&"):
+            if bit.startswith("lat="):
+                lat = bit[4:].strip()
+            if bit.startswith("lon="):
+                lon = bit[4:].strip()
+    else:
+        lat = forecast_url.split(",", 1)[0]
+        lon = forecast_url.split(",", 1)[1]
+
+    if lat == "0.0" and lon == "0.0":
+        return [False, "Longitude or Latitude was not specified for weather.gov forecasts"]
+
+    return [True, "https://forecast.weather.gov/MapClick.php?lat=" + lat + "&lon=" + lon +
+            "&unit=0&lg=english&FcstType=json", {}]
+
+def metservice_url(forecast_url):
+    return [True, "https://www.metservice.com/publicData/localForecast" + forecast_url, {}]
+
+def darksky_url(forecast_url):
+    forecast_url += "?exclude=currently,minutely,hourly,alerts,flags&lang=en&units=ca"
+
+    return [True, forecast_url, {}]
+
+def owm_url(forecast_url):
+    return [True, forecast_url + "&units=metric", {}]
+
+def apixu_url(forecast_url):
+    return [True, forecast_url + "&days=10", {}]
+
+def wcom_url(forecast_url):
+    forecast_url = "https://api.weather.com/v2/turbo/vt1dailyForecast?apiKey=d522" + \
+                   "aa97197fd864d36b418f39ebb323&format=json&geocode=" + forecast_url + \
+                   "&language=en-US&units=m"
+
+    return [True, forecast_url, {}]
+
+def metie_url(forecast_url):
+    # The town name is looked up from the reverse url when the settings are saved
+    metierev = "https://prodapi.metweb.ie/location/reverse/" + forecast_url.replace(",", "/")
+    return [True, "https://prodapi.metweb.ie/weather/daily/" + forecast_url.replace(",", "/") +
+            "/10", {"metierev": metierev}]
+
+PROVIDERS = {}
+
+for provider in (Provider("yahoo", "yahoo", "process_yahoo", "purple.png", True, yahoo_url),
+                 Provider("weatherzone", "forecasts", "process_wz", "wz.png", url=wz_url),
+                 Provider("yr.no", "forecasts", "process_yrno", "yrno.png"),
+                 Provider("bom.gov.au", "forecasts", "process_bom1", "bom.png", url=bom_url),
+                 Provider("wmo.int", "forecasts", "process_wmo", "wmo.png", url=wmo_url,
+                          uses_units=True),
+                 Provider("weather.gov", "wgov", "process_wgov", "wgov.png", True, wgov_url),
+                 Provider("weather.gc.ca", "wca", "process_wca", "wca.png"),
+                 Provider("weather.gc.ca-fr", "wca", "process_wcafr", "wca.png"),
+                 Provider("metoffice.gov.uk", "forecasts", "process_metoffice", "met.png"),
+                 Provider("bom2", "forecasts", "process_bom2", "bom.png"),
+                 Provider("aemet.es", "forecasts", "process_aemet", "aemet.jpg"),
+                 Provider("dwd.de", "forecasts", "process_dwd", "dwd.jpg"),
+                 Provider("metservice.com", "forecasts", "process_metservice", "metservice.png",
+                          url=metservice_url),
+                 Provider("meteofrance.com", "meteofrance", "process_mf", "mf.png"),
+                 Provider("darksky.net", "forecasts", "process_darksky", "darksky.png",
+                          url=darksky_url),
+                 Provider("openweathermap.org", "forecasts", "process_owm", "owm.png",
+                          url=owm_url),
+                 Provider("apixu.com", "forecasts", "process_apixu", "apixu.png", url=apixu_url),
+                 Provider("weather.com", "forecasts", "process_wcom", "weather_com.png",
+                          url=wcom_url),
+                 Provider("met.ie", "forecasts", "process_metie", "met_ie.png", url=metie_url)):
+    PROVIDERS[provider.fctype] = provider
+
+def get(fctype):
+    """ The Provider for an fctype, or None if there isn't one """
+
+    return PROVIDERS.get(fctype)
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+""" Named access to the fields of the Inigo data.txt payload """
+
+import operator
+
+# The Inigo plugin sends one line of pipe separated fields, with the plugin version in front.
+# Each schema maps a field's position (after the version is stripped) to a name, older
+# plugins send fewer fields and anything missing off the end gets the default.
+
+def highs_lows(first, name):
+    """ Four fields in a row, the high, when it happened, the low and when it happened """
+
+    return {first: name + "_high", first + 1: name + "_high_time",
+            first + 2: name + "_low", first + 3: name + "_low_time"}
+
+def lows_highs(first, name):
+    """ Same as highs_lows() but the low comes first, barometer ranges are sent this way """
+
+    return {first: name + "_low", first + 1: name + "_low_time",
+            first + 2: name + "_high", first + 3: name + "_high_time"}
+
+def wind_gust(first, name):
+    """ Three fields in a row, the top gust, its direction and when it happened """
+
+    return {first: name, first + 1: name + "_dir", first + 2: name + "_time"}
+
+def uv_solar(first, name):
+    """ Four fields in a row, the top UV index and solar radiation and when they happened """
+
+    return {first: "uv_" + name, first + 1: "uv_" + name + "_time",
+            first + 2: "radiation_" + name, first + 3: "radiation_" + name + "_time"}
+
+SCHEMA_4000 = {0: "out_temp", 6: "out_humidity", 12: "dewpoint", 20: "rain_today",
+               21: "rain_yesterday", 22: "rain_month", 23: "rain_year", 25: "wind_speed",
+               30: "wind_dir", 37: "barometer", 43: "radiation", 45: "uv", 47: "moonrise",
+               48: "moonset", 54: "date", 55: "time", 56: "station", 57: "sunrise",
+               58: "sunset", 60: "temp_unit", 61: "wind_unit", 62: "rain_unit",
+               63: "pressure_unit", 64: "humidity_unit", 157: "rain_alltime",
+               158: "rain_since_today", 159: "rain_since_yesterday", 160: "rain_since_hour",
+               161: "indoor_temp", 166: "indoor_humidity", 203: "apparent_temp"}
+
+for first, name in ((39, "barometer_today"), (84, "barometer_yesterday"),
+                    (107, "barometer_month"), (130, "barometer_year"),
+                    (153, "barometer_alltime")):
+    SCHEMA_4000.update(lows_highs(first, name))
+
+for first, name in ((1, "temp_today"), (13, "dewpoint_today"),
+                    (65, "temp_yesterday"), (76, "dewpoint_yesterday"),
+                    (80, "humidity_yesterday"), (88, "temp_month"), (99, "dewpoint_month"),
+                    (103, "humidity_month"), (111, "temp_year"), (122, "dewpoint_year"),
+                    (126, "humidity_year"), (134, "temp_alltime"), (145, "dewpoint_alltime"),
+                    (149, "humidity_alltime"),
+                    (162, "indoor_temp_today"), (167, "indoor_humidity_today"),
+                    (171, "indoor_temp_yesterday"), (175, "indoor_humidity_yesterday"),
+                    (179, "indoor_temp_month"), (183, "indoor_humidity_month"),
+                    (187, "indoor_temp_year"), (191, "indoor_humidity_year"),
+                    (195, "indoor_temp_alltime"), (199, "indoor_humidity_alltime")):
+    SCHEMA_4000.update(highs_lows(first, name))
+
+# Today's top gust is the odd one out, its direction and time come later in the line
+SCHEMA_4000.update({19: "wind_today", 32: "wind_today_dir", 33: "wind_today_time"})
+
+# Today's humidity range has no high of its own, the current reading is shown for it
+SCHEMA_4000.update({8: "humidity_today_high_time", 9: "humidity_today_low",
+                    10: "humidity_today_low_time"})
+
+for first, name in ((69, "wind_yesterday"), (92, "wind_month"),
+                    (115, "wind_year"), (138, "wind_alltime")):
+    SCHEMA_4000.update(wind_gust(first, name))
+
+for first, name in ((205, "today"), (209, "yesterday"), (213, "month"), (217, "year"),
+                    (221, "alltime")):
+    SCHEMA_4000.update(uv_solar(first, name))
+
+# Every plugin version this app knows the layout of, newest schema that isn't newer than
+# the plugin wins
+SCHEMAS = {4000: SCHEMA_4000}
+
+# Extra names for fields that are already in a schema
+ALIASES = {4000: {"humidity_today_high": "out_humidity"}}
+
+class StationRecord(object):
+    """ One parsed data.txt, fields are read as attributes named in the schema """
+
+    __slots__ = ("version", "count", "values", "fields")
+
+    def __init__(self, version, count, values):
+        self.version = version
+        self.count = count
+        self.values = values
+        self.fields = None
+
+    def has(self, name):
+        """ True if the server actually sent this field """
+
+        return INDEXES[self.version][name] < self.count
+
+    def get(self, name):
+        """ Look up a field by name """
+
+        return self.values[INDEXES[self.version][name]]
+
+    def as_dict(self):
+        """ Every named field in a dict, worked out the first time it's asked for """
+
+        if self.fields is None:
+            names, getter = GETTERS[self.version]
+            self.fields = dict(zip(names, getter(self.values)))
+
+        return self.fields
+
+def schema_for(version):
+    """ The newest schema that isn't newer than the plugin version """
+
+    known = [ver for ver in SCHEMAS if ver <= version]
+    if not known:
+        raise ValueError("Inigo plugin version " + str(version) + " is too old")
+
+    return max(known)
+
+def parse(data, version):
+    """ Split data.txt once and build a StationRecord from it """
+
+    version = schema_for(version)
+    layout = LAYOUTS[version]
+
+    bits = data.strip().split("|")
+    count = len(bits)
+
+    if count < len(layout):
+        bits += layout[count:]
+    else:
+        del bits[len(layout):]
+
+    return StationRecord(version, count, tuple(bits))
+
+# The value every field of each schema defaults to, name -> position and a getter that pulls
+# every named field out at once, all worked out once here. Every field is a string the server
+# has already formatted and is shown as it is, so a field an older plugin doesn't send
+# defaults to "" and is left blank
+LAYOUTS = {}
+INDEXES = {}
+GETTERS = {}
+
+for ver, schema in SCHEMAS.items():
+    LAYOUTS[ver] = [""] * (max(schema) + 1)
+    INDEXES[ver] = {name: index for index, name in schema.items()}
+    for alias, name in ALIASES.get(ver, {}).items():
+        INDEXES[ver][alias] = INDEXES[ver][name]
+
+    GETTERS[ver] = (tuple(INDEXES[ver]), operator.itemgetter(*INDEXES[ver].values()))
+
+    for name in INDEXES[ver]:
+        if not hasattr(StationRecord, name):
+            setattr(StationRecord, name, property(lambda self, name=name: self.get(name)))
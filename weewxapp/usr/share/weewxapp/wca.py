@@ -12,13 +12,12 @@ FR_MONTHS = {'janvier':'January', 'février':'February', 'mars':'March', 'avril'
              'septembre':'September', 'octobre':'October', 'novembre':'November',
              'décembre':'December'}
 
-def process_wca(data):
+def process_wca(data, settings):
     """ Process forecast for weather.gc.ca """
 
-    metric = common.get_string("metric", "1")
-    use_icons = common.get_string("use_icons", "0")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
     last_ts = 0
 
     obs = data.split("Forecast issued: ", 1)[1].strip()
@@ -88,11 +87,7 @@ def process_wca(data):
             date = tmpday + " " + month + " " + year
             timestamp1 = time.mktime(time.strptime(date, '%d %B %Y'))
 
-            maxtemp = str(div[j]).split('title="max">', 1)[1].split("°", 1)[0].strip()
-            if metric == "1":
-                maxtemp += "&deg;C"
-            else:
-                maxtemp = str(round(int(maxtemp) * 9 / 5 + 32)) + "&deg;F"
+            maxtemp = day.temperature(str(div[j]).split('title="max">', 1)[1].split("°", 1)[0])
 
             mystr = str(div[j]).split('<div class="div-row div-row2 div-row-data">', 1)[1]
             mystr = mystr.split('</div>', 1)[0].strip()
@@ -115,11 +110,7 @@ def process_wca(data):
                 head2 = head2.split("</div>", 1)[0].strip()
                 timestamp2 = last_ts
 
-            mintemp = str(div[j]).split('title="min">', 1)[1].split("°", 1)[0].strip()
-            if metric == "1":
-                mintemp += "&deg;C"
-            else:
-                mintemp = str(round(int(mintemp) * 9 / 5 + 32)) + "&deg;F"
+            mintemp = day.temperature(str(div[j]).split('title="min">', 1)[1].split("°", 1)[0])
 
             mystr = str(div[j]).split('<div class="div-row div-row4 div-row-data">', 1)[1]
             mystr = mystr.split('</div>', 1)[0].strip()
@@ -148,7 +139,7 @@ def process_wca(data):
 
         if head1 != "":
             img1 = img1[14:-4]
-            if use_icons == "1":
+            if use_icons:
                 img1 = "wca" + img1 + ".png"
             else:
                 if img1 == "26":
@@ -163,11 +154,11 @@ def process_wca(data):
             myday1.day = datetime.datetime.fromtimestamp(myday1.timestamp).strftime("%A")
             myday1.min = pop1
 
-            days += str(myday1) + ","
+            days.append(myday1)
 
         if head2 != "":
             img2 = img2[14:-4]
-            if use_icons == "1":
+            if use_icons:
                 img2 = "wca" + img2 + ".png"
             else:
                 if img2 == "26":
@@ -183,23 +174,18 @@ def process_wca(data):
             myday2.day += " Night"
             myday2.min = pop2
 
-            days += str(myday2) + ","
+            days.append(myday2)
 
         j += 1
 
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
-
     return [True, days, desc]
 
-def process_wcafr(data):
+def process_wcafr(data, settings):
     """ Process forecast for weather.gc.ca in French """
 
-    metric = common.get_string("metric", "1")
-    use_icons = common.get_string("use_icons", "0")
+    use_icons = settings.use_icons
 
-    days = ""
+    days = []
     last_ts = 0
 
     obs = data.split("Prévisions émises à : ", 1)[1].strip()
@@ -274,11 +260,7 @@ def process_wcafr(data):
             date = tmpday + " " + month + " " + year
             timestamp1 = time.mktime(time.strptime(date, '%d %B %Y'))
 
-            maxtemp = str(int(str(div[j]).split('title="max">', 1)[1].split("°", 1)[0].strip()))
-            if metric == "1":
-                maxtemp += "&deg;C"
-            else:
-                maxtemp = str(round(int(maxtemp) * 9 / 5 + 32)) + "&deg;F"
+            maxtemp = int(str(div[j]).split('title="max">', 1)[1].split("°", 1)[0].strip())
 
             mystr = str(div[j]).split('<div class="div-row div-row2 div-row-data">', 1)[1]
             mystr = mystr.split('</div>', 1)[0].strip()
@@ -305,11 +287,7 @@ def process_wcafr(data):
                 head2 = head2.split("</div>", 1)[0].strip()
                 timestamp2 = last_ts
 
-            mintemp = str(int(str(div[j]).split('title="min">', 1)[1].split("°", 1)[0].strip()))
-            if metric == "1":
-                mintemp += "&deg;C"
-            else:
-                mintemp = str(round(int(mintemp) * 9 / 5 + 32)) + "&deg;F"
+            mintemp = int(str(div[j]).split('title="min">', 1)[1].split("°", 1)[0].strip())
 
             mystr = str(div[j]).split('<div class="div-row div-row4 div-row-data">', 1)[1]
             mystr = mystr.split('</div>', 1)[0].strip()
@@ -338,7 +316,7 @@ def process_wcafr(data):
 
         if head1 != "":
             img1 = img1[14:-4]
-            if use_icons == "1":
+            if use_icons:
                 img1 = "wca" + img1 + ".png"
             else:
                 if img1 == "26":
@@ -353,11 +331,11 @@ def process_wcafr(data):
             myday1.day = datetime.datetime.fromtimestamp(myday1.timestamp).strftime("%A")
             myday1.min = pop1
 
-            days += str(myday1) + ","
+            days.append(myday1)
 
         if head2 != "":
             img2 = img2[14:-4]
-            if use_icons == "1":
+            if use_icons:
                 img2 = "wca" + img2 + ".png"
             else:
                 if img2 == "26":
@@ -373,12 +351,8 @@ def process_wcafr(data):
             myday2.day += " Night"
             myday2.min = pop2
 
-            days += str(myday2) + ","
+            days.append(myday2)
 
         j += 1
 
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
-
     return [True, days, desc]
@@ -1,12 +1,12 @@
 """ Weather.gov forecast code """
 
-import base64
 import json
 import time
 from io import BytesIO
 import os
 import re
 from PIL import Image, ImageDraw, ImageFont
+import assetcache
 import day
 import common
 
@@ -91,7 +91,7 @@ def combine_images(bmp1, bmp2, fimg, simg, fnum, snum):
 
     bmp = do_text(bmp, fnum, snum)
 
-    return img_to_base64(bmp)
+    return img_to_asset(bmp)
 
 def do_text(bmp, fnum, snum):
     """ Combine the text functions """
@@ -120,27 +120,25 @@ def do_text(bmp, fnum, snum):
 
     return bmp
 
-def img_to_base64(bmp):
-    """ Save image in base64 string """
+def img_to_asset(bmp):
+    """ Save image as a JPEG served over weewx://, and return its URI """
 
+    # JPEG has no alpha channel, Pillow refuses to save RGBA as one
     buffer = BytesIO()
-    bmp.save(buffer, format="JPEG")
-    myimage = str(base64.b64encode(buffer.getvalue()))
+    bmp.convert("RGB").save(buffer, format="JPEG")
 
-    return "data:image/jpeg;base64," + myimage[2:-1]
+    return assetcache.put("wgov", buffer.getvalue(), ".jpg")
 
 def combine_image(bmp, fnum, snum):
     """ Combine weather.gov forecast with image """
 
     bmp = do_text(bmp, fnum, snum)
-    return img_to_base64(bmp)
+    return img_to_asset(bmp)
 
-def process_wgov(data):
+def process_wgov(data, settings):
     """ Process the data from weather.gov """
 
-    metric = common.get_string("metric", "1")
-
-    days = ""
+    days = []
 
     jobj = json.loads(data)
 
@@ -207,17 +205,12 @@ def process_wgov(data):
         myday.timestamp = time.mktime(time.strptime(date, '%Y-%m-%dT%H:%M:%S%z'))
         myday.day = period_name[i]
 
-        myday.max = temperature[i] + "&deg;F"
-        if metric == "1":
-            myday.max = str(round((float(temperature[i]) - 32) * 5 / 9)) + "&deg;C"
+        myday.max = day.temperature(temperature[i])
+        myday.unit = "F"
 
         myday.text = weather[i]
         myday.icon = icon_link[i]
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]
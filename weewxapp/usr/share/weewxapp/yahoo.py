@@ -7,7 +7,7 @@ import day
 import forecasts
 import common
 
-def process_day(tmpstr, startid, metric):
+def process_day(tmpstr, startid):
     """ Extract data based on the id number """
 
     last_ts = int(time.time())
@@ -35,21 +35,15 @@ def process_day(tmpstr, startid, metric):
     soup = BeautifulSoup(mintemp, "html.parser")
     mintemp = soup.text[:-1]
 
-    if metric == "1":
-        maxtemp = str(round((int(maxtemp) - 32) * 5 / 9)) + "&deg;C"
-        mintemp = str(round((int(mintemp) - 32) * 5 / 9)) + "&deg;C"
-    else:
-        maxtemp += "&deg;F"
-        mintemp += "&deg;F"
-
     myday = day.Day()
 
     myday.day = dow
     myday.timestamp = timestamp
     myday.text = text
     myday.icon = icon
-    myday.min = mintemp
-    myday.max = maxtemp
+    myday.min = day.temperature(mintemp)
+    myday.max = day.temperature(maxtemp)
+    myday.unit = "F"
 
     return myday, rest
 
@@ -70,12 +64,10 @@ def check_files(url):
 
     return [True, "yahoo-" + file_name]
 
-def process_yahoo(data):
+def process_yahoo(data, settings):
     """ Process Yahoo forecast """
 
-    metric = common.get_string("metric", "1")
-
-    days = ""
+    days = []
 
     bits = data.split('data-reactid="7">', 7)
 
@@ -85,17 +77,13 @@ def process_yahoo(data):
 
     daynums = [196, 221, 241, 261, 281, 301, 321, 341, 361, 381]
     for startid in daynums:
-        myday, rest = process_day(rest, startid, metric)
+        myday, rest = process_day(rest, startid)
         ret = check_files(myday.icon)
         if ret[0] is True:
             myday.icon = ret[1]
         else:
             return ret
 
-        days += str(myday) + ","
-
-    if days[-1:] == ",":
-        days = days[:-1]
-    days = "[" + days + "]"
+        days.append(myday)
 
     return [True, days, desc]